@@ -0,0 +1,154 @@
+"""Análise incremental de malhas: contadores atualizados só nas regiões alteradas."""
+import numpy as np
+
+
+def chaves_arestas(faces):
+    """Codifica as arestas não-orientadas de cada face em int64 (menor << 32 | maior)"""
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    arestas = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    arestas.sort(axis=1)
+    return (arestas[:, 0] << 32) | arestas[:, 1]
+
+
+def chaves_posicoes(vertices):
+    """Codifica cada posição (x, y, z) como uma chave binária de 24 bytes"""
+    # Somar 0.0 normaliza -0.0 para 0.0, como o np.unique(axis=0) faria
+    v = np.ascontiguousarray(np.asarray(vertices, dtype=np.float64).reshape(-1, 3) + 0.0)
+    return v.view(np.dtype((np.void, 24))).ravel()
+
+
+class ContagemChaves:
+    """Multiplicidade por chave: base ordenada (busca binária) + dicionário para chaves novas"""
+
+    def __init__(self, chaves):
+        self.chaves, self.contagens = np.unique(chaves, return_counts=True)
+        self.contagens = self.contagens.astype(np.int64)
+        self.extras = {}
+
+    def aplicar(self, chaves, delta):
+        """Soma delta a cada ocorrência das chaves; retorna contagens (antes, depois) por chave única"""
+        chaves, repeticoes = np.unique(chaves, return_counts=True)
+        antes = np.zeros(len(chaves), dtype=np.int64)
+        if len(self.chaves) > 0:
+            pos = np.minimum(np.searchsorted(self.chaves, chaves), len(self.chaves) - 1)
+            na_base = self.chaves[pos] == chaves
+        else:
+            pos = np.zeros(len(chaves), dtype=np.int64)
+            na_base = np.zeros(len(chaves), dtype=bool)
+        antes[na_base] = self.contagens[pos[na_base]]
+        depois = antes + delta * repeticoes
+        self.contagens[pos[na_base]] = depois[na_base]
+        # Chaves fora da base ordenada ficam no dicionário de extras
+        for i in np.flatnonzero(~na_base):
+            chave = chaves[i].item()
+            antes[i] = self.extras.get(chave, 0)
+            depois[i] = antes[i] + delta * repeticoes[i]
+            if depois[i]:
+                self.extras[chave] = int(depois[i])
+            else:
+                self.extras.pop(chave, None)
+        return antes, depois
+
+    def consultar(self, chaves):
+        """Retorna a contagem atual de cada chave (0 se ausente)"""
+        resultado = np.zeros(len(chaves), dtype=np.int64)
+        if len(self.chaves) > 0:
+            pos = np.minimum(np.searchsorted(self.chaves, chaves), len(self.chaves) - 1)
+            na_base = self.chaves[pos] == chaves
+            resultado[na_base] = self.contagens[pos[na_base]]
+        else:
+            na_base = np.zeros(len(chaves), dtype=bool)
+        if self.extras:
+            for i in np.flatnonzero(~na_base):
+                resultado[i] = self.extras.get(chaves[i].item(), 0)
+        return resultado
+
+
+class AnaliseIncremental:
+    """Contadores de arestas abertas, arestas não-manifold e vértices duplicados.
+
+    A construção inicial é global (vetorizada); depois as operações informam as
+    faces e vértices alterados e os contadores são atualizados em O(alterado).
+    """
+
+    def __init__(self, mesh):
+        vertices = np.asarray(mesh.vertices)
+        faces = np.asarray(mesh.faces, dtype=np.int64).reshape(-1, 3)
+        self.n_faces = len(faces)
+        self._arestas = ContagemChaves(chaves_arestas(faces))
+        contagens = self._arestas.contagens
+        self.n_arestas_abertas = int(np.count_nonzero(contagens == 1))
+        self.n_arestas_nao_manifold = int(np.count_nonzero(contagens > 2))
+        # Número de faces que usam cada vértice (vértices soltos não contam)
+        self._uso = np.bincount(faces.ravel(), minlength=len(vertices)).astype(np.int64)
+        self.n_vertices = int(np.count_nonzero(self._uso))
+        self._posicoes = ContagemChaves(chaves_posicoes(vertices))
+        self.n_duplicados = len(vertices) - len(self._posicoes.chaves)
+
+    @property
+    def watertight(self):
+        return self.n_faces > 0 and self.n_arestas_abertas == 0 and self.n_arestas_nao_manifold == 0
+
+    def _atualizar_arestas(self, faces, delta):
+        antes, depois = self._arestas.aplicar(chaves_arestas(faces), delta)
+        self.n_arestas_abertas += int(np.count_nonzero(depois == 1) - np.count_nonzero(antes == 1))
+        self.n_arestas_nao_manifold += int(np.count_nonzero(depois > 2) - np.count_nonzero(antes > 2))
+
+    def _atualizar_uso(self, faces, delta):
+        indices, repeticoes = np.unique(faces.ravel(), return_counts=True)
+        antes = self._uso[indices]
+        depois = antes + delta * repeticoes
+        self._uso[indices] = depois
+        self.n_vertices += int(np.count_nonzero(depois > 0) - np.count_nonzero(antes > 0))
+
+    def _atualizar_posicoes(self, posicoes, delta):
+        antes, depois = self._posicoes.aplicar(chaves_posicoes(posicoes), delta)
+        # Duplicados = soma de (multiplicidade - 1) sobre as posições presentes
+        self.n_duplicados += int(np.maximum(depois - 1, 0).sum() - np.maximum(antes - 1, 0).sum())
+
+    def remover_faces(self, faces):
+        """Informa as faces (linhas de índices) que foram removidas da malha"""
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        if len(faces) == 0:
+            return
+        self._atualizar_arestas(faces, -1)
+        self._atualizar_uso(faces, -1)
+        self.n_faces -= len(faces)
+
+    def adicionar_faces(self, faces):
+        """Informa faces novas; vértices novos devem ser informados antes com adicionar_vertices"""
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        if len(faces) == 0:
+            return
+        self._atualizar_arestas(faces, 1)
+        self._atualizar_uso(faces, 1)
+        self.n_faces += len(faces)
+
+    def adicionar_vertices(self, posicoes):
+        """Informa vértices acrescentados ao final do array de vértices"""
+        posicoes = np.asarray(posicoes, dtype=np.float64).reshape(-1, 3)
+        if len(posicoes) == 0:
+            return
+        self._uso = np.concatenate([self._uso, np.zeros(len(posicoes), dtype=np.int64)])
+        self._atualizar_posicoes(posicoes, 1)
+
+    def mover_vertices(self, posicoes_antigas, posicoes_novas):
+        """Informa vértices que mudaram de posição (sem mudar de índice)"""
+        self._atualizar_posicoes(posicoes_antigas, -1)
+        self._atualizar_posicoes(posicoes_novas, 1)
+
+    def arestas_abertas(self):
+        """Pares de vértices (n, 2) das arestas usadas por uma única face"""
+        chaves = self._arestas.chaves[self._arestas.contagens == 1]
+        extras = [chave for chave, contagem in self._arestas.extras.items() if contagem == 1]
+        if extras:
+            chaves = np.concatenate([chaves, np.array(extras, dtype=np.int64)])
+        return np.column_stack([chaves >> 32, chaves & 0xFFFFFFFF])
+
+    def faces_nao_manifold(self, faces):
+        """Índices das faces que tocam alguma aresta compartilhada por mais de 2 faces"""
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        if self.n_arestas_nao_manifold == 0 or len(faces) == 0:
+            return np.zeros(0, dtype=np.int64)
+        contagens = self._arestas.consultar(chaves_arestas(faces)).reshape(-1, 3)
+        return np.flatnonzero((contagens > 2).any(axis=1))
@@ -0,0 +1,274 @@
+"""Autointerseções: pares de triângulos que se cruzam (grade espacial) e resolução local por remoção + remendo."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from buracos import preencher_buracos_locais
+from topologia import rotular_componentes
+from voxel_esparso import linhas_unicas
+
+
+# Células da caixa envolvente por face no nível escolhido: faces maiores sobem para níveis mais grossos
+MAX_CELULAS_FACE = 64
+# Grupos maiores que isso procuram o vértice comum (centro de leque) antes de formar pares
+MIN_GRUPO_LEQUE = 16
+
+
+def _toca_cubo(tri, centros, meio):
+    """Teste de eixos separadores (Akenine-Möller): triângulos (m, 3, 3) x cubos (centro, meio lado).
+
+    Os 3 eixos do cubo já foram testados pela caixa envolvente; ficam os 9
+    eixos aresta x eixo do cubo e a normal do triângulo.
+    """
+    v = [tri[:, k] - centros for k in range(3)]
+    folga = meio * (1 + 1e-9)
+    toca = np.ones(len(tri), dtype=bool)
+    for k in range(3):
+        aresta = v[(k + 1) % 3] - v[k]
+        # Projetados no eixo aresta x e_j, os dois vértices da aresta coincidem: basta o oposto
+        for j in range(3):
+            a1, a2 = (j + 1) % 3, (j + 2) % 3
+            p0 = v[k][:, a1] * aresta[:, a2] - v[k][:, a2] * aresta[:, a1]
+            p2 = v[(k + 2) % 3][:, a1] * aresta[:, a2] - v[(k + 2) % 3][:, a2] * aresta[:, a1]
+            r = folga * (np.abs(aresta[:, a1]) + np.abs(aresta[:, a2]))
+            toca &= (np.minimum(p0, p2) <= r) & (np.maximum(p0, p2) >= -r)
+    normal = np.cross(v[1] - v[0], v[2] - v[0])
+    return toca & (np.abs((normal * v[0]).sum(axis=1)) <= folga * np.abs(normal).sum(axis=1))
+
+
+def _celulas_da_caixa(minimos, maximos, origem, tamanho, faces_nivel):
+    """(face, célula, grande) para cada célula de lado `tamanho` coberta pela caixa envolvente da face.
+
+    grande marca as faces cuja caixa cobre mais de 8 células (lascas, faces em
+    diagonal): nelas a caixa superestima muito o que o triângulo toca.
+    """
+    c0 = np.floor((minimos[faces_nivel] - origem) / tamanho).astype(np.int64)
+    extensao = np.floor((maximos[faces_nivel] - origem) / tamanho).astype(np.int64) - c0 + 1
+    por_face = extensao.prod(axis=1)
+    face = np.repeat(np.arange(len(faces_nivel)), por_face)
+    local = np.arange(len(face)) - np.repeat(np.cumsum(por_face) - por_face, por_face)
+    ex = extensao[face]
+    celulas = c0[face] + np.column_stack([local % ex[:, 0], (local // ex[:, 0]) % ex[:, 1],
+                                          local // (ex[:, 0] * ex[:, 1])])
+    return faces_nivel[face], celulas, por_face[face] > 8
+
+
+def _tocadas(tri, origem, tamanho, face, celulas, grande, bloco=200_000):
+    """Máscara das entradas (face, célula) que ficam: as de caixa pequena e as que o triângulo toca de fato"""
+    manter = np.ones(len(face), dtype=bool)
+    grandes = np.flatnonzero(grande)
+    for inicio in range(0, len(grandes), bloco):
+        k = grandes[inicio:inicio + bloco]
+        manter[k] = _toca_cubo(tri[face[k]], origem + (celulas[k] + 0.5) * tamanho, tamanho / 2)
+    return manter
+
+
+def _vertice_comum(faces, grupo, face, n_grupos):
+    """Por grupo, o vértice presente em mais faces (o centro de um leque) e a máscara das faces que o usam"""
+    tamanhos = np.bincount(grupo, minlength=n_grupos)
+    comum = np.full(n_grupos, -1, dtype=np.int64)
+    grandes = np.flatnonzero(tamanhos[grupo] > MIN_GRUPO_LEQUE)
+    if len(grandes):
+        n_vertices = int(faces.max()) + 1
+        chaves = (grupo[grandes][:, None] * n_vertices + faces[face[grandes]]).ravel()
+        unicas, contagens = np.unique(chaves, return_counts=True)
+        g, v = unicas // n_vertices, unicas % n_vertices
+        # Em cada grupo fica o vértice de maior contagem (ordem por grupo e contagem)
+        ordem = np.lexsort((contagens, g))
+        ultimo = np.r_[g[ordem][1:] != g[ordem][:-1], True]
+        comum[g[ordem][ultimo]] = v[ordem][ultimo]
+    return (faces[face] == comum[grupo][:, None]).any(axis=1)
+
+
+def pares_candidatos(vertices, faces, tamanho_celula=None):
+    """Pares (i < j) de faces que tocam uma mesma célula de uma grade hierárquica e cujas caixas se sobrepõem.
+
+    Cada face fica no nível mais fino em que a caixa cobre até MAX_CELULAS_FACE
+    células (faces grandes sobem de nível) e visita os níveis mais grossos;
+    pares só se formam com faces do próprio nível da célula. Faces de uma
+    célula que dividem o vértice mais comum (centro de um leque, ex.: tampa
+    de cilindro CAD) não formam pares entre si: são vizinhas e seriam
+    descartadas depois de qualquer forma.
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    if len(faces) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    tri = vertices[faces]
+    minimos, maximos = tri.min(axis=1), tri.max(axis=1)
+    origem = minimos.min(axis=0)
+    if tamanho_celula is None:
+        # Célula na escala da face típica pela área: lascas longas e finas não inflam a grade
+        area = 0.5 * np.linalg.norm(np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1)
+        diagonal = float(np.linalg.norm(maximos.max(axis=0) - origem))
+        tamanho_celula = max(float(np.sqrt(2 * np.median(area))), float(np.median((maximos - minimos).max(axis=1))) / 64,
+                             1e-9 * diagonal, 1e-300)
+    nivel = np.zeros(len(faces), dtype=np.int64)
+    while True:
+        tamanho = tamanho_celula * 2.0 ** nivel[:, None]
+        cobertas = (np.floor((maximos - origem) / tamanho) - np.floor((minimos - origem) / tamanho) + 1).prod(axis=1)
+        acima = cobertas > MAX_CELULAS_FACE
+        if not acima.any():
+            break
+        nivel[acima] += 1
+    partes_face, partes_celula, partes_propria = [], [], []
+    for n in np.unique(nivel):
+        tamanho = tamanho_celula * 2.0 ** n
+        face, celulas, grande = _celulas_da_caixa(minimos, maximos, origem, tamanho, np.flatnonzero(nivel == n))
+        manter = _tocadas(tri, origem, tamanho, face, celulas, grande)
+        face, celulas = face[manter], celulas[manter]
+        propria = np.ones(len(face), dtype=bool)
+        if n > nivel.min():
+            # Faces mais finas visitam o nível (formam par com as do nível, não entre si), só nas células ocupadas
+            visitante, celulas_v, grande = _celulas_da_caixa(minimos, maximos, origem, tamanho,
+                                                             np.flatnonzero(nivel < n))
+            grupo = linhas_unicas(np.concatenate([celulas, celulas_v]))[1]
+            ocupada = np.zeros(int(grupo.max()) + 1, dtype=bool)
+            ocupada[grupo[:len(celulas)]] = True
+            dentro = ocupada[grupo[len(celulas):]]
+            visitante, celulas_v, grande = visitante[dentro], celulas_v[dentro], grande[dentro]
+            manter = _tocadas(tri, origem, tamanho, visitante, celulas_v, grande)
+            face = np.concatenate([face, visitante[manter]])
+            celulas = np.concatenate([celulas, celulas_v[manter]])
+            propria = np.r_[propria, np.zeros(int(manter.sum()), dtype=bool)]
+        partes_face.append(face)
+        partes_celula.append(np.column_stack([np.full(len(face), n), celulas]))
+        partes_propria.append(propria)
+    face = np.concatenate(partes_face)
+    propria = np.concatenate(partes_propria)
+    grupo = linhas_unicas(np.concatenate(partes_celula))[1]
+    n_grupos = int(grupo.max()) + 1
+    usa_comum = _vertice_comum(faces, grupo, face, n_grupos)
+    # Ordem no grupo: próprias com o vértice comum | próprias sem | visitantes sem | visitantes com
+    categoria = np.where(propria, np.where(usa_comum, 0, 1), np.where(usa_comum, 3, 2))
+    del propria, usa_comum
+    chave = grupo * 4 + categoria
+    contagem = np.bincount(chave, minlength=4 * n_grupos).reshape(n_grupos, 4)
+    ordem = np.argsort(chave)
+    del chave
+    face, grupo, categoria = face[ordem], grupo[ordem], categoria[ordem]
+    del ordem
+    s = (np.cumsum(contagem.sum(axis=1)) - contagem.sum(axis=1))[grupo]
+    fim = s + contagem[grupo].sum(axis=1)
+    k = np.arange(len(face))
+    # Próprias com o vértice comum: só com quem não o usa; próprias sem: com todas as seguintes
+    de = np.where(categoria == 0, s + contagem[grupo, 0], k + 1)
+    ate = np.where(categoria == 0, fim - contagem[grupo, 3], fim)
+    ate = np.where(categoria <= 1, ate, de)
+    quantos = np.maximum(ate - de, 0)
+    del s, fim, k, ate, grupo, categoria
+    if quantos.sum() == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    # Expansão em pares com o mínimo de arrays temporários do tamanho do total de pares
+    parceiro = np.arange(int(quantos.sum()))
+    parceiro += np.repeat(de - (np.cumsum(quantos) - quantos), quantos)
+    a, b = np.repeat(face, quantos), face[parceiro]
+    del parceiro
+    # Um par pode aparecer em várias células; ordenar + diff sai mais barato que np.unique aqui
+    pares = np.minimum(a, b) << 32
+    pares |= np.maximum(a, b)
+    del a, b
+    pares.sort()
+    pares = pares[np.r_[True, pares[1:] != pares[:-1]]]
+    pares = np.column_stack([pares >> 32, pares & 0xFFFFFFFF])
+    a, b = pares.T
+    sobrepoe = a != b
+    for eixo in range(3):
+        sobrepoe &= (minimos[a, eixo] <= maximos[b, eixo]) & (minimos[b, eixo] <= maximos[a, eixo])
+    return pares[sobrepoe]
+
+
+def _segmento_cruza_triangulo(p, q, a, b, c):
+    """Möller-Trumbore para segmentos pq: True se o interior do segmento atravessa o triângulo"""
+    d = q - p
+    e1, e2 = b - a, c - a
+    h = np.cross(d, e2)
+    det = np.einsum('ij,ij->i', e1, h)
+    escala = np.linalg.norm(d, axis=1) * np.linalg.norm(e1, axis=1) * np.linalg.norm(e2, axis=1)
+    # Segmento paralelo ao plano (inclui o caso coplanar, que não é tratado)
+    valido = np.abs(det) > 1e-12 * np.maximum(escala, 1e-300)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = 1.0 / det
+        s = p - a
+        u = f * np.einsum('ij,ij->i', s, h)
+        qv = np.cross(s, e1)
+        v = f * np.einsum('ij,ij->i', d, qv)
+        t = f * np.einsum('ij,ij->i', e2, qv)
+        eps = 1e-9
+        return valido & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > eps) & (t < 1 - eps)
+
+
+def triangulos_se_cruzam(t1, t2):
+    """Teste vetorizado para pares de triângulos (m, 3, 3) não coplanares.
+
+    A interseção de dois triângulos é um segmento cujas pontas estão em
+    arestas de um deles, então basta testar as 6 arestas contra o outro.
+    """
+    cruzam = np.zeros(len(t1), dtype=bool)
+    for x, y in ((t1, t2), (t2, t1)):
+        for i in range(3):
+            cruzam |= _segmento_cruza_triangulo(x[:, i], x[:, (i + 1) % 3], y[:, 0], y[:, 1], y[:, 2])
+    return cruzam
+
+
+def pares_que_se_cruzam(vertices, faces, workers=None, bloco=200000):
+    """Pares de faces que se intersectam; faces com vértice em comum são ignoradas (vizinhas)"""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    pares = pares_candidatos(vertices, faces)
+    a, b = faces[pares[:, 0]], faces[pares[:, 1]]
+    vizinhas = (a[:, :, None] == b[:, None, :]).any(axis=(1, 2))
+    pares = pares[~vizinhas]
+    blocos = [pares[i:i + bloco] for i in range(0, len(pares), bloco)]
+
+    def testar(p):
+        return p[triangulos_se_cruzam(vertices[faces[p[:, 0]]], vertices[faces[p[:, 1]]])]
+
+    if not blocos:
+        return pares
+    if workers is None:
+        workers = min(len(blocos), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return np.concatenate(list(executor.map(testar, blocos)))
+    return np.concatenate([testar(p) for p in blocos])
+
+
+def resolver_autointersecoes(vertices, faces, anel=1, iteracoes=3, workers=None):
+    """Remove as faces que se cruzam (mais `anel` anéis de vizinhas) e remenda os buracos abertos.
+
+    Cada região removida é um laço de borda independente, remendado pelo
+    preenchimento local (em paralelo). Repete até iteracoes vezes se o
+    remendo ainda cruzar algo. Retorna (vertices, faces, info).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    info = {'pares': 0, 'regioes': 0, 'faces_removidas': 0, 'buracos': 0, 'restantes': 0}
+    for iteracao in range(iteracoes):
+        pares = pares_que_se_cruzam(vertices, faces, workers)
+        if iteracao == 0:
+            info['pares'] = len(pares)
+        info['restantes'] = len(pares)
+        if len(pares) == 0:
+            break
+        remover = np.zeros(len(faces), dtype=bool)
+        remover[pares.ravel()] = True
+        for _ in range(anel):
+            tocados = np.zeros(len(vertices), dtype=bool)
+            tocados[faces[remover]] = True
+            remover = tocados[faces].any(axis=1)
+        if remover.all():
+            raise ValueError('As interseções cobrem a malha inteira; não há o que remendar.')
+        regioes = rotular_componentes(faces[remover])[0]
+        borda = np.zeros(len(vertices), dtype=bool)
+        borda[faces[remover]] = True
+        faces = faces[~remover]
+        # Só os buracos abertos agora são remendados; bordas que já existiam ficam como estavam
+        vertices, remendo, n_lacos = preencher_buracos_locais(vertices, faces, workers=workers, vertices_alvo=borda)
+        faces = np.concatenate([faces, remendo])
+        info['regioes'] += regioes
+        info['faces_removidas'] += int(np.count_nonzero(remover))
+        info['buracos'] += n_lacos
+    else:
+        info['restantes'] = len(pares_que_se_cruzam(vertices, faces, workers))
+    return vertices, faces, info
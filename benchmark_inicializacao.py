@@ -0,0 +1,50 @@
+"""Mede o tempo de inicialização da GUI (até a janela aparecer) e do CLI a frio.
+
+Uso: python benchmark_inicializacao.py [repeticoes]
+"""
+import os
+import subprocess
+import sys
+import time
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+
+
+def cronometrar(comando, repeticoes, env=None, codigo_esperado=0):
+    """Mediana do tempo de parede de um comando executado em processo novo"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = subprocess.run(comando, cwd=AQUI, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        tempos.append(time.perf_counter() - inicio)
+        if resultado.returncode != codigo_esperado:
+            erro = resultado.stderr.decode(errors='replace').strip().splitlines()
+            return None, erro[-1] if erro else f'código {resultado.returncode}'
+    tempos.sort()
+    return tempos[len(tempos) // 2], None
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env_gui = dict(os.environ, MESHDOCTOR_MEDIR_INICIALIZACAO='1')
+    casos = [
+        ('Interpretador vazio', [sys.executable, '-c', 'pass'], None, 0),
+        # Sem argumentos o CLI imprime o uso e sai com código 1
+        ('CLI sem argumentos (uso)', [sys.executable, 'reparar_malha.py'], None, 1),
+        ('GUI até a janela', [sys.executable, 'malha_gui.py'], env_gui, 0),
+    ]
+    # Custo que a importação tardia tira do caminho até a janela
+    for backend in ['trimesh', 'scipy.spatial', 'pymeshfix', 'pymeshlab', 'pyqtgraph.opengl']:
+        casos.append((f'import {backend}', [sys.executable, '-c', f'import {backend}'], None, 0))
+
+    print(f"{'Caso':<30} {'Mediana (s)':>12}")
+    for nome, comando, env, codigo in casos:
+        tempo, erro = cronometrar(comando, repeticoes, env, codigo)
+        if erro:
+            print(f"{nome:<30} {'falhou':>12}  ({erro})")
+        else:
+            print(f"{nome:<30} {tempo:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
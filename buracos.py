@@ -0,0 +1,301 @@
+"""Preenchimento local de buracos: extrai os laços de borda e remenda só esses laços."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from analise_incremental import ContagemChaves, chaves_arestas
+from poligonos import MalhaPoligonal, triangular_orelhas
+
+# Laços maiores que isso ficam para o reparo global (MeshFix): um remendo plano não representa
+# uma borda aberta desse tamanho e o ear clipping de uma espiral com k cantos custa O(k^3)
+MAX_ARESTAS_LACO = 1000
+
+
+def arestas_de_borda(faces, contagem=None):
+    """Arestas (a, b) usadas por uma única face, na orientação dessa face"""
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    dirigidas = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    chaves = chaves_arestas(faces)
+    if contagem is None:
+        contagem = ContagemChaves(chaves)
+    return dirigidas[contagem.consultar(chaves) == 1]
+
+
+def extrair_lacos(vertices, faces, contagem=None):
+    """Laços de borda como MalhaPoligonal (CSR), cada laço na orientação das faces vizinhas.
+
+    O sucessor de cada aresta de borda é achado por ordenação (sem percorrer
+    vértice a vértice) e os laços são rotulados/ordenados por pointer jumping.
+    Laços que passam duas vezes pelo mesmo vértice são divididos em laços simples.
+    """
+    borda = arestas_de_borda(faces, contagem)
+    n_vertices = len(vertices)
+    # Vértices com entradas != saídas (orientação inconsistente) não formam laço fechado
+    while len(borda):
+        saida = np.bincount(borda[:, 0], minlength=n_vertices)
+        entrada = np.bincount(borda[:, 1], minlength=n_vertices)
+        ok = saida == entrada
+        manter = ok[borda[:, 0]] & ok[borda[:, 1]]
+        if manter.all():
+            break
+        borda = borda[manter]
+    m = len(borda)
+    if m == 0:
+        return MalhaPoligonal(vertices, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    # Com entradas == saídas por vértice, as listas ordenadas por fim e por início se alinham
+    por_fim = np.argsort(borda[:, 1], kind='stable')
+    por_inicio = np.argsort(borda[:, 0], kind='stable')
+    sucessor = np.empty(m, dtype=np.int64)
+    sucessor[por_fim] = por_inicio
+
+    # Rótulo do laço = menor índice de aresta do ciclo
+    rotulo = np.arange(m)
+    salto = sucessor.copy()
+    passos = 1
+    while passos < m:
+        rotulo = np.minimum(rotulo, rotulo[salto])
+        salto = salto[salto]
+        passos *= 2
+    # Posição no laço: corta o ciclo antes da raiz e mede a distância até o corte
+    raizes = np.flatnonzero(rotulo == np.arange(m))
+    antecessor = np.empty(m, dtype=np.int64)
+    antecessor[sucessor] = np.arange(m)
+    distancia = np.ones(m, dtype=np.int64)
+    salto = sucessor.copy()
+    cortes = antecessor[raizes]
+    distancia[cortes] = 0
+    salto[cortes] = cortes
+    passos = 1
+    while passos < m:
+        distancia = distancia + distancia[salto]
+        salto = salto[salto]
+        passos *= 2
+    ordem = np.lexsort((-distancia, rotulo))
+    _, tamanhos = np.unique(rotulo, return_counts=True)
+    offsets = np.concatenate([[0], np.cumsum(tamanhos)])
+    return _dividir_pincados(MalhaPoligonal(vertices, offsets, borda[ordem, 0]))
+
+
+def _dividir_pincados(lacos):
+    """Divide os laços com vértice repetido (buracos que se tocam num vértice)"""
+    id_laco = np.repeat(np.arange(lacos.n_faces), lacos.tamanhos)
+    chaves = id_laco * (lacos.indices.max() + 1) + lacos.indices
+    unicas, contagens = np.unique(chaves, return_counts=True)
+    pincados = np.unique(id_laco[np.isin(chaves, unicas[contagens > 1])])
+    if len(pincados) == 0:
+        return lacos
+
+    def dividir(laco):
+        visto = {}
+        for pos, v in enumerate(laco):
+            if v in visto:
+                inicio = visto[v]
+                return dividir(laco[inicio:pos]) + dividir(laco[:inicio] + laco[pos:])
+            visto[v] = pos
+        return [laco]
+
+    # Casos raros: o resto continua vetorizado, só os pincados passam pelo laço em Python
+    novos = []
+    for i in pincados:
+        novos += dividir(lacos.indices[lacos.offsets[i]:lacos.offsets[i + 1]].tolist())
+    manter = np.ones(lacos.n_faces, dtype=bool)
+    manter[pincados] = False
+    tamanhos = np.concatenate([lacos.tamanhos[manter], [len(laco) for laco in novos]])
+    offsets = np.concatenate([[0], np.cumsum(tamanhos)])
+    indices = np.concatenate([lacos.indices[manter[id_laco]]] + [np.array(laco, dtype=np.int64) for laco in novos])
+    return MalhaPoligonal(lacos.vertices, offsets, indices)
+
+
+def perimetros(lacos):
+    """Perímetro de cada laço"""
+    proximo = np.arange(1, len(lacos.indices) + 1)
+    proximo[lacos.offsets[1:] - 1] = lacos.offsets[:-1]
+    comprimentos = np.linalg.norm(lacos.vertices[lacos.indices[proximo]] - lacos.vertices[lacos.indices], axis=1)
+    if len(comprimentos) == 0:
+        return np.zeros(0)
+    return np.add.reduceat(comprimentos, lacos.offsets[:-1])
+
+
+def selecionar_lacos(lacos, max_arestas=None, max_perimetro=None, vertices_alvo=None):
+    """Máscara dos laços a preencher (None = sem limite).
+
+    vertices_alvo (máscara por vértice) restringe aos laços que passam por
+    algum vértice marcado, ex.: só as bordas abertas por uma operação.
+    """
+    selecao = lacos.tamanhos >= 3
+    if max_arestas:
+        selecao &= lacos.tamanhos <= max_arestas
+    if max_perimetro:
+        selecao &= perimetros(lacos) <= max_perimetro
+    if vertices_alvo is not None and lacos.n_faces > 0:
+        selecao &= np.add.reduceat(vertices_alvo[lacos.indices].astype(np.int64), lacos.offsets[:-1]) > 0
+    return selecao
+
+
+def triangular_area_minima(vertices, lacos, contagem=None):
+    """Triangulação de área mínima (programação dinâmica) de laços (m, n), vetorizada nos m laços.
+
+    Com contagem (arestas da malha), diagonais que já existem na malha são
+    proibidas. Retorna (triangulos, viavel): n - 2 triângulos consecutivos por
+    laço e a máscara dos laços que têm triangulação válida.
+    """
+    m, n = lacos.shape
+    p = vertices[lacos]
+    custo = np.zeros((m, n, n))
+    escolha = np.zeros((m, n, n), dtype=np.int64)
+    proibida = np.zeros((m, n, n), dtype=bool)
+    if contagem is not None:
+        i, j = np.triu_indices(n, 2)
+        diagonais = np.stack([lacos[:, i], lacos[:, j]], axis=2)
+        diagonais.sort(axis=2)
+        existe = contagem.consultar(((diagonais[..., 0] << 32) | diagonais[..., 1]).ravel()).reshape(m, -1) > 0
+        proibida[:, i, j] = existe
+        proibida[:, 0, n - 1] = False
+    for largura in range(2, n):
+        i = np.arange(n - largura)
+        j = i + largura
+        k = i[:, None] + np.arange(1, largura)[None, :]
+        # Área do triângulo (i, k, j) para todo k entre i e j
+        a = p[:, k] - p[:, i][:, :, None]
+        b = (p[:, j] - p[:, i])[:, :, None]
+        area = 0.5 * np.linalg.norm(np.cross(a, b), axis=3)
+        area[proibida[:, i[:, None], k] | proibida[:, k, j[:, None]]] = np.inf
+        total = custo[:, i[:, None], k] + custo[:, k, j[:, None]] + area
+        melhor = np.argmin(total, axis=2)
+        custo[:, i, j] = np.take_along_axis(total, melhor[:, :, None], axis=2)[:, :, 0]
+        escolha[:, i, j] = k[np.arange(len(i))[None, :], melhor]
+    # Reconstrói os triângulos a partir dos intervalos (laço, i, j), todos os laços juntos
+    laco = np.arange(m)
+    i = np.zeros(m, dtype=np.int64)
+    j = np.full(m, n - 1, dtype=np.int64)
+    triangulos, origem = [], []
+    while len(laco):
+        k = escolha[laco, i, j]
+        # Invertido: o remendo tem a orientação oposta à das arestas de borda
+        triangulos.append(np.column_stack([lacos[laco, j], lacos[laco, k], lacos[laco, i]]))
+        origem.append(laco)
+        laco = np.concatenate([laco, laco])
+        i, j = np.concatenate([i, k]), np.concatenate([k, j])
+        manter = j - i >= 2
+        laco, i, j = laco[manter], i[manter], j[manter]
+    ordem = np.argsort(np.concatenate(origem), kind='stable')
+    return np.concatenate(triangulos)[ordem], np.isfinite(custo[:, 0, n - 1])
+
+
+def _remendar(vertices, lacos, metodo, max_area, contagem):
+    """Remendos de um lote (m, n) de laços: n - 2 triângulos consecutivos por laço"""
+    n = lacos.shape[1]
+    if n == 3:
+        return lacos[:, ::-1].copy()
+    if metodo == 'area' and n <= max_area:
+        # Limita a memória da programação dinâmica (~m * n^2 * 24 bytes por passo)
+        bloco = max(1, 50_000_000 // (24 * n * n))
+        remendos = [triangular_area_minima(vertices, lacos[i:i + bloco], contagem)[0]
+                    for i in range(0, len(lacos), bloco)]
+        return np.concatenate(remendos)
+    return triangular_orelhas(vertices, lacos[:, ::-1])
+
+
+def _remendos_validos(remendo, por_laco, contagem):
+    """Máscara dos laços cujo remendo não cria aresta com mais de 2 faces"""
+    chaves = chaves_arestas(remendo)
+    unicas, inverso, repeticoes = np.unique(chaves, return_inverse=True, return_counts=True)
+    total = contagem.consultar(unicas) + repeticoes
+    invalida = (total > 2)[inverso.ravel()].reshape(-1, 3).any(axis=1)
+    return ~np.logical_or.reduceat(invalida, por_laco[:-1]) if len(invalida) else np.zeros(0, dtype=bool)
+
+
+def refinar_e_suavizar(vertices, remendo, iteracoes=20, refinamentos=2):
+    """Fairing: divide os triângulos grandes do remendo pelo centroide e suaviza só os vértices novos.
+
+    Os vértices do laço ficam fixos, então o remendo continua costurado à malha.
+    """
+    import scipy.sparse as sp
+
+    vertices = np.asarray(vertices, dtype=np.float64)
+    remendo = np.asarray(remendo, dtype=np.int64)
+    if len(remendo) == 0:
+        return vertices, remendo
+    n_originais = len(vertices)
+    borda = np.unique(remendo)
+    # Área alvo: triângulo equilátero com a aresta média da borda do remendo (arestas usadas uma vez)
+    arestas = remendo[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    _, inverso, contagens = np.unique(chaves_arestas(remendo), return_inverse=True, return_counts=True)
+    arestas = arestas[contagens[inverso.ravel()] == 1]
+    aresta_media = np.linalg.norm(vertices[arestas[:, 0]] - vertices[arestas[:, 1]], axis=1).mean()
+    area_alvo = np.sqrt(3) / 4 * aresta_media ** 2
+    novos = [vertices]
+    total = n_originais
+    for _ in range(refinamentos):
+        todos = np.concatenate(novos) if len(novos) > 1 else vertices
+        tri = todos[remendo]
+        area = 0.5 * np.linalg.norm(np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1)
+        grandes = area > 2 * area_alvo
+        if not grandes.any():
+            break
+        centros = tri[grandes].mean(axis=1)
+        c = np.arange(total, total + len(centros))
+        total += len(centros)
+        novos.append(centros)
+        a, b, d = remendo[grandes].T
+        remendo = np.concatenate([remendo[~grandes], np.column_stack([a, b, c]),
+                                  np.column_stack([b, d, c]), np.column_stack([d, a, c])])
+    vertices = np.concatenate(novos) if len(novos) > 1 else vertices
+    if total == n_originais:
+        return vertices, remendo
+    # Laplaciano uniforme restrito ao remendo; vértices da borda ficam presos
+    arestas = remendo[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    arestas = np.concatenate([arestas, arestas[:, ::-1]])
+    locais, inverso = np.unique(arestas, return_inverse=True)
+    inverso = inverso.reshape(-1, 2)
+    adj = sp.csr_matrix((np.ones(len(inverso)), (inverso[:, 0], inverso[:, 1])), shape=(len(locais),) * 2)
+    adj.data[:] = 1.0
+    grau = np.asarray(adj.sum(axis=1)).ravel()
+    livres = ~np.isin(locais, borda)
+    p = vertices[locais]
+    for _ in range(iteracoes):
+        media = adj @ p / grau[:, None]
+        p[livres] = media[livres]
+    vertices[locais[livres]] = p[livres]
+    return vertices, remendo
+
+
+def preencher_buracos_locais(vertices, faces, max_arestas=MAX_ARESTAS_LACO, max_perimetro=None, metodo='area',
+                             suavizar=False, max_area=64, workers=None, vertices_alvo=None):
+    """Remenda os laços de borda selecionados sem mexer no resto da malha.
+
+    Retorna (vertices, faces_novas, n_lacos): vertices = originais + vértices
+    criados pelo fairing (no final do array); faces_novas são só as do remendo.
+    metodo='area' usa triangulação de área mínima até max_area arestas e ear
+    clipping acima disso; metodo='orelhas' usa sempre ear clipping.
+    max_arestas=None remenda laços de qualquer tamanho. vertices_alvo: ver selecionar_lacos.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    contagem = ContagemChaves(chaves_arestas(faces))
+    lacos = extrair_lacos(vertices, faces, contagem)
+    selecao = selecionar_lacos(lacos, max_arestas, max_perimetro, vertices_alvo)
+    if not selecao.any():
+        return vertices, np.zeros((0, 3), dtype=np.int64), 0
+    # Cada tamanho de laço é um lote vetorizado; os lotes rodam em paralelo
+    tamanhos = lacos.tamanhos
+    lotes = []
+    for tamanho in np.unique(tamanhos[selecao]):
+        indices, grupo = lacos.faces_de_tamanho(tamanho)
+        lotes.append(grupo[selecao[indices]])
+    if workers is None:
+        workers = min(len(lotes), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            remendos = list(executor.map(lambda g: _remendar(vertices, g, metodo, max_area, contagem), lotes))
+    else:
+        remendos = [_remendar(vertices, g, metodo, max_area, contagem) for g in lotes]
+    # Laços cujo remendo criaria aresta não-manifold (ex.: diagonal já existente) ficam abertos
+    n_por_laco = np.concatenate([np.full(len(g), g.shape[1] - 2) for g in lotes])
+    remendo = np.concatenate(remendos)
+    validos = _remendos_validos(remendo, np.concatenate([[0], np.cumsum(n_por_laco)]), contagem)
+    remendo = remendo[np.repeat(validos, n_por_laco)]
+    n_lacos = int(np.count_nonzero(validos))
+    if suavizar:
+        vertices, remendo = refinar_e_suavizar(vertices, remendo)
+    return vertices, remendo, n_lacos
@@ -0,0 +1,216 @@
+"""Campo de distância assinada (SDF) de uma malha: grade esparsa na faixa estreita + interpolação trilinear."""
+import numpy as np
+
+from analise_incremental import chaves_arestas
+from compacto import tipos
+from desvio import distancias_com_sinal
+from proximidade import IndiceProximidade, interpolar, ponto_mais_proximo_triangulo
+from voxel_esparso import amostrar_superficie, linhas_unicas
+
+# Deslocamento para codificar coordenadas de bloco (possivelmente negativas) em 21 bits por eixo
+_DESLOCAMENTO = 1 << 20
+
+
+def _chaves_blocos(blocos):
+    b = blocos + _DESLOCAMENTO
+    return (b[:, 0] << 42) | (b[:, 1] << 21) | b[:, 2]
+
+
+def _blocos_na_faixa(amostras, origem, tamanho_voxel, bloco, faixa):
+    """Blocos com alguma célula a até `faixa` células (faixa <= bloco) de uma amostra da superfície"""
+    celulas = np.floor((amostras - origem) / tamanho_voxel).astype(np.int64)
+    celulas = celulas[linhas_unicas(celulas)[0]]
+    d = np.array([-faixa, 0, faixa])
+    deslocamentos = np.stack(np.meshgrid(d, d, d, indexing='ij'), axis=-1).reshape(-1, 3)
+    blocos = ((celulas[:, None, :] + deslocamentos[None]) // bloco).reshape(-1, 3)
+    return blocos[linhas_unicas(blocos)[0]]
+
+
+def _faces_vizinhas(faces):
+    """(n_faces, 3): face do outro lado de cada aresta (arestas 01, 12, 20), -1 na borda"""
+    chaves = chaves_arestas(faces)
+    ordem = np.argsort(chaves, kind='stable')
+    iguais = chaves[ordem[1:]] == chaves[ordem[:-1]]
+    a, b = ordem[:-1][iguais], ordem[1:][iguais]
+    vizinhas = np.full(len(chaves), -1, dtype=np.int64)
+    vizinhas[a], vizinhas[b] = b // 3, a // 3
+    return vizinhas.reshape(-1, 3)
+
+
+_VIZINHOS = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]])
+
+
+class CampoDistancia:
+    """Distância assinada (negativa dentro) e gradiente em lotes de pontos.
+
+    Os nós da grade só existem nos blocos a até `faixa` células da superfície
+    e são calculados uma vez, na construção. Consultas dentro da faixa são
+    interpolação trilinear vetorizada; fora dela caem na consulta exata do
+    índice de proximidade (bem mais lenta). Com compacto, os valores dos nós
+    e o índice ficam em float32 (a interpolação é feita em float64).
+    """
+
+    def __init__(self, mesh, tamanho_voxel=None, bloco=4, faixa=3, indice=None, compacto=False):
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        faces = np.asarray(mesh.faces, dtype=np.int64)
+        if tamanho_voxel is None:
+            # ~128 células na maior dimensão: a grade não cresce com a resolução da malha
+            tamanho_voxel = float(np.ptp(vertices, axis=0).max()) / 128
+        self.tamanho_voxel = tamanho_voxel
+        self.bloco = bloco
+        self.indice = indice or IndiceProximidade(vertices, faces, compacto=compacto)
+        tipo = tipos(compacto)[0]
+        self.normais = np.asarray(mesh.vertex_normals, dtype=tipo)
+        self.origem = vertices.min(axis=0) - 2 * tamanho_voxel
+        pontos, _ = amostrar_superficie(vertices, faces, tamanho_voxel)
+        amostras = np.vstack([pontos, vertices])
+        blocos = _blocos_na_faixa(amostras, self.origem, tamanho_voxel, bloco, min(faixa, bloco))
+        ordem = np.argsort(_chaves_blocos(blocos))
+        self.blocos = blocos[ordem]
+        self.chaves = _chaves_blocos(self.blocos)
+        # Nós dos blocos; os da fronteira entre blocos são calculados uma vez só
+        eixo = np.arange(bloco + 1)
+        locais = np.stack(np.meshgrid(eixo, eixo, eixo, indexing='ij'), axis=-1).reshape(-1, 3)
+        nos = (self.blocos[:, None, :] * bloco + locais[None]).reshape(-1, 3)
+        unicos, inverso = linhas_unicas(nos)
+        valores = self._distancias_nos(nos[unicos], amostras)
+        self.valores = valores[inverso].astype(tipo).reshape(len(self.blocos), bloco + 1, bloco + 1, bloco + 1)
+
+    def _distancias_nos(self, nos, amostras):
+        """Distância assinada nos nós: exata nos cantos das células da superfície, propagada no resto.
+
+        Os demais partem da face de um representante próximo no índice, descem
+        pelas faces adjacentes e relaxam com as faces dos 6 vizinhos
+        (transformada de ponto mais próximo) até não melhorar. Evita a
+        consulta exata, cara, para nós longe da superfície.
+        """
+        chaves = _chaves_blocos(nos)
+        ordem = np.argsort(chaves)
+        chaves_ordenadas = chaves[ordem]
+
+        def indice_no(coordenadas):
+            k = _chaves_blocos(coordenadas)
+            pos = np.minimum(np.searchsorted(chaves_ordenadas, k), len(k) and len(chaves_ordenadas) - 1)
+            return np.where(chaves_ordenadas[pos] == k, ordem[pos], -1)
+
+        posicoes = self.origem + nos * self.tamanho_voxel
+        face = np.full(len(nos), -1, dtype=np.int64)
+        distancia = np.full(len(nos), np.inf)
+        # Cantos das células que contêm amostras da superfície: consulta exata
+        celulas = np.floor((amostras - self.origem) / self.tamanho_voxel).astype(np.int64)
+        celulas = celulas[linhas_unicas(celulas)[0]]
+        cantos = (celulas[:, None, :] + np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing='ij')).reshape(3, -1).T).reshape(-1, 3)
+        perto = np.unique(indice_no(cantos))
+        perto = perto[perto >= 0]
+        _, distancia[perto], face[perto], _ = self.indice.consultar(posicoes[perto])
+        vizinhos = indice_no((nos[:, None, :] + _VIZINHOS).reshape(-1, 3)).reshape(-1, 6)
+        exatos = np.zeros(len(nos), dtype=bool)
+        exatos[perto] = True
+        # Palpite inicial: a face de um representante próximo no índice; a busca aproximada
+        # (eps) basta, a relaxação corrige, e é bem mais barata longe da superfície
+        longe = np.flatnonzero(~exatos)
+        representante = self.indice.arvore.query(posicoes[longe], k=1, eps=2)[1]
+        face[longe] = self.indice.origem[representante]
+        tri = self.indice._triangulos(face[longe])
+        proximos, _ = ponto_mais_proximo_triangulo(posicoes[longe], tri[:, 0], tri[:, 1], tri[:, 2])
+        distancia[longe] = np.linalg.norm(proximos - posicoes[longe], axis=1)
+        # Descida pelas faces adjacentes (3 candidatas, barata) até parar de melhorar...
+        adjacentes = _faces_vizinhas(self.indice.faces)
+        ativos = longe
+        while len(ativos):
+            nova, d = self._mais_proxima(posicoes[ativos], adjacentes[face[ativos]])
+            melhora = d < distancia[ativos] * (1 - 1e-12)
+            ativos = ativos[melhora]
+            face[ativos], distancia[ativos] = nova[melhora], d[melhora]
+        # ...e relaxação com as faces dos 6 vizinhos, que tira a descida de vértices onde ela empaca;
+        # só continuam ativos os nós em cuja vizinhança algo melhorou
+        ativos = longe
+        while len(ativos):
+            v = vizinhos[ativos]
+            candidatas = np.column_stack([adjacentes[face[ativos]], np.where(v >= 0, face[v], -1)])
+            candidatas[candidatas == face[ativos, None]] = -1
+            nova, d = self._mais_proxima(posicoes[ativos], candidatas)
+            melhora = d < distancia[ativos] * (1 - 1e-12)
+            mudaram = ativos[melhora]
+            face[mudaram], distancia[mudaram] = nova[melhora], d[melhora]
+            marcados = np.zeros(len(nos), dtype=bool)
+            marcados[mudaram] = True
+            v = vizinhos[mudaram].ravel()
+            marcados[v[v >= 0]] = True
+            ativos = np.flatnonzero(marcados & ~exatos)
+        # Sinal pela normal interpolada no ponto mais próximo da face escolhida
+        for inicio in range(0, len(nos), 65536):
+            p, f = posicoes[inicio:inicio + 65536], face[inicio:inicio + 65536]
+            tri = self.indice._triangulos(f)
+            proximos, bary = ponto_mais_proximo_triangulo(p, tri[:, 0], tri[:, 1], tri[:, 2])
+            normais = interpolar(self.normais, self.indice.faces, f, bary)
+            lado = np.einsum('ij,ij->i', p - proximos, normais)
+            distancia[inicio:inicio + 65536][lado < 0] *= -1
+        return distancia
+
+    def _mais_proxima(self, pontos, candidatas, bloco=65536):
+        """Para cada ponto, a face de menor distância entre as candidatas (m, k); -1 = sem candidata"""
+        # Vizinhos costumam trazer a mesma face: cada face é avaliada uma vez por linha
+        candidatas = np.sort(candidatas, axis=1)
+        candidatas[:, 1:][candidatas[:, 1:] == candidatas[:, :-1]] = -1
+        faces = np.empty(len(pontos), dtype=np.int64)
+        distancias = np.empty(len(pontos))
+        # Em blocos de linhas: os temporários do ponto mais próximo são (pares, 3)
+        for inicio in range(0, len(pontos), bloco):
+            c = candidatas[inicio:inicio + bloco]
+            linhas, colunas = np.nonzero(c >= 0)
+            tri = self.indice._triangulos(c[linhas, colunas])
+            p = pontos[inicio:inicio + bloco][linhas]
+            proximos, _ = ponto_mais_proximo_triangulo(p, tri[:, 0], tri[:, 1], tri[:, 2])
+            d = np.full(c.shape, np.inf)
+            d[linhas, colunas] = np.linalg.norm(proximos - p, axis=1)
+            melhor = d.argmin(axis=1)
+            linhas = np.arange(len(c))
+            faces[inicio:inicio + bloco], distancias[inicio:inicio + bloco] = c[linhas, melhor], d[linhas, melhor]
+        return faces, distancias
+
+    def _exato(self, pontos):
+        proximos, distancias, faces, bary = self.indice.consultar(pontos)
+        sinal = np.sign(distancias_com_sinal(self.indice, self.normais, pontos))
+        direcao = pontos - proximos
+        direcao /= np.maximum(np.linalg.norm(direcao, axis=1), 1e-300)[:, None]
+        return sinal * distancias, sinal[:, None] * direcao
+
+    def consultar(self, pontos):
+        """(distancias, gradientes) para pontos (n, 3)"""
+        pontos = np.asarray(pontos, dtype=np.float64).reshape(-1, 3)
+        relativos = (pontos - self.origem) / self.tamanho_voxel
+        celulas = np.floor(relativos).astype(np.int64)
+        blocos = celulas // self.bloco
+        pos = np.minimum(np.searchsorted(self.chaves, _chaves_blocos(blocos)), len(self.chaves) - 1)
+        na_faixa = self.chaves[pos] == _chaves_blocos(blocos)
+        distancias = np.empty(len(pontos))
+        gradientes = np.empty((len(pontos), 3))
+        if na_faixa.any():
+            b = pos[na_faixa]
+            c = celulas[na_faixa] - blocos[na_faixa] * self.bloco
+            t = relativos[na_faixa] - celulas[na_faixa]
+            v = self.valores
+            # Os 8 cantos da célula (v_xyz) e a interpolação trilinear com suas derivadas
+            cantos = {(i, j, k): v[b, c[:, 0] + i, c[:, 1] + j, c[:, 2] + k]
+                      for i in (0, 1) for j in (0, 1) for k in (0, 1)}
+            x, y, z = t.T
+            c00 = cantos[0, 0, 0] * (1 - x) + cantos[1, 0, 0] * x
+            c01 = cantos[0, 0, 1] * (1 - x) + cantos[1, 0, 1] * x
+            c10 = cantos[0, 1, 0] * (1 - x) + cantos[1, 1, 0] * x
+            c11 = cantos[0, 1, 1] * (1 - x) + cantos[1, 1, 1] * x
+            c0 = c00 * (1 - y) + c10 * y
+            c1 = c01 * (1 - y) + c11 * y
+            distancias[na_faixa] = c0 * (1 - z) + c1 * z
+            dx = sum((cantos[1, j, k] - cantos[0, j, k]) * (y if j else 1 - y) * (z if k else 1 - z)
+                     for j in (0, 1) for k in (0, 1))
+            dy = (c10 - c00) * (1 - z) + (c11 - c01) * z
+            dz = c1 - c0
+            gradientes[na_faixa] = np.column_stack([dx, dy, dz]) / self.tamanho_voxel
+        if not na_faixa.all():
+            distancias[~na_faixa], gradientes[~na_faixa] = self._exato(pontos[~na_faixa])
+        return distancias, gradientes
+
+    def dentro(self, pontos):
+        """True para os pontos dentro da malha (distância negativa)"""
+        return self.consultar(pontos)[0] < 0
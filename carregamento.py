@@ -0,0 +1,76 @@
+"""Leitura de malhas em etapas: prévia rápida, malha completa e análise."""
+import os
+import struct
+
+import numpy as np
+
+from poligonos import carregar_obj_poligonal
+
+# Registro de um triângulo no STL binário (50 bytes, sem alinhamento)
+DTYPE_STL = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('atributo', '<u2')])
+
+
+def e_stl_binario(caminho):
+    """Retorna o número de triângulos se o arquivo for um STL binário válido, senão None"""
+    tamanho = os.path.getsize(caminho)
+    if tamanho < 84:
+        return None
+    with open(caminho, 'rb') as f:
+        f.seek(80)
+        n_faces = struct.unpack('<I', f.read(4))[0]
+    if n_faces == 0 or 84 + DTYPE_STL.itemsize * n_faces != tamanho:
+        return None
+    return n_faces
+
+
+def ler_previa_stl(caminho, max_faces=100_000):
+    """Prévia de um STL binário lida direto do disco (memmap, uma a cada k faces), sem ler o arquivo todo"""
+    n_faces = e_stl_binario(caminho)
+    if n_faces is None:
+        return None
+    registros = np.memmap(caminho, dtype=DTYPE_STL, mode='r', offset=84, shape=(n_faces,))
+    passo = max(1, n_faces // max_faces)
+    triangulos = np.asarray(registros['vertices'][::passo], dtype=np.float64)
+    vertices = triangulos.reshape(-1, 3)
+    faces = np.arange(len(vertices), dtype=np.int64).reshape(-1, 3)
+    return vertices, faces
+
+
+def subamostrar_faces(vertices, faces, max_faces=100_000):
+    """Prévia de uma malha já lida: uma a cada k faces, com os vértices compactados"""
+    faces = np.asarray(faces)
+    passo = max(1, len(faces) // max_faces)
+    faces = faces[::passo]
+    usados, inverso = np.unique(faces, return_inverse=True)
+    return np.asarray(vertices)[usados], inverso.reshape(faces.shape)
+
+
+def ler_malha(caminho):
+    """Lê a malha sem processar; retorna (mesh, poligonos), poligonos só para OBJ"""
+    import trimesh
+
+    if caminho.lower().endswith('.obj'):
+        # OBJ é lido preservando quads/n-gons; a triangulação fica para a malha de trabalho
+        poligonos = carregar_obj_poligonal(caminho)
+        mesh = trimesh.Trimesh(vertices=poligonos.vertices, faces=poligonos.triangular(), process=False)
+        return mesh, poligonos
+    return trimesh.load(caminho, process=False), None
+
+
+def processar_malha(mesh, poligonos=None):
+    """mesh.process(validate=True) no lugar; retorna (poligonos, aviso).
+
+    O process funde, remove e pode reordenar vértices: a topologia poligonal
+    do arquivo só continua valendo se o array de vértices sair idêntico (a
+    mesma contagem não basta). Senão fica None e a malha segue triangulada.
+    """
+    antes = np.array(mesh.vertices) if poligonos is not None else None
+    aviso = ''
+    try:
+        mesh.process(validate=True)
+    except Exception as e:
+        aviso = str(e)
+    if poligonos is not None and not np.array_equal(mesh.vertices, antes):
+        print("Vértices fundidos/removidos ao processar a malha: quads e n-gons do arquivo descartados")
+        poligonos = None
+    return poligonos, aviso
@@ -0,0 +1,137 @@
+"""Cena com vários corpos: carga sem achatar, operações por corpo em paralelo."""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+import operacoes
+from topologia import compactar_vertices, rotular_componentes
+
+# Cores alternadas dos corpos na visualização (RGBA)
+CORES_CORPOS = [
+    (0.55, 0.70, 1.00, 1), (1.00, 0.70, 0.40, 1), (0.60, 0.90, 0.55, 1), (0.95, 0.55, 0.75, 1),
+    (0.75, 0.65, 1.00, 1), (0.95, 0.90, 0.45, 1), (0.50, 0.90, 0.90, 1), (0.85, 0.85, 0.85, 1),
+]
+
+
+class Corpo:
+    def __init__(self, nome, mesh, selecionado=True):
+        self.nome = nome
+        self.mesh = mesh
+        self.selecionado = selecionado
+
+    def copy(self):
+        return Corpo(self.nome, self.mesh.copy(), self.selecionado)
+
+
+class Cena:
+    """Lista de corpos; cada operação troca a malha só dos corpos em que foi aplicada"""
+
+    def __init__(self, corpos=None):
+        self.corpos = list(corpos or [])
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê o arquivo como cena: cada objeto/nó com geometria vira um corpo (com a transformação aplicada)"""
+        import trimesh
+
+        # split_objects separa os objetos 'o' do OBJ em vez de juntá-los por material
+        cena = trimesh.load(caminho, force='scene', split_objects=True, group_material=False)
+        corpos = []
+        for no in cena.graph.nodes_geometry:
+            transformacao, nome_geometria = cena.graph[no]
+            geometria = cena.geometry[nome_geometria]
+            if not isinstance(geometria, trimesh.Trimesh) or len(geometria.faces) == 0:
+                continue
+            mesh = geometria.copy()
+            mesh.apply_transform(transformacao)
+            corpos.append(Corpo(str(no), mesh))
+        if not corpos:
+            raise ValueError(f'Nenhuma malha encontrada em {os.path.basename(caminho)}')
+        return cls(corpos)
+
+    @classmethod
+    def de_componentes(cls, mesh, min_faces=1):
+        """Separa uma malha única (ex.: STL de montagem) em um corpo por componente conexa"""
+        import trimesh
+
+        n, rotulos = rotular_componentes(mesh.faces)
+        ordem = np.argsort(rotulos, kind='stable')
+        inicios = np.searchsorted(rotulos[ordem], np.arange(n + 1))
+        corpos = []
+        for i in range(n):
+            faces = np.asarray(mesh.faces)[ordem[inicios[i]:inicios[i + 1]]]
+            if len(faces) < min_faces:
+                continue
+            vertices, faces = compactar_vertices(mesh.vertices, faces)
+            corpos.append(Corpo(f'corpo_{len(corpos) + 1}', trimesh.Trimesh(vertices=vertices, faces=faces, process=False)))
+        return cls(corpos)
+
+    def copy(self, malhas=True):
+        """Cópia da cena; com malhas=False os corpos novos compartilham as malhas (as operações não as alteram)"""
+        if malhas:
+            return Cena([corpo.copy() for corpo in self.corpos])
+        return Cena([Corpo(corpo.nome, corpo.mesh, corpo.selecionado) for corpo in self.corpos])
+
+    def __len__(self):
+        return len(self.corpos)
+
+    def selecionados(self):
+        return [i for i, corpo in enumerate(self.corpos) if corpo.selecionado]
+
+    def malha_combinada(self):
+        """Todos os corpos numa malha só (para as operações e análises de malha única)"""
+        import trimesh
+
+        return trimesh.util.concatenate([corpo.mesh for corpo in self.corpos])
+
+    def transladar(self, deslocamento):
+        for corpo in self.corpos:
+            corpo.mesh.vertices += deslocamento
+
+    def centralizar(self):
+        """Move o centro do bounding box da cena para a origem (mesmo deslocamento em todos os corpos)"""
+        limites = np.array([corpo.mesh.bounds for corpo in self.corpos])
+        centro = (limites[:, 0].min(axis=0) + limites[:, 1].max(axis=0)) / 2
+        self.transladar(-centro)
+        return centro
+
+    def aplicar(self, nome, indices=None, workers=None, ao_terminar_corpo=None, cancelar=None, **parametros):
+        """Aplica a operação (operacoes.OPERACOES) aos corpos indicados em paralelo.
+
+        Retorna {indice: info} dos corpos que deram certo e {indice: erro} dos
+        que falharam; um corpo com erro mantém a malha anterior.
+        ao_terminar_corpo(indice, concluidos, total) é chamado a cada corpo.
+        Com cancelar (threading.Event) acionado, os corpos ainda não iniciados
+        são pulados e, ao fim dos que já rodavam, levanta InterruptedError.
+        """
+        if indices is None:
+            indices = self.selecionados()
+        if workers is None:
+            workers = min(len(indices), os.cpu_count() or 1) or 1
+        infos, erros = {}, {}
+
+        def trabalho(i):
+            if cancelar is not None and cancelar.is_set():
+                raise InterruptedError
+            return operacoes.executar(nome, self.corpos[i].mesh, **parametros)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futuros = {executor.submit(trabalho, i): i for i in indices}
+            for concluidos, futuro in enumerate(as_completed(futuros), 1):
+                i = futuros[futuro]
+                try:
+                    self.corpos[i].mesh, infos[i] = futuro.result()
+                except Exception as e:
+                    erros[i] = e
+                if ao_terminar_corpo is not None:
+                    ao_terminar_corpo(i, concluidos, len(indices))
+        if cancelar is not None and cancelar.is_set():
+            raise InterruptedError
+        return infos, erros
+
+    def estatisticas(self, indices=None):
+        """Linhas (nome, info de operacoes.estatisticas) dos corpos indicados"""
+        if indices is None:
+            indices = range(len(self.corpos))
+        return [(self.corpos[i].nome, operacoes.estatisticas(self.corpos[i].mesh)[1]) for i in indices]
@@ -0,0 +1,52 @@
+"""Modo compacto: posições float32 e índices int32 nos buffers da aplicação, float64 só dentro dos kernels."""
+import numpy as np
+
+POSICOES_COMPACTAS = np.float32
+INDICES_COMPACTOS = np.int32
+
+
+def tipos(compacto):
+    """(tipo das posições, tipo dos índices) para o modo pedido"""
+    return (POSICOES_COMPACTAS, INDICES_COMPACTOS) if compacto else (np.float64, np.int64)
+
+
+def compactar(vertices, faces, compacto=True):
+    """Cópias (ou as próprias arrays, se já no tipo) de vertices/faces no tipo do modo"""
+    tipo_posicoes, tipo_indices = tipos(compacto)
+    faces = np.asarray(faces)
+    if compacto and len(faces) and faces.max() > np.iinfo(INDICES_COMPACTOS).max:
+        raise ValueError('Índices de vértice não cabem em int32; use o modo normal.')
+    return (np.ascontiguousarray(vertices, dtype=tipo_posicoes),
+            np.ascontiguousarray(faces, dtype=tipo_indices))
+
+
+def bytes_arrays(objeto, profundidade=3, _vistos=None):
+    """Bytes dos arrays numpy alcançáveis a partir de objeto (atributos, dicts, listas)"""
+    if _vistos is None:
+        _vistos = set()
+    if objeto is None or id(objeto) in _vistos:
+        return 0
+    _vistos.add(id(objeto))
+    if isinstance(objeto, np.ndarray):
+        return objeto.nbytes
+    if profundidade == 0 or isinstance(objeto, (str, bytes, int, float)):
+        return 0
+    if isinstance(objeto, dict):
+        filhos = list(objeto.values())
+    elif isinstance(objeto, (list, tuple)):
+        filhos = objeto
+    elif hasattr(objeto, '__dict__'):
+        filhos = list(vars(objeto).values())
+    else:
+        # Extensões sem __dict__ (ex.: cKDTree) expõem os arrays como propriedades
+        filhos = [getattr(objeto, nome, None) for nome in ('data', 'indices')]
+    return sum(bytes_arrays(filho, profundidade - 1, _vistos) for filho in filhos)
+
+
+def memoria_malha(mesh):
+    """Bytes de uma malha trimesh: geometria (vértices + faces) e caches derivados (normais, arestas...)"""
+    if mesh is None:
+        return {'geometria': 0, 'cache': 0}
+    geometria = np.asarray(mesh.vertices).nbytes + np.asarray(mesh.faces).nbytes
+    cache = getattr(getattr(mesh, '_cache', None), 'cache', {})
+    return {'geometria': geometria, 'cache': sum(v.nbytes for v in cache.values() if isinstance(v, np.ndarray))}
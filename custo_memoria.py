@@ -0,0 +1,100 @@
+"""Modelo de custo das operações caras: tamanho de saída e pico de memória previstos.
+
+As constantes foram medidas com tracemalloc (numpy + caches do trimesh) e
+arredondadas para cima; a ideia é barrar o que certamente não cabe, não
+acertar o byte.
+"""
+import os
+
+import numpy as np
+
+# Pico por face de saída numa malha trimesh com normais/arestas em cache (medido: ~450)
+BYTES_POR_FACE = 500
+# Remesh voxel esparso: pico por unidade de área/h² (amostras, KD-tree, blocos; medido: ~2000)
+BYTES_POR_AREA_VOXEL = 2500
+FACES_POR_AREA_VOXEL = 3.0
+# Fração da RAM disponível que uma operação pode usar
+FRACAO_SEGURA = 0.8
+
+
+def memoria_disponivel():
+    """RAM disponível em bytes (psutil, /proc/meminfo ou sysconf); None se não der para saber"""
+    try:
+        import psutil
+        return int(psutil.virtual_memory().available)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo') as f:
+            for linha in f:
+                if linha.startswith('MemAvailable:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def formatar_bytes(n):
+    for unidade in ['B', 'KB', 'MB', 'GB']:
+        if n < 1024:
+            return f'{n:.1f} {unidade}'
+        n /= 1024
+    return f'{n:.1f} TB'
+
+
+def _estimativa(vertices, faces, pico):
+    return {'vertices': int(vertices), 'faces': int(faces), 'pico_bytes': int(pico)}
+
+
+def estimar_subdivisao(n_vertices, n_faces, iteracoes):
+    """Loop subdivision: cada iteração multiplica as faces por 4 e cria um vértice por aresta"""
+    faces = n_faces * 4 ** iteracoes
+    # Cada face nova acrescenta ~1/2 vértice (arestas ≈ 1.5 * faces, 1/3 delas por nível)
+    vertices = n_vertices + (faces - n_faces) // 2
+    return _estimativa(vertices, faces, BYTES_POR_FACE * (faces + n_faces))
+
+
+def estimar_remesh_voxel(area, n_faces, tamanho_voxel):
+    """Remesh voxel esparso: a saída é proporcional à área da superfície / h²"""
+    celulas = area / tamanho_voxel ** 2
+    faces = FACES_POR_AREA_VOXEL * celulas
+    pico = BYTES_POR_AREA_VOXEL * celulas + BYTES_POR_FACE * (faces + n_faces)
+    return _estimativa(faces / 2, faces, pico)
+
+
+def estimar_solidificar(n_vertices, n_faces, n_arestas_borda):
+    """Casca: vértices duplicados, faces duplicadas + 2 triângulos por aresta de borda"""
+    faces = 2 * n_faces + 2 * n_arestas_borda
+    return _estimativa(2 * n_vertices, faces, BYTES_POR_FACE * (faces + n_faces))
+
+
+def cabe(estimativa, disponivel=None, fracao=FRACAO_SEGURA):
+    """True se o pico previsto cabe na fração segura da RAM disponível (ou se não dá para medir)"""
+    if disponivel is None:
+        disponivel = memoria_disponivel()
+    return disponivel is None or estimativa['pico_bytes'] <= fracao * disponivel
+
+
+def maior_que_cabe(estimar, candidatos, disponivel=None):
+    """Primeiro parâmetro de candidatos (do mais caro ao mais barato) cuja estimativa cabe"""
+    for candidato in candidatos:
+        if cabe(estimar(candidato), disponivel):
+            return candidato
+    return None
+
+
+def voxel_que_cabe(area, n_faces, tamanho_voxel, disponivel=None, fracao=FRACAO_SEGURA):
+    """Menor tamanho de voxel (>= tamanho_voxel) cuja estimativa cabe na memória"""
+    if disponivel is None:
+        disponivel = memoria_disponivel()
+    if disponivel is None:
+        return tamanho_voxel
+    limite = fracao * disponivel - BYTES_POR_FACE * n_faces
+    if limite <= 0:
+        return None
+    # pico ≈ (BYTES_POR_AREA_VOXEL + FACES_POR_AREA_VOXEL * BYTES_POR_FACE) * area / h²
+    minimo = np.sqrt((BYTES_POR_AREA_VOXEL + FACES_POR_AREA_VOXEL * BYTES_POR_FACE) * area / limite)
+    return max(tamanho_voxel, float(minimo) * 1.01)
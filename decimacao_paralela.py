@@ -0,0 +1,168 @@
+"""Decimação particionada: clusters espaciais decimados em processos paralelos com a borda travada.
+
+As faces são divididas em faixas contíguas da curva de Morton (clusters
+compactos e do mesmo tamanho). Cada cluster vai para um subprocesso isolado
+(execucao_isolada: tempo limite, erro legível e cancelamento) com a meta
+proporcional de faces; os vértices compartilhados com outro cluster ficam
+travados, então os pedaços se encaixam de volta pelos índices originais.
+Uma passada final, só em volta das costuras, leva a malha à meta total.
+"""
+import math
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from execucao_isolada import INTERVALO_CANCELAR, TEMPO_LIMITE, executar_isolado
+from localidade import codigos_morton
+
+# Abaixo disso a decimação única do pymeshlab é mais rápida que particionar
+MIN_FACES_PARTICIONAR = 200_000
+# Teto por cluster: limita a memória de cada processo em malhas enormes
+FACES_POR_CLUSTER = 2_000_000
+
+
+def particionar(vertices, faces, n_clusters):
+    """Lista de (ids_globais, faces_locais, travados) por cluster.
+
+    travados marca (nos vértices locais) os que também pertencem a outro cluster.
+    """
+    vertices = np.asarray(vertices)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    n_clusters = max(1, min(int(n_clusters), len(faces)))
+    # O primeiro vértice representa a face: evita o gather (F, 3, 3) dos centroides
+    ordem = np.argsort(codigos_morton(vertices)[faces[:, 0]], kind='stable')
+    rotulo = np.empty(len(faces), dtype=np.int32)
+    rotulo[ordem] = np.arange(len(faces)) * n_clusters // len(faces)
+    rotulos = np.repeat(rotulo, 3)
+    menor = np.full(len(vertices), n_clusters, dtype=np.int32)
+    maior = np.full(len(vertices), -1, dtype=np.int32)
+    np.minimum.at(menor, faces.ravel(), rotulos)
+    np.maximum.at(maior, faces.ravel(), rotulos)
+    compartilhado = (menor != maior) & (maior >= 0)
+    limites = np.searchsorted(rotulo[ordem], np.arange(n_clusters + 1))
+    clusters = []
+    for c in range(n_clusters):
+        faces_c = faces[ordem[limites[c]:limites[c + 1]]]
+        ids, locais = np.unique(faces_c, return_inverse=True)
+        clusters.append((ids, locais.reshape(-1, 3), compartilhado[ids]))
+    return clusters
+
+
+def _decimar_cluster(vertices, faces, alvo):
+    """Roda num subprocesso: quadric edge collapse com a borda do pedaço preservada"""
+    import pymeshlab
+
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(vertices, faces))
+    ms.meshing_decimation_quadric_edge_collapse(targetfacenum=int(alvo), preservenormal=True, preserveboundary=True)
+    novo = ms.current_mesh()
+    return np.array(novo.vertex_matrix(), dtype=np.float64), np.array(novo.face_matrix(), dtype=np.int64)
+
+
+def _origem_travados(vertices, travados, v):
+    """Índice local de entrada de cada vértice decimado travado (achado pela posição, que não muda) ou -1"""
+    from scipy.spatial import cKDTree
+
+    origem = np.full(len(v), -1, dtype=np.int64)
+    indices_travados = np.flatnonzero(travados)
+    if len(indices_travados) and len(v):
+        diagonal = float(np.linalg.norm(np.ptp(vertices, axis=0)))
+        distancia, mais_proximo = cKDTree(vertices[indices_travados]).query(v)
+        perto = distancia <= 1e-9 * max(diagonal, 1e-300)
+        origem[perto] = indices_travados[mais_proximo[perto]]
+    return origem
+
+
+def costurar(pedacos):
+    """Junta (vertices, faces, ids_globais) dos clusters; ids >= 0 são vértices de costura, unidos pelo id.
+
+    Retorna (vertices, faces, costura), costura marcando os vértices unidos.
+    """
+    todos_ids = np.concatenate([ids for _, _, ids in pedacos]) if pedacos else np.zeros(0, dtype=np.int64)
+    globais = np.unique(todos_ids[todos_ids >= 0])
+    n_costura = len(globais)
+    posicoes = np.zeros((n_costura, 3))
+    partes_v, partes_f = [posicoes], []
+    total = n_costura
+    for v, f, ids in pedacos:
+        unido = ids >= 0
+        proprios = v[~unido]
+        destino = np.empty(len(v), dtype=np.int64)
+        destino[unido] = np.searchsorted(globais, ids[unido])
+        posicoes[destino[unido]] = v[unido]
+        destino[~unido] = np.arange(total, total + len(proprios))
+        total += len(proprios)
+        partes_v.append(proprios)
+        partes_f.append(destino[f])
+    costura = np.zeros(total, dtype=bool)
+    costura[:n_costura] = True
+    faces = np.concatenate(partes_f) if partes_f else np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(partes_v), faces, costura
+
+
+def _passada_costura(vertices, faces, costura, alvo):
+    """Quadric edge collapse só nas faces em volta das costuras, até a meta total"""
+    import pymeshlab
+
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(vertices, faces, v_scalar_array=costura.astype(np.float64)))
+    ms.compute_selection_by_condition_per_vertex(condselect='q > 0')
+    ms.compute_selection_transfer_vertex_to_face()
+    ms.apply_selection_dilatation()
+    ms.meshing_decimation_quadric_edge_collapse(targetfacenum=int(alvo), preservenormal=True, selected=True)
+    novo = ms.current_mesh()
+    return np.array(novo.vertex_matrix()), np.array(novo.face_matrix())
+
+
+def decimar_particionado(vertices, faces, fator, workers=None, n_clusters=None, ao_terminar_cluster=None,
+                         cancelar=None, tempo_limite=TEMPO_LIMITE):
+    """(vertices, faces, info) com ~fator * faces, decimando clusters em paralelo.
+
+    ao_terminar_cluster(concluidos, total) é chamado a cada cluster pronto.
+    Um cluster que derruba o processo ou passa de tempo_limite segundos vira
+    RuntimeError (e os demais são interrompidos); com cancelar
+    (threading.Event) acionado, os subprocessos são mortos e sobe
+    InterruptedError.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    if n_clusters is None:
+        n_clusters = max(workers, math.ceil(len(faces) / FACES_POR_CLUSTER))
+    clusters = particionar(vertices, faces, n_clusters)
+    pedacos = [None] * len(clusters)
+    # Cada thread só espera o seu subprocesso; parar interrompe todos quando um falha ou o usuário cancela
+    parar = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futuros = {executor.submit(executar_isolado, _decimar_cluster, vertices[ids], locais,
+                                   [{'alvo': max(1, round(fator * len(locais)))}], tempo_limite,
+                                   f'Cluster {c + 1}/{len(clusters)}', parar): c
+                   for c, (ids, locais, _) in enumerate(clusters)}
+        pendentes, concluidos = set(futuros), 0
+        try:
+            while pendentes:
+                prontos, pendentes = wait(pendentes, timeout=INTERVALO_CANCELAR, return_when=FIRST_COMPLETED)
+                if cancelar is not None and cancelar.is_set():
+                    raise InterruptedError('Operação cancelada pelo usuário')
+                for futuro in prontos:
+                    c = futuros[futuro]
+                    v, f, _ = futuro.result()
+                    ids, _, travados = clusters[c]
+                    origem = _origem_travados(vertices[ids], travados, v)
+                    pedacos[c] = (v, f, np.where(origem >= 0, ids[np.maximum(origem, 0)], -1))
+                    concluidos += 1
+                    if ao_terminar_cluster is not None:
+                        ao_terminar_cluster(concluidos, len(clusters))
+        except BaseException:
+            parar.set()
+            raise
+    vertices, faces, costura = costurar(pedacos)
+    info = {'clusters': len(clusters), 'faces_antes_costura': len(faces), 'vertices_costura': int(costura.sum())}
+    alvo = max(1, round(fator * sum(len(locais) for _, locais, _ in clusters)))
+    if len(faces) > alvo and costura.any():
+        vertices, faces, _ = executar_isolado(_passada_costura, vertices, faces, [{'costura': costura, 'alvo': alvo}],
+                                              tempo_limite, 'Passada de costura', cancelar)
+    return vertices, faces, info
+
@@ -0,0 +1,52 @@
+"""Mapa de desvio entre duas malhas: distância com sinal por vértice e Hausdorff."""
+import numpy as np
+
+from proximidade import IndiceProximidade, interpolar
+
+
+def distancias_com_sinal(indice, normais_vertices, pontos, workers=None):
+    """Distância de cada ponto à superfície do índice; negativa do lado de dentro (contra as normais)"""
+    pontos = np.asarray(pontos, dtype=np.float64)
+    proximos, distancias, faces, bary = indice.consultar(pontos, workers=workers)
+    # Normal interpolada no ponto projetado: no interior da face coincide com a da face
+    normais = interpolar(normais_vertices, indice.faces, faces, bary)
+    lado = np.einsum('ij,ij->i', pontos - proximos, normais)
+    return np.where(lado < 0, -distancias, distancias)
+
+
+def mapa_desvio(original, reparada, indice_original=None, simetrico=True, workers=None):
+    """Desvio da malha reparada em relação à original.
+
+    'desvios' tem a distância com sinal de cada vértice da reparada à
+    superfície original; max/media/rms resumem esses valores. Com simetrico,
+    mede também os vértices da original contra a reparada e 'hausdorff' é o
+    maior dos dois sentidos.
+    """
+    if indice_original is None:
+        indice_original = IndiceProximidade(original.vertices, original.faces)
+    desvios = distancias_com_sinal(indice_original, original.vertex_normals, reparada.vertices, workers)
+    absolutos = np.abs(desvios)
+    resultado = {
+        'desvios': desvios,
+        'max': float(absolutos.max()) if len(absolutos) else 0.0,
+        'media': float(absolutos.mean()) if len(absolutos) else 0.0,
+        'rms': float(np.sqrt((desvios ** 2).mean())) if len(desvios) else 0.0,
+    }
+    resultado['hausdorff'] = resultado['max']
+    if simetrico and len(reparada.faces):
+        indice_reparada = IndiceProximidade(reparada.vertices, reparada.faces)
+        volta = indice_reparada.consultar(original.vertices, workers=workers)[1]
+        resultado['max_volta'] = float(volta.max()) if len(volta) else 0.0
+        resultado['hausdorff'] = max(resultado['max'], resultado['max_volta'])
+    return resultado
+
+
+def cores_desvio(desvios, limite=None):
+    """Cores RGBA (0..1) por vértice: azul para dentro, branco sem desvio, vermelho para fora"""
+    desvios = np.asarray(desvios, dtype=np.float64)
+    if limite is None:
+        limite = np.abs(desvios).max() if len(desvios) else 0.0
+    t = np.clip(desvios / max(limite, 1e-12), -1, 1)[:, None]
+    branco, azul, vermelho = np.ones(3), np.array([0.1, 0.3, 1.0]), np.array([1.0, 0.15, 0.1])
+    rgb = np.where(t < 0, branco + (azul - branco) * -t, branco + (vermelho - branco) * t)
+    return np.column_stack([rgb, np.ones(len(desvios))])
@@ -0,0 +1,181 @@
+"""Execução isolada dos backends nativos (pymeshfix, pymeshlab) num subprocesso descartável.
+
+Um segfault ou um laço infinito dentro do MeshFix/MeshLab derruba só o
+subprocesso: quem chamou recebe um RuntimeError com o diagnóstico (sinal,
+tempo esgotado ou traceback) e a próxima tentativa usa parâmetros mais
+conservadores. Vértices e faces vão e voltam por memória compartilhada; pelo
+pipe só passam nomes, formas e tipos dos blocos.
+"""
+import multiprocessing
+import signal
+import time
+import traceback
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+# Segundos por tentativa antes de matar o subprocesso
+TEMPO_LIMITE = 300
+# Com um evento de cancelamento, de quanto em quanto tempo ele é consultado durante a espera
+INTERVALO_CANCELAR = 0.2
+
+
+def _para_compartilhada(array):
+    """Cópia do array num bloco de memória compartilhada novo; retorna (bloco, descrição)"""
+    array = np.ascontiguousarray(array)
+    bloco = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=bloco.buf)[...] = array
+    return bloco, (bloco.name, array.shape, array.dtype.str)
+
+
+def _de_compartilhada(descricao, liberar=False):
+    """Cópia local do array descrito; com liberar, o bloco é apagado depois da cópia"""
+    nome, forma, tipo = descricao
+    bloco = shared_memory.SharedMemory(name=nome)
+    try:
+        return np.ndarray(forma, dtype=tipo, buffer=bloco.buf).copy()
+    finally:
+        bloco.close()
+        if liberar:
+            bloco.unlink()
+
+
+def _trabalhador(conexao, funcao, entradas, parametros):
+    """Corpo do subprocesso: lê as entradas, roda a função e devolve as saídas em blocos novos"""
+    try:
+        vertices, faces = (_de_compartilhada(d) for d in entradas)
+        saidas = funcao(vertices, faces, **parametros)
+        blocos = [_para_compartilhada(np.asarray(s)) for s in saidas]
+        for bloco, _ in blocos:
+            bloco.close()
+        conexao.send(('ok', [d for _, d in blocos]))
+    except BaseException:
+        conexao.send(('erro', traceback.format_exc()))
+    finally:
+        conexao.close()
+
+
+def _descrever_saida(codigo):
+    if codigo is not None and codigo < 0:
+        try:
+            return f'processo morto pelo sinal {signal.Signals(-codigo).name}'
+        except ValueError:
+            return f'processo morto pelo sinal {-codigo}'
+    return f'processo terminou sem resposta (código {codigo})'
+
+
+def _tentar(funcao, entradas, parametros, tempo_limite, cancelar=None):
+    """Uma execução num subprocesso novo; retorna as descrições das saídas ou levanta RuntimeError.
+
+    Com cancelar (threading.Event) acionado, o subprocesso é morto e sobe InterruptedError.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    receber, enviar = contexto.Pipe(duplex=False)
+    processo = contexto.Process(target=_trabalhador, args=(enviar, funcao, entradas, parametros), daemon=True)
+    processo.start()
+    enviar.close()
+    try:
+        prazo = time.monotonic() + tempo_limite
+        while True:
+            if cancelar is not None and cancelar.is_set():
+                raise InterruptedError('Operação cancelada pelo usuário')
+            restante = prazo - time.monotonic()
+            espera = restante if cancelar is None else min(restante, INTERVALO_CANCELAR)
+            prontos = wait([receber, processo.sentinel], timeout=max(espera, 0))
+            if prontos or restante <= espera:
+                break
+        if receber in prontos:
+            try:
+                estado, conteudo = receber.recv()
+            except EOFError:
+                processo.join(5)
+                raise RuntimeError(_descrever_saida(processo.exitcode))
+            if estado == 'erro':
+                # Última linha do traceback: a mensagem da exceção dentro do subprocesso
+                raise RuntimeError(conteudo.strip().splitlines()[-1])
+            return conteudo
+        if prontos:
+            processo.join(5)
+            raise RuntimeError(_descrever_saida(processo.exitcode))
+        raise RuntimeError(f'tempo esgotado ({tempo_limite:g} s)')
+    finally:
+        receber.close()
+        if processo.is_alive():
+            processo.kill()
+        processo.join()
+
+
+def executar_isolado(funcao, vertices, faces, tentativas=({},), tempo_limite=TEMPO_LIMITE, descricao=None,
+                     cancelar=None):
+    """funcao(vertices, faces, **parametros) -> (vertices, faces) num subprocesso, tentando cada
+    dicionário de parâmetros de `tentativas` até um dar certo.
+
+    funcao precisa ser importável pelo subprocesso (definida no topo de um
+    módulo). Retorna (vertices, faces, parametros_usados); se todas as
+    tentativas falharem, RuntimeError com o motivo de cada uma. Com cancelar
+    (threading.Event) acionado, o subprocesso em andamento é morto e sobe
+    InterruptedError, sem passar para a próxima tentativa.
+    """
+    descricao = descricao or funcao.__name__
+    blocos = [_para_compartilhada(np.asarray(vertices, dtype=np.float64)),
+              _para_compartilhada(np.asarray(faces, dtype=np.int64))]
+    entradas = [d for _, d in blocos]
+    falhas = []
+    try:
+        for i, parametros in enumerate(tentativas, 1):
+            inicio = time.perf_counter()
+            try:
+                saidas = _tentar(funcao, entradas, parametros, tempo_limite, cancelar)
+            except RuntimeError as e:
+                falhas.append(f'tentativa {i} {parametros or "(padrão)"}: {e}')
+                print(f"{descricao}: {falhas[-1]} ({time.perf_counter() - inicio:.1f} s)")
+                continue
+            novos_vertices, novas_faces = (_de_compartilhada(d, liberar=True) for d in saidas)
+            return novos_vertices, novas_faces, parametros
+    finally:
+        for bloco, _ in blocos:
+            bloco.close()
+            bloco.unlink()
+    raise RuntimeError(f'{descricao} falhou em todas as tentativas:\n' + '\n'.join(falhas))
+
+
+def meshfix(vertices, faces, limpar=False, joincomp=False, remove_smallest_components=True):
+    """MeshFix (pymeshfix); com limpar, junta vértices coincidentes e tira faces degeneradas/repetidas antes"""
+    import pymeshfix
+
+    if limpar:
+        import trimesh
+
+        limpa = trimesh.Trimesh(vertices=vertices, faces=faces, process=True, validate=True)
+        vertices, faces = limpa.vertices, limpa.faces
+    reparo = pymeshfix.MeshFix(vertices, faces)
+    reparo.repair(joincomp=joincomp, remove_smallest_components=remove_smallest_components)
+    return reparo.v, reparo.f
+
+
+def filtros_pymeshlab(vertices, faces, filtros):
+    """Aplica em sequência os filtros [(nome, {parâmetro: valor})] de um MeshSet.
+
+    Valores ('PureValue', x) viram pymeshlab.PureValue(x) (o mesmo para
+    qualquer outro tipo de valor do pymeshlab), já que só tipos simples
+    atravessam o processo.
+    """
+    import pymeshlab
+
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(vertices, faces))
+    for nome, parametros in filtros:
+        convertidos = {chave: getattr(pymeshlab, valor[0])(valor[1])
+                       if isinstance(valor, tuple) and len(valor) == 2 and isinstance(valor[0], str) else valor
+                       for chave, valor in parametros.items()}
+        getattr(ms, nome)(**convertidos)
+    atual = ms.current_mesh()
+    return np.array(atual.vertex_matrix()), np.array(atual.face_matrix())
+
+
+def pymeshlab_isolado(vertices, faces, tentativas_filtros, tempo_limite=TEMPO_LIMITE, descricao=None, cancelar=None):
+    """executar_isolado(filtros_pymeshlab) com uma lista de filtros por tentativa"""
+    tentativas = [{'filtros': filtros} for filtros in tentativas_filtros]
+    descricao = descricao or ', '.join(nome for nome, _ in tentativas_filtros[0])
+    return executar_isolado(filtros_pymeshlab, vertices, faces, tentativas, tempo_limite, descricao, cancelar)
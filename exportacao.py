@@ -0,0 +1,275 @@
+"""Exportação em fluxo: STL/PLY binários, OBJ, 3MF e GLB escritos por blocos direto dos arrays.
+
+Nada de objetos por face: cada bloco de vértices/faces vira bytes (ou
+texto, no OBJ/3MF) com uma operação numpy e vai para o arquivo. O pico de
+memória fica em um bloco, não na malha inteira. ao_avancar(feitos, total)
+é chamado a cada bloco (feitos/total em elementos gravados).
+
+Normais por vértice (personalizadas ou já calculadas) e UV vão junto quando
+a malha as tem, como no exportador do trimesh; OBJ/GLB texturizados (material
+e imagem em arquivos à parte) continuam com o trimesh.
+"""
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+# Faces (ou vértices) por bloco
+BLOCO = 1_000_000
+FORMATOS = ('.stl', '.ply', '.obj', '.3mf', '.glb')
+
+_FACE_STL = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('atributo', '<u2')])
+_FACE_PLY = np.dtype([('n', 'u1'), ('indices', '<i4', 3)])
+
+
+def _blocos(total, bloco):
+    for inicio in range(0, total, bloco):
+        yield inicio, min(inicio + bloco, total)
+
+
+class _Progresso:
+    """Conta elementos gravados em todas as etapas de um arquivo"""
+
+    def __init__(self, total, ao_avancar):
+        self.feitos, self.total, self.ao_avancar = 0, total, ao_avancar
+
+    def __call__(self, n):
+        self.feitos += n
+        if self.ao_avancar is not None:
+            self.ao_avancar(self.feitos, self.total)
+
+
+def exportar_stl(arquivo, vertices, faces, ao_avancar=None, bloco=BLOCO):
+    """STL binário: cabeçalho, contagem e 50 bytes por face (normal calculada por bloco)"""
+    progresso = _Progresso(len(faces), ao_avancar)
+    arquivo.write(b'MeshDoctor3D binary STL'.ljust(80, b'\0'))
+    arquivo.write(struct.pack('<I', len(faces)))
+    for inicio, fim in _blocos(len(faces), bloco):
+        tri = vertices[faces[inicio:fim]]
+        normais = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        comprimento = np.linalg.norm(normais, axis=1)
+        normais /= np.where(comprimento > 0, comprimento, 1.0)[:, None]
+        registros = np.zeros(fim - inicio, dtype=_FACE_STL)
+        registros['normal'] = normais
+        registros['vertices'] = tri
+        arquivo.write(registros.tobytes())
+        progresso(fim - inicio)
+
+
+def exportar_ply(arquivo, vertices, faces, cores=None, ao_avancar=None, bloco=BLOCO, normais=None, uv=None):
+    """PLY binário little-endian: float32 x y z (+ nx ny nz, double s t e rgba uchar, se houver) e listas int32"""
+    progresso = _Progresso(len(vertices) + len(faces), ao_avancar)
+    propriedades = ['property float x', 'property float y', 'property float z']
+    tipo_vertice = [('posicao', '<f4', 3)]
+    if normais is not None:
+        propriedades += ['property float nx', 'property float ny', 'property float nz']
+        tipo_vertice.append(('normal', '<f4', 3))
+    if uv is not None:
+        propriedades += ['property double s', 'property double t']
+        tipo_vertice.append(('uv', '<f8', 2))
+    if cores is not None:
+        propriedades += [f'property uchar {c}' for c in ('red', 'green', 'blue', 'alpha')]
+        tipo_vertice.append(('cor', 'u1', 4))
+    tipo_vertice = np.dtype(tipo_vertice)
+    cabecalho = ['ply', 'format binary_little_endian 1.0', f'element vertex {len(vertices)}', *propriedades,
+                 f'element face {len(faces)}', 'property list uchar int vertex_indices', 'end_header']
+    arquivo.write(('\n'.join(cabecalho) + '\n').encode('ascii'))
+    for inicio, fim in _blocos(len(vertices), bloco):
+        registros = np.empty(fim - inicio, dtype=tipo_vertice)
+        registros['posicao'] = vertices[inicio:fim]
+        if normais is not None:
+            registros['normal'] = normais[inicio:fim]
+        if uv is not None:
+            registros['uv'] = uv[inicio:fim]
+        if cores is not None:
+            registros['cor'] = cores[inicio:fim]
+        arquivo.write(registros.tobytes())
+        progresso(fim - inicio)
+    for inicio, fim in _blocos(len(faces), bloco):
+        registros = np.empty(fim - inicio, dtype=_FACE_PLY)
+        registros['n'] = 3
+        registros['indices'] = faces[inicio:fim]
+        arquivo.write(registros.tobytes())
+        progresso(fim - inicio)
+
+
+def _texto(modelo, valores):
+    """Um `modelo` por linha de valores, formatado de uma vez só"""
+    return (modelo * len(valores)) % tuple(valores.ravel().tolist())
+
+
+def exportar_obj(arquivo, vertices, faces, ao_avancar=None, bloco=BLOCO, normais=None):
+    """OBJ (texto por natureza): linhas v (+ vn) e f formatadas por bloco"""
+    progresso = _Progresso(len(vertices) + len(faces), ao_avancar)
+    arquivo.write(b'# MeshDoctor3D\n')
+    for inicio, fim in _blocos(len(vertices), bloco):
+        arquivo.write(_texto('v %.9g %.9g %.9g\n', vertices[inicio:fim]).encode('ascii'))
+        if normais is not None:
+            arquivo.write(_texto('vn %.7g %.7g %.7g\n', normais[inicio:fim]).encode('ascii'))
+        progresso(fim - inicio)
+    for inicio, fim in _blocos(len(faces), bloco):
+        if normais is None:
+            arquivo.write(_texto('f %d %d %d\n', faces[inicio:fim] + 1).encode('ascii'))
+        else:
+            # Normal com o mesmo índice do vértice: f v//vn
+            arquivo.write(_texto('f %d//%d %d//%d %d//%d\n', np.repeat(faces[inicio:fim] + 1, 2, axis=1))
+                          .encode('ascii'))
+        progresso(fim - inicio)
+
+
+_TIPOS_CONTEUDO_3MF = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>')
+_RELACOES_3MF = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/></Relationships>')
+
+
+def exportar_3mf(caminho, vertices, faces, ao_avancar=None, bloco=BLOCO, nivel=1, unidade='millimeter'):
+    """3MF: pacote zip (deflate, nivel 0-9) com o modelo XML escrito em fluxo dentro do zip.
+
+    O nível 1 já reduz o XML ~4x; níveis maiores ganham pouco e custam o triplo do tempo.
+    """
+    progresso = _Progresso(len(vertices) + len(faces), ao_avancar)
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED, compresslevel=nivel) as pacote:
+        pacote.writestr('[Content_Types].xml', _TIPOS_CONTEUDO_3MF)
+        pacote.writestr('_rels/.rels', _RELACOES_3MF)
+        with pacote.open('3D/3dmodel.model', 'w', force_zip64=True) as modelo:
+            modelo.write((
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<model unit="{unidade}" xml:lang="en-US" '
+                'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                '<resources><object id="1" type="model"><mesh><vertices>\n').encode('ascii'))
+            for inicio, fim in _blocos(len(vertices), bloco):
+                modelo.write(_texto('<vertex x="%.9g" y="%.9g" z="%.9g"/>\n', vertices[inicio:fim]).encode('ascii'))
+                progresso(fim - inicio)
+            modelo.write(b'</vertices><triangles>\n')
+            for inicio, fim in _blocos(len(faces), bloco):
+                modelo.write(_texto('<triangle v1="%d" v2="%d" v3="%d"/>\n', faces[inicio:fim]).encode('ascii'))
+                progresso(fim - inicio)
+            modelo.write(b'</triangles></mesh></object></resources>\n'
+                         b'<build><item objectid="1"/></build></model>\n')
+
+
+def exportar_glb(arquivo, vertices, faces, ao_avancar=None, bloco=BLOCO, quantizar=False, normais=None):
+    """glTF binário: índices uint16/uint32, posições float32 (e normais float32) num único buffer.
+
+    Com quantizar, posições em uint16 dentro da caixa envolvente
+    (KHR_mesh_quantization; a escala/translação vai no nó): 8 em vez de 12
+    bytes por vértice, erro de até caixa/131070 por eixo.
+    """
+    progresso = _Progresso(len(vertices) * (1 if normais is None else 2) + len(faces), ao_avancar)
+    minimo = vertices.min(axis=0) if len(vertices) else np.zeros(3)
+    maximo = vertices.max(axis=0) if len(vertices) else np.zeros(3)
+    indices_curtos = len(vertices) <= np.iinfo(np.uint16).max
+    tipo_indice, componente_indice = (np.dtype('<u2'), 5123) if indices_curtos else (np.dtype('<u4'), 5125)
+    bytes_indices = len(faces) * 3 * tipo_indice.itemsize
+    bytes_indices += -bytes_indices % 4
+    no = {'mesh': 0}
+    posicao = {'bufferView': 1, 'componentType': 5126, 'count': len(vertices), 'type': 'VEC3',
+               'min': minimo.tolist(), 'max': maximo.tolist()}
+    passo_vertice = 12
+    if quantizar:
+        escala = np.where(maximo > minimo, (maximo - minimo) / 65535.0, 1.0)
+        # Cada vértice em 8 bytes (3 x uint16 + 2 de preenchimento): atributos alinhados em 4
+        passo_vertice = 8
+        posicao.update(componentType=5123, min=[0, 0, 0],
+                       max=np.round((maximo - minimo) / escala).astype(int).tolist())
+        no.update(translation=minimo.tolist(), scale=escala.tolist())
+    bytes_posicoes = len(vertices) * passo_vertice
+    documento = {
+        'asset': {'version': '2.0', 'generator': 'MeshDoctor3D'},
+        'scene': 0, 'scenes': [{'nodes': [0]}], 'nodes': [no],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 1}, 'indices': 0, 'mode': 4}]}],
+        'accessors': [{'bufferView': 0, 'componentType': componente_indice, 'count': len(faces) * 3, 'type': 'SCALAR'},
+                      posicao],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': 0, 'byteLength': len(faces) * 3 * tipo_indice.itemsize, 'target': 34963},
+            {'buffer': 0, 'byteOffset': bytes_indices, 'byteLength': len(vertices) * passo_vertice,
+             'target': 34962, **({'byteStride': 8} if quantizar else {})},
+        ],
+        'buffers': [{'byteLength': bytes_indices + bytes_posicoes}],
+    }
+    if normais is not None:
+        documento['meshes'][0]['primitives'][0]['attributes']['NORMAL'] = 2
+        documento['accessors'].append({'bufferView': 2, 'componentType': 5126, 'count': len(vertices), 'type': 'VEC3'})
+        documento['bufferViews'].append({'buffer': 0, 'byteOffset': bytes_indices + bytes_posicoes,
+                                         'byteLength': len(vertices) * 12, 'target': 34962})
+        documento['buffers'][0]['byteLength'] += len(vertices) * 12
+    if quantizar:
+        documento['extensionsUsed'] = documento['extensionsRequired'] = ['KHR_mesh_quantization']
+    texto = json.dumps(documento, separators=(',', ':')).encode('utf-8')
+    texto += b' ' * (-len(texto) % 4)
+    binario = documento['buffers'][0]['byteLength']
+    arquivo.write(struct.pack('<4sII', b'glTF', 2, 12 + 8 + len(texto) + 8 + binario))
+    arquivo.write(struct.pack('<I4s', len(texto), b'JSON') + texto)
+    arquivo.write(struct.pack('<I4s', binario, b'BIN\0'))
+    for inicio, fim in _blocos(len(faces), bloco):
+        arquivo.write(np.ascontiguousarray(faces[inicio:fim], dtype=tipo_indice).tobytes())
+        progresso(fim - inicio)
+    arquivo.write(b'\0' * (bytes_indices - len(faces) * 3 * tipo_indice.itemsize))
+    for inicio, fim in _blocos(len(vertices), bloco):
+        if quantizar:
+            registros = np.zeros((fim - inicio, 4), dtype='<u2')
+            registros[:, :3] = np.round((vertices[inicio:fim] - minimo) / escala)
+            arquivo.write(registros.tobytes())
+        else:
+            arquivo.write(np.ascontiguousarray(vertices[inicio:fim], dtype='<f4').tobytes())
+        progresso(fim - inicio)
+    if normais is None:
+        return
+    for inicio, fim in _blocos(len(vertices), bloco):
+        normal = np.array(normais[inicio:fim], dtype=np.float64)
+        if quantizar:
+            # A escala do nó deforma as normais pela inversa transposta: grava S * n, normalizada
+            normal = normal * escala
+        comprimento = np.linalg.norm(normal, axis=1)
+        normal /= np.where(comprimento > 0, comprimento, 1.0)[:, None]
+        arquivo.write(normal.astype('<f4').tobytes())
+        progresso(fim - inicio)
+
+
+def exportar(caminho, mesh, ao_avancar=None, **opcoes):
+    """Grava a malha pelo exportador em fluxo do formato (pela extensão); outros formatos via trimesh.
+
+    opcoes: bloco; nivel/unidade (3MF); quantizar (GLB). Escreve num arquivo
+    temporário e renomeia no fim: uma falha no meio não deixa arquivo truncado.
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    uv = getattr(mesh.visual, 'uv', None) if mesh.visual.kind == 'texture' else None
+    if extensao not in FORMATOS or (uv is not None and extensao in ('.obj', '.glb')):
+        mesh.export(caminho)
+        if ao_avancar is not None:
+            ao_avancar(1, 1)
+        return caminho
+    vertices = np.asarray(mesh.vertices)
+    faces = np.asarray(mesh.faces)
+    # Como no trimesh: normais por vértice só se já existem (personalizadas ou calculadas)
+    normais = np.asarray(mesh.vertex_normals) if 'vertex_normals' in mesh._cache else None
+    temporario = caminho + '.parcial'
+    try:
+        if extensao == '.3mf':
+            exportar_3mf(temporario, vertices, faces, ao_avancar, **opcoes)
+        else:
+            with open(temporario, 'wb') as arquivo:
+                if extensao == '.stl':
+                    exportar_stl(arquivo, vertices, faces, ao_avancar, **opcoes)
+                elif extensao == '.ply':
+                    cores = mesh.visual.vertex_colors if mesh.visual.kind == 'vertex' else None
+                    exportar_ply(arquivo, vertices, faces, cores, ao_avancar, normais=normais, uv=uv, **opcoes)
+                elif extensao == '.obj':
+                    exportar_obj(arquivo, vertices, faces, ao_avancar, normais=normais, **opcoes)
+                else:
+                    exportar_glb(arquivo, vertices, faces, ao_avancar, normais=normais, **opcoes)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return caminho
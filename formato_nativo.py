@@ -0,0 +1,202 @@
+"""Formato binário nativo (.md3d): cabeçalho + arrays alinhados, mapeáveis em memória.
+
+Layout (little-endian):
+    cabeçalho   'MD3D', versão (u2), compressão (u2), número de seções (u4)
+    origem      (versão 4+) tamanho (u8) e mtime em ns (i8) do arquivo de
+                origem de um cache; zeros num arquivo .md3d avulso
+    tabela      por seção: nome (16s), dtype (8s), linhas (u8), colunas (u8),
+                offset (u8), bytes no arquivo (u8)
+    dados       cada seção começa num offset múltiplo de ALINHAMENTO
+
+Versão 2: o cache ao lado de um arquivo guarda a geometria do arquivo (sem a
+centralização nem a reordenação da GUI) e a topologia com todas as entradas
+que o trimesh calcula junto. Versão 3: polígonos só são gravados se o process
+não mexeu nos vértices. Versão 4: o cache guarda a assinatura (tamanho, mtime
+em ns) do arquivo de origem e só vale se ela bater exatamente; comparar só
+"cache mais novo que a origem" aceitava uma origem trocada por uma cópia com
+o mtime antigo preservado (cp -p, rsync -a). Caches de versões anteriores são
+ignorados e regravados.
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGICO = b'MD3D'
+VERSAO = 4
+EXTENSAO = '.md3d'
+ALINHAMENTO = 64
+CABECALHO = struct.Struct('<4sHHI')
+ORIGEM = struct.Struct('<Qq')
+ENTRADA = struct.Struct('<16s8sQQQQ')
+COMPRESSOES = {None: 0, 'zstd': 1, 'lz4': 2}
+# Topologia gravada: grupos (seção, chave no cache do trimesh) que o trimesh calcula juntos e
+# só podem ser restaurados juntos (nomes de seção têm no máximo 16 bytes)
+TOPOLOGIA = (
+    (('edges_unique', 'edges_unique'), ('edges_unique_idx', 'edges_unique_idx'),
+     ('edges_unique_inv', 'edges_unique_inverse')),
+    (('face_adjacency', 'face_adjacency'), ('face_adj_edges', 'face_adjacency_edges')),
+)
+
+
+def _compressor(nome):
+    if nome == 'zstd':
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError('Compressão zstd requer o pacote zstandard (pip install zstandard).') from e
+        return zstandard.ZstdCompressor(level=10).compress, lambda dados: zstandard.ZstdDecompressor().decompress(dados)
+    if nome == 'lz4':
+        try:
+            import lz4.frame
+        except ImportError as e:
+            raise ImportError('Compressão lz4 requer o pacote lz4 (pip install lz4).') from e
+        return lz4.frame.compress, lz4.frame.decompress
+    raise ValueError(f'Compressão desconhecida: {nome}')
+
+
+def caminho_cache(caminho):
+    """Arquivo de cache nativo que acompanha uma malha (ex.: peca.stl -> peca.stl.md3d)"""
+    return caminho + EXTENSAO
+
+
+def assinatura_arquivo(caminho):
+    """(tamanho, mtime em ns) do arquivo, comparados exatamente com os gravados no cache"""
+    estado = os.stat(caminho)
+    return estado.st_size, estado.st_mtime_ns
+
+
+def _ler_cabecalho(caminho):
+    """(versão, assinatura da origem) gravados no arquivo; (0, None) se não for um arquivo .md3d"""
+    with open(caminho, 'rb') as f:
+        cabecalho = f.read(CABECALHO.size)
+        if len(cabecalho) < CABECALHO.size or cabecalho[:4] != MAGICO:
+            return 0, None
+        versao = CABECALHO.unpack(cabecalho)[1]
+        origem = f.read(ORIGEM.size) if versao >= 4 else b''
+    return versao, ORIGEM.unpack(origem) if len(origem) == ORIGEM.size else None
+
+
+def versao_do_arquivo(caminho):
+    """Versão do formato gravada no cabeçalho (0 se não for um arquivo .md3d)"""
+    return _ler_cabecalho(caminho)[0]
+
+
+def cache_valido(caminho):
+    """True se existe um cache nativo da versão atual gravado para exatamente este arquivo de origem"""
+    cache = caminho_cache(caminho)
+    if not os.path.exists(cache):
+        return False
+    versao, origem = _ler_cabecalho(cache)
+    return versao == VERSAO and origem == assinatura_arquivo(caminho)
+
+
+def secoes_da_malha(mesh, poligonos=None):
+    """Arrays gravados no formato: geometria, normais e topologia já calculada"""
+    secoes = {
+        'vertices': np.asarray(mesh.vertices, dtype=np.float64),
+        'faces': np.asarray(mesh.faces, dtype=np.int64),
+        'face_normals': np.asarray(mesh.face_normals, dtype=np.float64),
+    }
+    # Acessar a primeira entrada de cada grupo calcula (e põe no cache) as outras
+    for grupo in TOPOLOGIA:
+        getattr(mesh, grupo[0][1])
+        for secao, chave in grupo:
+            secoes[secao] = np.asarray(mesh._cache[chave], dtype=np.int64)
+    if poligonos is not None:
+        secoes['poly_offsets'] = poligonos.offsets
+        secoes['poly_indices'] = poligonos.indices
+    return secoes
+
+
+def salvar_nativo(caminho, secoes, compressao=None, origem=(0, 0)):
+    """Grava um dicionário {nome: array 1D/2D} no formato nativo; origem = assinatura do arquivo de um cache"""
+    comprimir = _compressor(compressao)[0] if compressao else None
+    dados = []
+    for nome, array in secoes.items():
+        array = np.ascontiguousarray(array)
+        bruto = array.tobytes()
+        dados.append((nome, array, comprimir(bruto) if comprimir else bruto))
+    offset = CABECALHO.size + ORIGEM.size + ENTRADA.size * len(dados)
+    tabela = []
+    for nome, array, bruto in dados:
+        offset = -(-offset // ALINHAMENTO) * ALINHAMENTO
+        colunas = array.shape[1] if array.ndim == 2 else 0
+        tabela.append((nome, array.dtype.str, array.shape[0], colunas, offset, len(bruto)))
+        offset += len(bruto)
+    # Grava num temporário e renomeia: um cache pela metade nunca fica visível
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, COMPRESSOES[compressao], len(dados)))
+        f.write(ORIGEM.pack(*origem))
+        for nome, dtype, linhas, colunas, inicio, tamanho in tabela:
+            f.write(ENTRADA.pack(nome.encode('ascii'), dtype.encode('ascii'), linhas, colunas, inicio, tamanho))
+        for (_, _, bruto), (_, _, _, _, inicio, _) in zip(dados, tabela):
+            f.write(b'\0' * (inicio - f.tell()))
+            f.write(bruto)
+    os.replace(temporario, caminho)
+
+
+def carregar_nativo(caminho):
+    """Lê as seções; sem compressão os arrays são memmaps copy-on-write (sem parse, sem cópia)"""
+    with open(caminho, 'rb') as f:
+        magico, versao, compressao, n_secoes = CABECALHO.unpack(f.read(CABECALHO.size))
+        if magico != MAGICO:
+            raise ValueError(f'{caminho} não é um arquivo {EXTENSAO}')
+        if versao > VERSAO:
+            raise ValueError(f'Versão {versao} do formato {EXTENSAO} não suportada')
+        if versao >= 4:
+            f.read(ORIGEM.size)
+        tabela = [ENTRADA.unpack(f.read(ENTRADA.size)) for _ in range(n_secoes)]
+        nome_compressao = {v: k for k, v in COMPRESSOES.items()}[compressao]
+        descomprimir = _compressor(nome_compressao)[1] if nome_compressao else None
+        secoes = {}
+        for nome, dtype, linhas, colunas, inicio, tamanho in tabela:
+            nome = nome.rstrip(b'\0').decode('ascii')
+            dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+            forma = (linhas, colunas) if colunas else (linhas,)
+            if descomprimir:
+                f.seek(inicio)
+                secoes[nome] = np.frombuffer(descomprimir(f.read(tamanho)), dtype=dtype).reshape(forma).copy()
+            elif linhas == 0:
+                secoes[nome] = np.zeros(forma, dtype=dtype)
+            else:
+                secoes[nome] = np.memmap(caminho, dtype=dtype, mode='c', offset=inicio, shape=forma)
+    return secoes
+
+
+def malha_de_secoes(secoes):
+    """Monta (trimesh, poligonos) a partir das seções, com a topologia já no cache do trimesh"""
+    import trimesh
+    from poligonos import MalhaPoligonal
+
+    mesh = trimesh.Trimesh(vertices=secoes['vertices'], faces=secoes['faces'],
+                           face_normals=secoes.get('face_normals'), process=False)
+    restaurar_topologia(mesh, secoes)
+    poligonos = None
+    if 'poly_offsets' in secoes:
+        poligonos = MalhaPoligonal(mesh.vertices, secoes['poly_offsets'], secoes['poly_indices'])
+    return mesh, poligonos
+
+
+def restaurar_topologia(mesh, secoes):
+    """Coloca a topologia gravada no cache do trimesh (chamar de novo após mover vértices).
+
+    Um grupo incompleto fica de fora: o trimesh recalcula o grupo inteiro quando precisar.
+    """
+    for grupo in TOPOLOGIA:
+        if all(secao in secoes for secao, _ in grupo):
+            for secao, chave in grupo:
+                mesh._cache[chave] = np.asarray(secoes[secao])
+
+
+def salvar_cache(caminho, mesh, poligonos=None, compressao=None):
+    """Grava o cache nativo ao lado de caminho; falhas (ex.: pasta só leitura) são só avisadas"""
+    try:
+        # Assinatura lida antes de gravar: se a origem mudar no meio, o cache já nasce inválido
+        origem = assinatura_arquivo(caminho)
+        salvar_nativo(caminho_cache(caminho), secoes_da_malha(mesh, poligonos), compressao, origem)
+        return True
+    except (OSError, ImportError) as e:
+        print(f"Não foi possível gravar o cache nativo de {caminho}: {e}")
+        return False
@@ -0,0 +1,46 @@
+"""Importação tardia dos backends pesados (trimesh, pymeshfix, pymeshlab, scipy)."""
+import importlib
+import threading
+
+
+class ModuloTardio:
+    """Proxy que só importa o módulo no primeiro acesso a um atributo"""
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+        self._trava = threading.Lock()
+
+    def carregar(self):
+        if self._modulo is None:
+            with self._trava:
+                if self._modulo is None:
+                    self._modulo = importlib.import_module(self._nome)
+        return self._modulo
+
+    @property
+    def carregado(self):
+        return self._modulo is not None
+
+    def __getattr__(self, atributo):
+        return getattr(self.carregar(), atributo)
+
+    def __repr__(self):
+        estado = 'carregado' if self.carregado else 'não carregado'
+        return f"<ModuloTardio {self._nome} ({estado})>"
+
+
+def pre_aquecer(modulos, ao_terminar=None):
+    """Importa os módulos numa thread em segundo plano; falhas são ignoradas (o erro reaparece no uso)"""
+    def trabalho():
+        for modulo in modulos:
+            try:
+                modulo.carregar()
+            except Exception as e:
+                print(f"Pré-carregamento de {modulo._nome} falhou: {e}")
+        if ao_terminar is not None:
+            ao_terminar()
+
+    thread = threading.Thread(target=trabalho, name='pre-aquecimento', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,109 @@
+"""Reordenação de vértices e faces para localidade de memória (curva de Morton)."""
+import time
+
+import numpy as np
+
+
+def _espalhar_bits(x):
+    """Intercala dois zeros entre os 21 bits de x (parte de um código de Morton 3D)"""
+    x = x.astype(np.uint64) & np.uint64(0x1FFFFF)
+    for deslocamento, mascara in ((32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF), (8, 0x100F00F00F00F00F),
+                                  (4, 0x10C30C30C30C30C3), (2, 0x1249249249249249)):
+        x = (x | (x << np.uint64(deslocamento))) & np.uint64(mascara)
+    return x
+
+
+def codigos_morton(pontos, bits=21):
+    """Código de Morton (uint64) de cada ponto, quantizado na caixa envolvente com `bits` por eixo"""
+    pontos = np.asarray(pontos, dtype=np.float64)
+    if len(pontos) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    minimo = pontos.min(axis=0)
+    escala = (2 ** bits - 1) / max(float(np.ptp(pontos, axis=0).max()), 1e-300)
+    q = ((pontos - minimo) * escala).astype(np.uint64)
+    return (_espalhar_bits(q[:, 0]) << np.uint64(2)) | (_espalhar_bits(q[:, 1]) << np.uint64(1)) | _espalhar_bits(q[:, 2])
+
+
+def ordem_faces(faces):
+    """Ordem das faces pelo menor e pelo segundo menor índice de vértice.
+
+    Com os vértices já em ordem de Morton, faces vizinhas no espaço ficam
+    vizinhas no array e reusam os mesmos vértices em sequência.
+    """
+    ordenados = np.sort(faces, axis=1)
+    return np.lexsort((ordenados[:, 1], ordenados[:, 0]))
+
+
+def reordenar(mesh, no_lugar=False):
+    """Malha com vértices na ordem de Morton e faces ordenadas pelos vértices.
+
+    Normais, cores (por vértice ou face), UV e atributos extras acompanham a
+    nova ordem. Com no_lugar, os arrays são trocados na própria malha (quem
+    guarda referência a ela continua válido). Retorna (malha, info) com as
+    permutações usadas.
+    """
+    import trimesh
+
+    vertices = np.asarray(mesh.vertices)
+    ordem_v = np.argsort(codigos_morton(vertices), kind='stable')
+    novo_indice = np.empty(len(ordem_v), dtype=np.int64)
+    novo_indice[ordem_v] = np.arange(len(ordem_v))
+    faces = novo_indice[np.asarray(mesh.faces)]
+    ordem_f = ordem_faces(faces)
+    # As normais podem ser personalizadas (transferidas, ponderadas): são levadas, não recalculadas
+    reordenada = trimesh.Trimesh(vertices=vertices[ordem_v], faces=faces[ordem_f],
+                                 vertex_normals=np.asarray(mesh.vertex_normals)[ordem_v], process=False)
+    visual = mesh.visual
+    if visual.kind == 'vertex':
+        reordenada.visual.vertex_colors = visual.vertex_colors[ordem_v]
+    elif visual.kind == 'face':
+        reordenada.visual.face_colors = visual.face_colors[ordem_f]
+    elif visual.kind == 'texture' and getattr(visual, 'uv', None) is not None:
+        reordenada.visual = trimesh.visual.TextureVisuals(uv=np.asarray(visual.uv)[ordem_v], material=visual.material)
+    for nome, valores in mesh.vertex_attributes.items():
+        if len(valores) == len(ordem_v):
+            reordenada.vertex_attributes[nome] = np.asarray(valores)[ordem_v]
+    for nome, valores in mesh.face_attributes.items():
+        if len(valores) == len(ordem_f):
+            reordenada.face_attributes[nome] = np.asarray(valores)[ordem_f]
+    info = {'ordem_vertices': ordem_v, 'ordem_faces': ordem_f}
+    if not no_lugar:
+        reordenada.metadata.update(mesh.metadata)
+        return reordenada, info
+    mesh.vertices, mesh.faces = reordenada.vertices, reordenada.faces
+    mesh.vertex_normals = reordenada.vertex_normals
+    mesh.visual = reordenada.visual
+    mesh.vertex_attributes.update(reordenada.vertex_attributes)
+    mesh.face_attributes.update(reordenada.face_attributes)
+    return mesh, info
+
+
+def reordenar_poligonos(poligonos, ordem_vertices, vertices):
+    """Mesma topologia poligonal com os índices na nova ordem de vértices"""
+    from poligonos import MalhaPoligonal
+
+    novo_indice = np.empty(len(ordem_vertices), dtype=np.int64)
+    novo_indice[ordem_vertices] = np.arange(len(ordem_vertices))
+    return MalhaPoligonal(vertices, poligonos.offsets, novo_indice[poligonos.indices])
+
+
+def medir_localidade(mesh, repeticoes=3):
+    """Tempos (melhor de `repeticoes`, em s) das etapas sensíveis à ordem: análise e preparo do desenho"""
+    from analise_incremental import AnaliseIncremental
+
+    vertices, faces = np.asarray(mesh.vertices), np.asarray(mesh.faces)
+
+    def preparo_desenho():
+        # O que o desenho faz por vértice de face: gather das posições e normal de face
+        tri = vertices[faces]
+        np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+
+    tempos = {}
+    for nome, etapa in (('analise', lambda: AnaliseIncremental(mesh)), ('desenho', preparo_desenho)):
+        melhor = np.inf
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            etapa()
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = melhor
+    return tempos
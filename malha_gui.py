@@ -1,38 +1,163 @@
+import os
 import sys
-import trimesh
-import pymeshfix
-import pymeshlab
+import threading
 import numpy as np
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel, QSizePolicy, QDoubleSpinBox, QMainWindow, QAction, QMenuBar, QInputDialog, QMessageBox, QFrame, QSplitter, QGroupBox
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel, QSizePolicy, QDoubleSpinBox, QMainWindow, QAction, QMenuBar, QInputDialog, QMessageBox, QFrame, QSplitter, QGroupBox, QProgressBar
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor, QIcon
 from pyqtgraph.opengl import GLViewWidget, MeshData, GLMeshItem, GLLinePlotItem
-from scipy.spatial import cKDTree
+from importacao_tardia import ModuloTardio, pre_aquecer
+from analise_incremental import AnaliseIncremental
+from buracos import MAX_ARESTAS_LACO
+from poligonos import quadrangular
+from carregamento import ler_malha, ler_previa_stl, processar_malha, subamostrar_faces
+from formato_nativo import (
+    EXTENSAO, cache_valido, caminho_cache, carregar_nativo, malha_de_secoes, restaurar_topologia,
+    salvar_cache, salvar_nativo, secoes_da_malha
+)
+import operacoes
+from cena import CORES_CORPOS, Cena
+from compacto import bytes_arrays, compactar, memoria_malha
+from localidade import medir_localidade, reordenar, reordenar_poligonos
+from custo_memoria import cabe, formatar_bytes, maior_que_cabe, memoria_disponivel, voxel_que_cabe
+from decimacao_paralela import MIN_FACES_PARTICIONAR
+from execucao_isolada import pymeshlab_isolado
+from exportacao import exportar
+from operacoes import centralizar_na_origem
+
+# Backends pesados só são importados na primeira operação que precisar deles
+trimesh = ModuloTardio('trimesh')
+pymeshfix = ModuloTardio('pymeshfix')
+pymeshlab = ModuloTardio('pymeshlab')
+spatial = ModuloTardio('scipy.spatial')
+
+
+# Modo compacto (menu Ferramentas): buffers dos viewports, índice e SDF em float32/int32
+MODO_COMPACTO = False
+
+
+def trimesh_to_meshdata(mesh, cores_vertices=None):
+    # Converte uma malha trimesh para MeshData do pyqtgraph (float32/int32 no modo compacto)
+    vertices, faces = compactar(mesh.vertices, mesh.faces, MODO_COMPACTO)
+    if cores_vertices is not None and MODO_COMPACTO:
+        cores_vertices = np.asarray(cores_vertices, dtype=np.float32)
+    return MeshData(vertexes=vertices, faces=faces, vertexColors=cores_vertices)
+
+
+def create_glmeshitem(mesh, color=(0.5, 0.5, 1, 1), draw_edges=True, cores_vertices=None):
+    # Com cores_vertices (RGBA por vértice) a cor única é ignorada
+    meshdata = trimesh_to_meshdata(mesh, cores_vertices)
+    item = GLMeshItem(meshdata=meshdata, smooth=False, color=color, shader='shaded', drawEdges=draw_edges)
+    return item
 
 
-def trimesh_to_meshdata(mesh):
-    # Converte uma malha trimesh para MeshData do pyqtgraph
-    faces = mesh.faces
-    vertices = mesh.vertices
-    return MeshData(vertexes=vertices, faces=faces)
+def create_poly_edges_item(poligonos, color=(0, 0, 0, 1)):
+    # Desenha só as arestas dos polígonos (sem as diagonais da triangulação)
+    pts = poligonos.vertices[poligonos.arestas()].reshape(-1, 3)
+    return GLLinePlotItem(pos=pts, color=color, width=1, antialias=True, mode='lines')
 
 
-def create_glmeshitem(mesh, color=(0.5, 0.5, 1, 1)):
-    meshdata = trimesh_to_meshdata(mesh)
-    item = GLMeshItem(meshdata=meshdata, smooth=False, color=color, shader='shaded', drawEdges=True)
-    return item
+class CarregadorMalha(QThread):
+    """Carrega a malha em segundo plano emitindo prévia, malha completa e análise"""
+    progresso = pyqtSignal(int, str)
+    previa_pronta = pyqtSignal(object)
+    malha_pronta = pyqtSignal(object, object, str)
+    analise_pronta = pyqtSignal(object)
+    falhou = pyqtSignal(str)
 
+    def __init__(self, caminho, parent=None, reordenar=False):
+        super().__init__(parent)
+        self.caminho = caminho
+        self.reordenar = reordenar
 
-def centralizar_na_origem(mesh):
-    # Move o centro do bounding box para a origem
-    if mesh is None or not hasattr(mesh, 'bounding_box'):
-        return mesh
-    bbox = mesh.bounding_box
-    center = bbox.centroid
-    mesh.vertices -= center
-    return mesh
+    def run(self):
+        try:
+            # Formato nativo (ou cache nativo atualizado ao lado do arquivo): sem parse nem process
+            secoes = None
+            if self.caminho.lower().endswith(EXTENSAO):
+                secoes = carregar_nativo(self.caminho)
+            elif cache_valido(self.caminho):
+                self.progresso.emit(10, 'Lendo cache nativo...')
+                secoes = carregar_nativo(caminho_cache(self.caminho))
+            if secoes is not None:
+                self._carregar_secoes(secoes)
+                return
+            self.progresso.emit(5, 'Gerando prévia...')
+            previa = ler_previa_stl(self.caminho)
+            if previa is not None:
+                self._emitir_previa(*previa)
+            self.progresso.emit(15, 'Lendo arquivo...')
+            mesh, poligonos = ler_malha(self.caminho)
+            if previa is None:
+                self._emitir_previa(*subamostrar_faces(mesh.vertices, mesh.faces))
+            self.progresso.emit(50, 'Processando malha...')
+            # Tentar processar e corrigir problemas leves; os polígonos só ficam se os vértices não mudaram
+            poligonos, aviso = processar_malha(mesh, poligonos)
+            # O cache guarda a malha do arquivo (só processada), antes de centralizar e reordenar:
+            # o CLI, o serviço e o relatório em lote o leem no lugar do arquivo (servico.ler_entrada).
+            # Calculado numa cópia leve para não mexer no cache da malha em uso pela GUI
+            self.progresso.emit(60, 'Gravando cache nativo...')
+            copia = trimesh.Trimesh(vertices=mesh.vertices, faces=mesh.faces, process=False)
+            salvar_cache(self.caminho, copia, poligonos)
+            self._preparar(mesh, poligonos, aviso)
+        except Exception as e:
+            self.falhou.emit(str(e))
+
+    def _carregar_secoes(self, secoes):
+        mesh, poligonos = malha_de_secoes(secoes)
+        self._emitir_previa(*subamostrar_faces(mesh.vertices, mesh.faces))
+        self._preparar(mesh, poligonos, '', secoes)
+
+    def _preparar(self, mesh, poligonos, aviso, secoes=None):
+        """Centraliza (e reordena, se pedido) a malha lida e emite malha e análise"""
+        # Único ponto que centraliza: as operações mantêm este referencial (o mapa de desvio depende disso)
+        mesh = centralizar_na_origem(mesh)
+        if self.reordenar:
+            self.progresso.emit(70, 'Reordenando vértices e faces...')
+            mesh, info = reordenar(mesh, no_lugar=True)
+            if poligonos is not None:
+                poligonos = reordenar_poligonos(poligonos, info['ordem_vertices'], mesh.vertices)
+        elif secoes is not None:
+            # Mover os vértices limpa o cache do trimesh; a topologia gravada continua valendo
+            restaurar_topologia(mesh, secoes)
+        self.malha_pronta.emit(mesh, poligonos, aviso)
+        self.progresso.emit(80, 'Analisando malha...')
+        self.analise_pronta.emit(AnaliseIncremental(mesh))
+        self.progresso.emit(100, 'Concluído')
+
+    def _emitir_previa(self, vertices, faces):
+        previa = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        self.previa_pronta.emit(centralizar_na_origem(previa))
+
+
+class TarefaSegundoPlano(QThread):
+    """Executa funcao(progresso) numa thread; progresso(valor, texto) vira sinal para a GUI.
+
+    cancelar() aciona o evento `cancelamento`; quem o recebe (execucao_isolada)
+    mata o subprocesso e levanta InterruptedError, que vira o sinal cancelada.
+    """
+    progresso = pyqtSignal(int, str)
+    concluida = pyqtSignal(object)
+    falhou = pyqtSignal(str)
+    cancelada = pyqtSignal()
+
+    def __init__(self, funcao, parent=None):
+        super().__init__(parent)
+        self.funcao = funcao
+        self.cancelamento = threading.Event()
+
+    def cancelar(self):
+        self.cancelamento.set()
+
+    def run(self):
+        try:
+            self.concluida.emit(self.funcao(self.progresso.emit))
+        except InterruptedError:
+            self.cancelada.emit()
+        except Exception as e:
+            self.falhou.emit(str(e))
 
 
 class MeshRepairApp(QMainWindow):
@@ -45,8 +170,21 @@ class MeshRepairApp(QMainWindow):
         # Configuração da paleta de cores
         self.setup_color_palette()
         
-        self.mesh_original = None
-        self.mesh_reparada = None
+        self._mesh_original = None
+        # Índice de proximidade da original (transferência de normais/atributos), criado sob demanda
+        self._indice_original = None
+        self._mesh_reparada = None
+        # Contadores incrementais da análise de cada malha
+        self.analise_original = None
+        self.analise_reparada = None
+        # Topologia poligonal (quads/n-gons) do arquivo e da malha reparada
+        self.poligonos_original = None
+        self.poligonos_reparada = None
+        # Cenas multi-corpo (None quando o arquivo é tratado como malha única) e itens de render por corpo
+        self.cena_original = None
+        self.cena_reparada = None
+        self.itens_original = {}
+        self.itens_reparada = {}
         
         # Widgets centrais
         central_widget = QWidget()
@@ -76,6 +214,34 @@ class MeshRepairApp(QMainWindow):
         # Aplicar estilos finais
         self.apply_final_styles()
 
+    @property
+    def mesh_original(self):
+        return self._mesh_original
+
+    @mesh_original.setter
+    def mesh_original(self, mesh):
+        # O índice espacial só vale para a malha com que foi construído
+        self._mesh_original = mesh
+        self._indice_original = None
+
+    def indice_original(self):
+        """Índice de ponto mais próximo da malha original, reaproveitado enquanto ela não mudar"""
+        if self._indice_original is None:
+            from proximidade import IndiceProximidade
+            self._indice_original = IndiceProximidade(self.mesh_original.vertices, self.mesh_original.faces,
+                                                      compacto=MODO_COMPACTO)
+        return self._indice_original
+
+    @property
+    def mesh_reparada(self):
+        return self._mesh_reparada
+
+    @mesh_reparada.setter
+    def mesh_reparada(self, mesh):
+        # Operações de malha única substituem a malha inteira: a cena reparada deixa de valer
+        self._mesh_reparada = mesh
+        self.cena_reparada = None
+
     def get_modern_stylesheet(self):
         """Retorna um stylesheet moderno para a interface"""
         return """
@@ -192,6 +358,20 @@ class MeshRepairApp(QMainWindow):
             color: #4a90e2;
         }
         
+        QProgressBar {
+            background-color: #1e1e1e;
+            border: 1px solid #4a90e2;
+            border-radius: 5px;
+            color: #ffffff;
+            text-align: center;
+            min-height: 16px;
+        }
+        
+        QProgressBar::chunk {
+            background-color: #4a90e2;
+            border-radius: 4px;
+        }
+        
         QFrame[class="separator"] {
             background-color: #4a90e2;
             border: none;
@@ -428,6 +608,20 @@ class MeshRepairApp(QMainWindow):
         """)
         main_layout.addWidget(self.status_bar)
         
+        # Barra de progresso do carregamento em segundo plano
+        self.barra_progresso = QProgressBar()
+        self.barra_progresso.setRange(0, 100)
+        self.barra_progresso.setTextVisible(True)
+        self.barra_progresso.setVisible(False)
+        linha_progresso = QHBoxLayout()
+        linha_progresso.addWidget(self.barra_progresso)
+        # Cancela a operação em segundo plano: o subprocesso do MeshFix/MeshLab é morto
+        self.btn_cancelar = QPushButton('Cancelar')
+        self.btn_cancelar.setVisible(False)
+        self.btn_cancelar.clicked.connect(self._cancelar_tarefa)
+        linha_progresso.addWidget(self.btn_cancelar)
+        main_layout.addLayout(linha_progresso)
+        
         # Configurar o layout principal
         central_widget.setLayout(main_layout)
 
@@ -538,6 +732,10 @@ class MeshRepairApp(QMainWindow):
         self.action_remove_interior.triggered.connect(self.remover_faces_interiores)
         self.menu_malha.addAction(self.action_remove_interior)
         
+        self.action_resolver_intersecoes = QAction('✂️ Resolver Autointerseções', self)
+        self.action_resolver_intersecoes.triggered.connect(self.resolver_intersecoes)
+        self.menu_malha.addAction(self.action_resolver_intersecoes)
+        
         self.action_weld_vertices = QAction('🔗 Soldar Vértices / Colapsar Arestas', self)
         self.action_weld_vertices.triggered.connect(self.weld_vertices_dialog)
         self.menu_malha.addAction(self.action_weld_vertices)
@@ -557,6 +755,44 @@ class MeshRepairApp(QMainWindow):
         self.action_mesh_stats.triggered.connect(self.estatisticas_malha_dialog)
         self.menu_verificacoes.addAction(self.action_mesh_stats)
         
+        self.action_mapa_desvio = QAction('📏 Mapa de Desvio (Original × Reparada)', self)
+        self.action_mapa_desvio.setCheckable(True)
+        self.action_mapa_desvio.toggled.connect(self.alternar_mapa_desvio)
+        self.menu_verificacoes.addAction(self.action_mapa_desvio)
+        
+        # Menu Cena (vários corpos)
+        self.menu_cena = self.menu_bar.addMenu('🧩 Cena')
+        
+        self.action_abrir_cena = QAction('📂 Abrir como Cena (Multi-Corpo)', self)
+        self.action_abrir_cena.triggered.connect(self.abrir_cena)
+        self.menu_cena.addAction(self.action_abrir_cena)
+        
+        self.action_separar_corpos = QAction('🧩 Separar Componentes em Corpos', self)
+        self.action_separar_corpos.triggered.connect(self.separar_componentes)
+        self.menu_cena.addAction(self.action_separar_corpos)
+        
+        self.action_selecionar_corpos = QAction('☑️ Selecionar Corpos...', self)
+        self.action_selecionar_corpos.triggered.connect(self.selecionar_corpos)
+        self.menu_cena.addAction(self.action_selecionar_corpos)
+        
+        self.menu_cena.addSeparator()
+        
+        self.action_cena_reparar = QAction('🔧 Reparar Corpos Selecionados', self)
+        self.action_cena_reparar.triggered.connect(lambda: self.operar_cena('reparar', 'Reparar corpos'))
+        self.menu_cena.addAction(self.action_cena_reparar)
+        
+        self.action_cena_decimate = QAction('📉 Simplificar Corpos Selecionados', self)
+        self.action_cena_decimate.triggered.connect(self.simplificar_cena_dialog)
+        self.menu_cena.addAction(self.action_cena_decimate)
+        
+        self.action_cena_normais = QAction('⬆️ Recalcular Normais dos Corpos Selecionados', self)
+        self.action_cena_normais.triggered.connect(lambda: self.operar_cena('recalcular_normais', 'Recalcular normais'))
+        self.menu_cena.addAction(self.action_cena_normais)
+        
+        self.action_cena_stats = QAction('📊 Estatísticas por Corpo', self)
+        self.action_cena_stats.triggered.connect(lambda: self.operar_cena('estatisticas', 'Estatísticas por corpo'))
+        self.menu_cena.addAction(self.action_cena_stats)
+        
         # Menu Visualização
         self.menu_visualizacao = self.menu_bar.addMenu('👁️ Visualização')
         
@@ -583,6 +819,21 @@ class MeshRepairApp(QMainWindow):
         self.action_exportar_atributos.triggered.connect(self.exportar_atributos_pymeshlab)
         self.menu_ferramentas.addAction(self.action_exportar_atributos)
         
+        self.menu_ferramentas.addSeparator()
+        
+        self.action_reordenar_localidade = QAction('🧭 Reordenar Vértices/Faces ao Carregar e ao Mudar Topologia', self)
+        self.action_reordenar_localidade.setCheckable(True)
+        self.menu_ferramentas.addAction(self.action_reordenar_localidade)
+        
+        self.action_modo_compacto = QAction('🗜️ Modo Compacto (float32/int32)', self)
+        self.action_modo_compacto.setCheckable(True)
+        self.action_modo_compacto.toggled.connect(self.alternar_modo_compacto)
+        self.menu_ferramentas.addAction(self.action_modo_compacto)
+        
+        self.action_medir_localidade = QAction('⏱️ Reordenar Agora e Medir (Antes × Depois)', self)
+        self.action_medir_localidade.triggered.connect(self.medir_reordenacao)
+        self.menu_ferramentas.addAction(self.action_medir_localidade)
+        
         # Habilitar/desabilitar ações conforme contexto
         self.disable_all_actions()
         
@@ -591,6 +842,8 @@ class MeshRepairApp(QMainWindow):
         self.action_listar_metodos.setEnabled(True)
         self.action_exportar_metodos.setEnabled(True)
         self.action_exportar_atributos.setEnabled(True)
+        self.action_reordenar_localidade.setEnabled(True)
+        self.action_modo_compacto.setEnabled(True)
 
     def disable_all_actions(self):
         """Desabilita todas as ações que dependem de malha carregada"""
@@ -602,8 +855,9 @@ class MeshRepairApp(QMainWindow):
             self.action_auto_retopo, self.action_shade_smooth, self.action_shade_flat,
             self.action_auto_smooth, self.action_transfer_normals, self.action_weighted_normals,
             self.action_split_normals, self.action_mesh_cleanup, self.action_edge_split,
-            self.action_remove_interior, self.action_weld_vertices, self.action_subdivision,
-            self.action_solidify, self.action_mesh_stats, self.action_reset_reparada
+            self.action_remove_interior, self.action_resolver_intersecoes, self.action_weld_vertices, self.action_subdivision,
+            self.action_solidify, self.action_mesh_stats, self.action_reset_reparada,
+            self.action_medir_localidade
         ]
         
         for action in actions_to_disable:
@@ -620,8 +874,9 @@ class MeshRepairApp(QMainWindow):
             self.action_auto_retopo, self.action_shade_smooth, self.action_shade_flat,
             self.action_auto_smooth, self.action_transfer_normals, self.action_weighted_normals,
             self.action_split_normals, self.action_mesh_cleanup, self.action_edge_split,
-            self.action_remove_interior, self.action_weld_vertices, self.action_subdivision,
-            self.action_solidify, self.action_mesh_stats, self.action_reset_reparada
+            self.action_remove_interior, self.action_resolver_intersecoes, self.action_weld_vertices, self.action_subdivision,
+            self.action_solidify, self.action_mesh_stats, self.action_reset_reparada,
+            self.action_medir_localidade
         ]
         
         for action in actions_to_enable:
@@ -681,98 +936,314 @@ class MeshRepairApp(QMainWindow):
         """)
 
     def abrir_arquivo(self):
-        from PyQt5.QtWidgets import QMessageBox
-        fname, _ = QFileDialog.getOpenFileName(self, 'Abrir arquivo STL/OBJ', '', 'Malhas 3D (*.stl *.obj)')
+        fname, _ = QFileDialog.getOpenFileName(self, 'Abrir arquivo STL/OBJ', '', 'Malhas 3D (*.stl *.obj *.md3d)')
         if fname:
             self.update_status_bar('🔄 Carregando arquivo...', 'info')
-            mesh = trimesh.load(fname, process=False)
-            # Tentar processar e corrigir problemas leves
-            try:
-                mesh.process(validate=True)
-            except Exception as e:
-                QMessageBox.warning(self, 'Aviso', f'Problemas ao processar a malha original.\n{e}')
-                self.update_status_bar('⚠️ Problemas detectados na malha original', 'warning')
-            mesh = centralizar_na_origem(mesh)
-            self.mesh_original = mesh
+            self.barra_progresso.setValue(0)
+            self.barra_progresso.setVisible(True)
+            self.btn_abrir.setEnabled(False)
+            self.btn_reparar.setEnabled(False)
+            self.btn_salvar.setEnabled(False)
+            self.disable_all_actions()
             self.gl_original.clear()
             self.gl_reparada.clear()
-            try:
-                item = create_glmeshitem(self.mesh_original, color=(0.1, 0.3, 1, 1))  # azul mais forte
-                self.gl_original.addItem(item)
-                self.update_status_bar(f'✅ Arquivo carregado: {len(mesh.vertices)} vértices, {len(mesh.faces)} faces', 'success')
-            except Exception as e:
-                QMessageBox.warning(self, 'Erro ao Renderizar', f'Não foi possível renderizar a malha original.\nA malha pode estar corrompida ou precisar de reparo.\n{e}')
-                self.update_status_bar('❌ Erro ao renderizar malha', 'error')
-            self.highlight_holes(self.mesh_original)
-            self.highlight_nonmanifold_faces(self.mesh_original)
-            self.analisar_malha(self.mesh_original, self.label_analise)
+            self.label_analise.setText('')
             self.label_analise_reparada.setText('')
-            self.mesh_reparada = None
-            self.btn_reparar.setEnabled(True)
-            self.btn_salvar.setEnabled(False)
-            self.disable_all_actions()
-            self.action_reset_original.setEnabled(True)
-            self.centralizar_camera(self.gl_original, self.mesh_original)
-            self.centralizar_camera(self.gl_reparada, self.mesh_original)
+            # Leitura, processamento e análise rodam numa thread; a GUI recebe cada etapa pronta
+            self.carregador = CarregadorMalha(fname, reordenar=self.action_reordenar_localidade.isChecked())
+            self.carregador.progresso.connect(self._progresso_carregamento)
+            self.carregador.previa_pronta.connect(self._previa_carregada)
+            self.carregador.malha_pronta.connect(self._malha_carregada)
+            self.carregador.analise_pronta.connect(self._analise_carregada)
+            self.carregador.falhou.connect(self._carregamento_falhou)
+            self.carregador.start()
+
+    def _progresso_carregamento(self, valor, texto):
+        self.barra_progresso.setValue(valor)
+        self.update_status_bar(f'🔄 {texto}', 'info')
+
+    def _previa_carregada(self, previa):
+        # Prévia subamostrada enquanto a malha completa ainda está sendo lida
+        self.gl_original.clear()
+        self.gl_original.addItem(create_glmeshitem(previa, color=(0.4, 0.55, 1, 1), draw_edges=False))
+        self.centralizar_camera(self.gl_original, previa)
+
+    def _malha_carregada(self, mesh, poligonos, aviso):
+        from PyQt5.QtWidgets import QMessageBox
+        if aviso:
+            QMessageBox.warning(self, 'Aviso', f'Problemas ao processar a malha original.\n{aviso}')
+            self.update_status_bar('⚠️ Problemas detectados na malha original', 'warning')
+        self.mesh_original = mesh
+        self.cena_original = None
+        # Topologia poligonal do arquivo (só chega se o process não mexeu nos vértices), válida
+        # enquanto os vértices não forem reindexados; passa a usar os vértices centralizados
+        self.poligonos_original = poligonos
+        if poligonos is not None:
+            poligonos.vertices = np.asarray(mesh.vertices)
+        self.gl_original.clear()
+        self.gl_reparada.clear()
+        try:
+            item = create_glmeshitem(self.mesh_original, color=(0.1, 0.3, 1, 1))  # azul mais forte
+            self.gl_original.addItem(item)
+        except Exception as e:
+            QMessageBox.warning(self, 'Erro ao Renderizar', f'Não foi possível renderizar a malha original.\nA malha pode estar corrompida ou precisar de reparo.\n{e}')
+            self.update_status_bar('❌ Erro ao renderizar malha', 'error')
+        self.label_analise_reparada.setText('')
+        self.mesh_reparada = None
+        self.analise_reparada = None
+        self.btn_reparar.setEnabled(True)
+        self.action_reset_original.setEnabled(True)
+        self.centralizar_camera(self.gl_original, self.mesh_original)
+        self.centralizar_camera(self.gl_reparada, self.mesh_original)
+
+    def _analise_carregada(self, analise):
+        self.highlight_holes(self.mesh_original, analise)
+        self.highlight_nonmanifold_faces(self.mesh_original, analise)
+        self.analisar_malha(self.mesh_original, self.label_analise, analise)
+        self.barra_progresso.setVisible(False)
+        self.btn_abrir.setEnabled(True)
+        mesh = self.mesh_original
+        self.update_status_bar(f'✅ Arquivo carregado: {len(mesh.vertices)} vértices, {len(mesh.faces)} faces', 'success')
 
-    def highlight_holes(self, mesh):
-        # Encontra arestas abertas (buracos)
-        if not hasattr(mesh, 'edges_open'):
+    def _carregamento_falhou(self, mensagem):
+        from PyQt5.QtWidgets import QMessageBox
+        self.barra_progresso.setVisible(False)
+        self.btn_abrir.setEnabled(True)
+        self.btn_reparar.setEnabled(self.mesh_original is not None)
+        QMessageBox.warning(self, 'Erro ao Carregar', f'Não foi possível carregar o arquivo.\n{mensagem}')
+        self.update_status_bar('❌ Erro ao carregar arquivo', 'error')
+
+    def abrir_cena(self):
+        fname, _ = QFileDialog.getOpenFileName(self, 'Abrir Cena', '', 'Cenas 3D (*.obj *.glb *.gltf *.3mf *.ply *.stl *.dae)')
+        if not fname:
+            return
+        # Cancelar só descarta o resultado: a leitura do trimesh não tem como ser interrompida
+        def trabalho(cancelamento):
+            cena = Cena.carregar(fname)
+            if cancelamento.is_set():
+                raise InterruptedError
+            return cena
+
+        self._operar_cancelavel('Carregando cena', trabalho, self._definir_cena_original,
+                                erro=('Erro ao Carregar', 'Não foi possível carregar a cena.'))
+
+    def separar_componentes(self):
+        if self.mesh_original is None:
+            return
+        min_faces, ok = QInputDialog.getInt(self, 'Separar Componentes', 'Mínimo de faces por corpo:', 1, 1, 1000000, 1)
+        if not ok:
             return
-        open_edges = mesh.edges_open
+        try:
+            self._definir_cena_original(Cena.de_componentes(self.mesh_original, min_faces))
+        except Exception as e:
+            QMessageBox.warning(self, 'Erro ao Separar', f'Não foi possível separar os corpos.\n{e}')
+
+    def _definir_cena_original(self, cena):
+        cena.centralizar()
+        self.mesh_original = cena.malha_combinada()
+        self.cena_original = cena
+        self.poligonos_original = None
+        self.analise_original = None
+        self.mesh_reparada = None
+        self.analise_reparada = None
+        self._desenhar_cena(self.gl_original, cena, self.itens_original)
+        self.gl_reparada.clear()
+        self.itens_reparada.clear()
+        self.label_analise_reparada.setText('')
+        analise = AnaliseIncremental(self.mesh_original)
+        self.highlight_holes(self.mesh_original, analise)
+        self.analisar_malha(self.mesh_original, self.label_analise, analise)
+        self.btn_reparar.setEnabled(True)
+        self.action_reset_original.setEnabled(True)
+        self.centralizar_camera(self.gl_original, self.mesh_original)
+        self.centralizar_camera(self.gl_reparada, self.mesh_original)
+        self.update_status_bar(f'🧩 Cena com {len(cena)} corpos, {len(self.mesh_original.faces)} faces', 'success')
+
+    def _desenhar_cena(self, gl_widget, cena, itens, indices=None):
+        """Um item de render por corpo; com indices, só os itens desses corpos são refeitos"""
+        if indices is None:
+            gl_widget.clear()
+            itens.clear()
+            indices = range(len(cena))
+        # Com muitos corpos as arestas viram ruído visual e custam desenho
+        arestas = len(cena) <= 50
+        for i in indices:
+            if i in itens:
+                gl_widget.removeItem(itens[i])
+            itens[i] = create_glmeshitem(cena.corpos[i].mesh, color=CORES_CORPOS[i % len(CORES_CORPOS)], draw_edges=arestas)
+            gl_widget.addItem(itens[i])
+
+    def selecionar_corpos(self):
+        from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QListWidget, QListWidgetItem
+        if self.cena_original is None:
+            self.update_status_bar('ℹ️ Abra uma cena ou separe os componentes em corpos primeiro', 'info')
+            return
+        cena = self.cena_reparada or self.cena_original
+        dialogo = QDialog(self)
+        dialogo.setWindowTitle('Selecionar Corpos')
+        layout = QVBoxLayout(dialogo)
+        lista = QListWidget()
+        for corpo in cena.corpos:
+            item = QListWidgetItem(f'{corpo.nome} ({len(corpo.mesh.faces)} faces)')
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if corpo.selecionado else Qt.Unchecked)
+            lista.addItem(item)
+        layout.addWidget(lista)
+        botoes = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        botoes.accepted.connect(dialogo.accept)
+        botoes.rejected.connect(dialogo.reject)
+        layout.addWidget(botoes)
+        if dialogo.exec_() != QDialog.Accepted:
+            return
+        for i in range(lista.count()):
+            marcado = lista.item(i).checkState() == Qt.Checked
+            for c in (self.cena_original, self.cena_reparada):
+                if c is not None:
+                    c.corpos[i].selecionado = marcado
+
+    def simplificar_cena_dialog(self):
+        fator, ok = QInputDialog.getDouble(self, 'Simplificar Corpos', 'Fator de redução (0.0 a 1.0):', 0.5, 0.01, 1.0, 2)
+        if ok:
+            self.operar_cena('simplificar', 'Simplificar corpos', fator=fator)
+
+    def operar_cena(self, nome, titulo, **parametros):
+        """Aplica a operação aos corpos selecionados num pool de workers, fora da thread da GUI"""
+        if self.cena_original is None:
+            self.update_status_bar('ℹ️ Abra uma cena ou separe os componentes em corpos primeiro', 'info')
+            return
+        # Cópia rasa: os corpos não tocados continuam compartilhando a malha (e o item de render)
+        cena = (self.cena_reparada or self.cena_original).copy(malhas=False)
+        indices = cena.selecionados()
+        if not indices:
+            self.update_status_bar('ℹ️ Nenhum corpo selecionado', 'info')
+            return
+
+        def trabalho(cancelamento, progresso):
+            def ao_terminar_corpo(i, concluidos, total):
+                progresso(int(100 * concluidos / total), f'{titulo}: {concluidos}/{total} corpos')
+            infos, erros = cena.aplicar(nome, indices, ao_terminar_corpo=ao_terminar_corpo,
+                                        cancelar=cancelamento, **parametros)
+            return cena, infos, erros
+
+        self._operar_cancelavel(titulo, trabalho, lambda resultado: self._cena_operada(resultado, titulo, nome),
+                                erro=(titulo, 'Não foi possível processar os corpos.'), progresso=True)
+
+    def _cena_operada(self, resultado, titulo, nome):
+        cena, infos, erros = resultado
+        if nome == 'estatisticas':
+            linhas = [f"{cena.corpos[i].nome}: {info['vertices']} vértices, {info['faces']} faces, "
+                      f"{'fechado' if info['watertight'] else str(info['arestas_abertas']) + ' arestas abertas'}, "
+                      f"área {info['area']:.3f}" + (f", volume {info['volume']:.3f}" if 'volume' in info else '')
+                      for i, info in sorted(infos.items())]
+            caixa = QMessageBox(self)
+            caixa.setWindowTitle(titulo)
+            fechados = sum(info['watertight'] for info in infos.values())
+            caixa.setText(f'{len(infos)} corpos analisados, {fechados} fechados (watertight).')
+            caixa.setDetailedText('\n'.join(linhas))
+            caixa.exec_()
+            self.update_status_bar(f'📊 {titulo}: {len(infos)} corpos', 'success')
+            return
+        primeira = self.cena_reparada is None
+        self.mesh_reparada = cena.malha_combinada()
+        self.cena_reparada = cena
+        self.analise_reparada = None
+        # O mapa de desvio desenha a cena como uma malha só: aí os itens por corpo são refeitos todos
+        parcial = not primeira and not self.action_mapa_desvio.isChecked()
+        self._desenhar_cena(self.gl_reparada, cena, self.itens_reparada, sorted(infos) if parcial else None)
+        self.analisar_malha(self.mesh_reparada, self.label_analise_reparada)
+        self.btn_salvar.setEnabled(True)
+        self.enable_all_actions()
+        if primeira:
+            self.centralizar_camera(self.gl_reparada, self.mesh_reparada)
+        if erros:
+            detalhes = '\n'.join(f'{cena.corpos[i].nome}: {erro}' for i, erro in sorted(erros.items())[:20])
+            QMessageBox.warning(self, titulo, f'{len(erros)} corpo(s) falharam e ficaram como estavam:\n{detalhes}')
+        self.update_status_bar(f'✅ {titulo}: {len(infos)} corpos processados, {len(erros)} com erro', 'success')
+
+    def highlight_holes(self, mesh, analise=None):
+        # Encontra arestas abertas (buracos)
+        if analise is None:
+            analise = AnaliseIncremental(mesh)
+        open_edges = analise.arestas_abertas()
         if open_edges.shape[0] == 0:
             return  # Não há buracos
-        for edge in open_edges:
-            v0, v1 = mesh.vertices[edge[0]], mesh.vertices[edge[1]]
-            pts = np.array([v0, v1])
-            line = GLLinePlotItem(pos=pts, color=(1,0,0,1), width=6, antialias=True, mode='lines')
-            self.gl_original.addItem(line)
+        # Um único item com todos os segmentos (modo 'lines')
+        pts = np.asarray(mesh.vertices)[open_edges].reshape(-1, 3)
+        line = GLLinePlotItem(pos=pts, color=(1,0,0,1), width=6, antialias=True, mode='lines')
+        self.gl_original.addItem(line)
 
-    def highlight_nonmanifold_faces(self, mesh):
+    def highlight_nonmanifold_faces(self, mesh, analise=None):
         # Destaca faces não-manifold em laranja
-        if hasattr(mesh, 'faces_nonmanifold') and len(mesh.faces_nonmanifold) > 0:
-            faces_idx = mesh.faces_nonmanifold
-            vertices = mesh.vertices
-            for face in faces_idx:
-                pts = vertices[mesh.faces[face]]
-                # Fechar o triângulo para desenhar
-                pts = np.vstack([pts, pts[0]])
-                line = GLLinePlotItem(pos=pts, color=(1,0.5,0,1), width=4, antialias=True, mode='line_strip')
-                self.gl_original.addItem(line)
-
-    def analisar_malha(self, mesh, label):
-        n_vertices = len(mesh.vertices)
-        n_faces = len(mesh.faces)
-        n_buracos = len(mesh.edges_open) if hasattr(mesh, 'edges_open') else 0
-        watertight = mesh.is_watertight
-        n_nonmanifold = len(mesh.faces_nonmanifold) if hasattr(mesh, 'faces_nonmanifold') else 0
-        n_duplicados = len(mesh.vertices) - len(np.unique(mesh.vertices, axis=0))
+        if analise is None:
+            analise = AnaliseIncremental(mesh)
+        faces_idx = analise.faces_nao_manifold(mesh.faces)
+        if len(faces_idx) > 0:
+            tris = np.asarray(mesh.vertices)[np.asarray(mesh.faces)[faces_idx]]
+            # Três segmentos por triângulo, desenhados num único item
+            pts = tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 3)
+            line = GLLinePlotItem(pos=pts, color=(1,0.5,0,1), width=4, antialias=True, mode='lines')
+            self.gl_original.addItem(line)
+
+    def analisar_malha(self, mesh, label, analise=None):
+        # Sem análise incremental informada, recalcula tudo (vetorizado)
+        if analise is None:
+            if (label is self.label_analise_reparada and mesh is self.mesh_reparada and self.cena_reparada is None
+                    and self.action_reordenar_localidade.isChecked()):
+                # Topologia nova (sem análise incremental): reordena antes que os contadores guardem índices
+                self.reordenar_reparada()
+            analise = AnaliseIncremental(mesh)
+        if label is self.label_analise:
+            self.analise_original = analise
+        elif label is self.label_analise_reparada:
+            self.analise_reparada = analise
+            if self.action_mapa_desvio.isChecked() and mesh is self.mesh_reparada:
+                # Toda operação termina aqui: o mapa de desvio acompanha a malha reparada
+                self.atualizar_mapa_desvio()
         texto = f"<b>Análise da Malha:</b><br>"
-        texto += f"Vértices: {n_vertices}<br>"
-        texto += f"Faces: {n_faces}<br>"
-        texto += f"Buracos (arestas abertas): {n_buracos}<br>"
-        texto += f"Watertight: {'Sim' if watertight else 'Não'}<br>"
-        texto += f"Faces não-manifold: {n_nonmanifold}<br>"
-        texto += f"Vértices duplicados: {n_duplicados}<br>"
+        texto += f"Vértices: {analise.n_vertices}<br>"
+        texto += f"Faces: {analise.n_faces}<br>"
+        texto += f"Buracos (arestas abertas): {analise.n_arestas_abertas}<br>"
+        texto += f"Watertight: {'Sim' if analise.watertight else 'Não'}<br>"
+        texto += f"Arestas não-manifold: {analise.n_arestas_nao_manifold}<br>"
+        texto += f"Vértices duplicados: {analise.n_duplicados}<br>"
         label.setText(texto)
 
+    def atualizar_analise_reparada(self, mesh, faces_removidas=None, faces_adicionadas=None, vertices_adicionados=None):
+        """Atualiza a análise da malha reparada só com as faces/vértices alterados pela operação"""
+        analise = self.analise_reparada
+        if analise is None:
+            self.analisar_malha(mesh, self.label_analise_reparada)
+            return
+        if vertices_adicionados is not None:
+            analise.adicionar_vertices(vertices_adicionados)
+        if faces_removidas is not None:
+            analise.remover_faces(faces_removidas)
+        if faces_adicionadas is not None:
+            analise.adicionar_faces(faces_adicionadas)
+        self.analisar_malha(mesh, self.label_analise_reparada, analise)
+
     def reparar_malha(self):
         if self.mesh_original is None:
             return
+        if self.cena_original is not None:
+            # Cena: cada corpo é reparado separadamente, em paralelo
+            self.operar_cena('reparar', 'Reparar corpos')
+            return
+        mesh = self.mesh_original
+        if mesh.is_watertight:
+            self.update_status_bar('ℹ️ Malha já está fechada (watertight)', 'info')
+            # Mesma ordem de vértices: a topologia poligonal do arquivo continua válida
+            self._malha_reparada(mesh.copy(), self.poligonos_original)
+            return
+        # Primeiro remenda os buracos localmente; o MeshFix global só entra se ainda não fechou
+        self._operar_cancelavel('Reparo', lambda cancelamento: operacoes.reparar(mesh, cancelar=cancelamento)[0],
+                                lambda mesh_reparada: self._malha_reparada(mesh_reparada, None),
+                                ('Erro ao Reparar', 'Não foi possível reparar a malha.'))
+
+    def _malha_reparada(self, mesh_reparada, poligonos):
         try:
-            self.update_status_bar('🔧 Reparando malha...', 'info')
-            mesh = self.mesh_original
-            if mesh.is_watertight:
-                mesh_reparada = mesh.copy()
-                self.update_status_bar('ℹ️ Malha já está fechada (watertight)', 'info')
-            else:
-                meshfix = pymeshfix.MeshFix(mesh.vertices, mesh.faces)
-                meshfix.repair(verbose=True)
-                mesh_reparada = trimesh.Trimesh(vertices=meshfix.v, faces=meshfix.f)
-                self.update_status_bar('🔧 Aplicando reparos automáticos...', 'info')
-            
-            mesh_reparada = centralizar_na_origem(mesh_reparada)
             self.mesh_reparada = mesh_reparada
+            self.poligonos_reparada = (poligonos, mesh_reparada) if poligonos is not None else None
             self.gl_reparada.clear()
             item = create_glmeshitem(mesh_reparada, color=(0.1, 0.8, 0.1, 1))  # verde mais forte
             self.gl_reparada.addItem(item)
@@ -790,12 +1261,139 @@ class MeshRepairApp(QMainWindow):
             QMessageBox.warning(self, 'Erro ao Reparar', f'Não foi possível reparar a malha.\n{e}')
             self.update_status_bar('❌ Erro ao reparar malha', 'error')
 
+    def _operar_cancelavel(self, titulo, trabalho, ao_concluir, erro, progresso=False):
+        """trabalho(cancelamento) fora da thread da GUI, com barra ocupada e botão Cancelar.
+
+        MeshFix e pymeshlab podem levar minutos; a janela continua respondendo e
+        Cancelar mata o subprocesso. O resultado vai para ao_concluir e uma falha
+        vira o aviso erro = (título, texto). Com progresso, a chamada é
+        trabalho(cancelamento, progresso) e a barra mostra o percentual.
+        """
+        if progresso:
+            tarefa = TarefaSegundoPlano(lambda emitir: trabalho(tarefa.cancelamento, emitir), self)
+            tarefa.progresso.connect(self._progresso_carregamento)
+        else:
+            tarefa = TarefaSegundoPlano(lambda emitir: trabalho(tarefa.cancelamento), self)
+        tarefa.concluida.connect(lambda resultado: (self._fim_cancelavel(), ao_concluir(resultado)))
+        tarefa.falhou.connect(lambda mensagem: self._cancelavel_falhou(erro, mensagem))
+        tarefa.cancelada.connect(lambda: self._cancelavel_cancelado(titulo))
+        # Uma operação por vez: o menu volta quando esta terminar
+        self.menu_bar.setEnabled(False)
+        self.btn_reparar.setEnabled(False)
+        self.barra_progresso.setRange(0, 100 if progresso else 0)
+        self.barra_progresso.setValue(0)
+        self.barra_progresso.setVisible(True)
+        self.btn_cancelar.setEnabled(True)
+        self.btn_cancelar.setVisible(True)
+        self.update_status_bar(f'🔄 {titulo}...', 'info')
+        self.tarefa = tarefa
+        tarefa.start()
+
+    def _cancelar_tarefa(self):
+        self.btn_cancelar.setEnabled(False)
+        self.update_status_bar('⏳ Cancelando...', 'warning')
+        self.tarefa.cancelar()
+
+    def _fim_cancelavel(self):
+        self.barra_progresso.setRange(0, 100)
+        self.barra_progresso.setVisible(False)
+        self.btn_cancelar.setVisible(False)
+        self.menu_bar.setEnabled(True)
+        self.btn_reparar.setEnabled(self.mesh_original is not None)
+
+    def _cancelavel_falhou(self, erro, mensagem):
+        self._fim_cancelavel()
+        titulo, texto = erro
+        QMessageBox.warning(self, titulo, f'{texto}\n{mensagem}')
+        self.update_status_bar(f'❌ {titulo}', 'error')
+
+    def _cancelavel_cancelado(self, titulo):
+        self._fim_cancelavel()
+        self.update_status_bar(f'⛔ {titulo} cancelado', 'warning')
+
+    def _mostrar_reparada(self, mesh):
+        """Resultado de uma operação em segundo plano vira a malha reparada (no referencial da original)"""
+        self.mesh_reparada = mesh
+        self.gl_reparada.clear()
+        self.gl_reparada.addItem(create_glmeshitem(mesh, color=(0.1, 0.8, 0.1, 1)))
+        self.analisar_malha(mesh, self.label_analise_reparada)
+        self.centralizar_camera(self.gl_reparada, mesh)
+
     def salvar_malha(self):
         if self.mesh_reparada is None:
             return
-        fname, _ = QFileDialog.getSaveFileName(self, 'Salvar Malha Reparada', '', 'Malhas 3D (*.stl *.obj)')
-        if fname:
-            self.mesh_reparada.export(fname)
+        fname, _ = QFileDialog.getSaveFileName(
+            self, 'Salvar Malha Reparada', '',
+            'Malhas 3D (*.stl *.obj *.ply);;3MF compactado (*.3mf);;glTF binário (*.glb);;Formato nativo (*.md3d)')
+        if not fname:
+            return
+        poligonos = self.poligonos_atuais()
+        if fname.lower().endswith(EXTENSAO):
+            salvar_nativo(fname, secoes_da_malha(self.mesh_reparada, poligonos))
+            return
+        mesh = self.mesh_reparada
+
+        def trabalho(progresso):
+            def ao_avancar(feitos, total):
+                progresso(int(100 * feitos / max(total, 1)), f'Salvando {os.path.basename(fname)}...')
+            exportar(fname, mesh, ao_avancar=ao_avancar)
+            # Cache nativo ao lado da saída: reabrir o arquivo não precisa de parse
+            salvar_cache(fname, mesh, poligonos)
+            return fname
+
+        # Em segundo plano: a janela continua respondendo enquanto malhas grandes são gravadas
+        self.barra_progresso.setValue(0)
+        self.barra_progresso.setVisible(True)
+        self.tarefa_salvar = TarefaSegundoPlano(trabalho)
+        self.tarefa_salvar.progresso.connect(self._progresso_carregamento)
+        self.tarefa_salvar.concluida.connect(self._malha_salva)
+        self.tarefa_salvar.falhou.connect(self._salvar_falhou)
+        self.tarefa_salvar.start()
+
+    def _malha_salva(self, fname):
+        self.barra_progresso.setVisible(False)
+        self.update_status_bar(f'💾 Malha salva em {fname}', 'success')
+
+    def _salvar_falhou(self, erro):
+        self.barra_progresso.setVisible(False)
+        QMessageBox.warning(self, 'Erro ao Salvar', f'Não foi possível salvar a malha.\n{erro}')
+        self.update_status_bar('❌ Erro ao salvar malha', 'error')
+
+    def verificar_memoria(self, titulo, nome, parametros, reduzir=None):
+        """Compara o pico de memória previsto com a RAM livre; retorna os parâmetros a usar ou None (abortar)"""
+        estimativa = operacoes.estimar_custo(nome, self.mesh_reparada, **parametros)
+        disponivel = memoria_disponivel()
+        if estimativa is None or cabe(estimativa, disponivel):
+            return parametros
+        reduzidos = reduzir() if reduzir else None
+        texto = (f"Esta operação deve gerar ~{estimativa['faces']:,} faces e usar ~{formatar_bytes(estimativa['pico_bytes'])} "
+                 f"de memória, mas só há {formatar_bytes(disponivel)} disponíveis.")
+        caixa = QMessageBox(self)
+        caixa.setIcon(QMessageBox.Warning)
+        caixa.setWindowTitle(titulo)
+        btn_reduzir = None
+        if reduzidos:
+            descricao = ', '.join(f'{chave} = {valor:g}' for chave, valor in reduzidos.items())
+            texto += f"\n\nReduzir para {descricao}?"
+            btn_reduzir = caixa.addButton('Reduzir', QMessageBox.AcceptRole)
+        btn_continuar = caixa.addButton('Continuar assim mesmo', QMessageBox.DestructiveRole)
+        caixa.addButton('Cancelar', QMessageBox.RejectRole)
+        caixa.setText(texto)
+        caixa.exec_()
+        if btn_reduzir is not None and caixa.clickedButton() is btn_reduzir:
+            return reduzidos
+        if caixa.clickedButton() is btn_continuar:
+            return parametros
+        self.update_status_bar(f'⛔ {titulo} cancelado: memória insuficiente', 'warning')
+        return None
+
+    def _reduzir_parametro(self, nome, parametro, candidatos):
+        valor = maior_que_cabe(lambda v: operacoes.estimar_custo(nome, self.mesh_reparada, **{parametro: v}), candidatos)
+        return None if valor is None else {parametro: valor}
+
+    def _reduzir_voxel(self, mesh, voxel_size):
+        tamanho = voxel_que_cabe(mesh.area, len(mesh.faces), voxel_size)
+        return None if tamanho is None else {'tamanho_voxel': round(tamanho, 6)}
 
     def centralizar_camera(self, gl_widget, mesh):
         # Centraliza e ajusta o zoom da câmera para enquadrar a peça
@@ -809,16 +1407,30 @@ class MeshRepairApp(QMainWindow):
     def suavizar_malha(self):
         if self.mesh_reparada is None:
             return
-        # Suavização simples: laplacian smoothing
+        metodos = ['Taubin (preserva volume)', 'HC (Laplaciano corrigido)', 'Laplaciano simples']
+        metodo, ok = QInputDialog.getItem(self, 'Suavizar Malha', 'Método:', metodos, 0, False)
+        if not ok:
+            return
+        pesos, ok = QInputDialog.getItem(self, 'Suavizar Malha', 'Pesos do Laplaciano:', ['Uniforme', 'Cotangente'], 0, False)
+        if not ok:
+            return
+        iteracoes, ok = QInputDialog.getInt(self, 'Suavizar Malha', 'Iterações:', 10, 1, 1000, 1)
+        if not ok:
+            return
+        angulo, ok = QInputDialog.getDouble(self, 'Suavizar Malha', 'Preservar arestas vivas acima de (graus, 0 = não):', 0.0, 0.0, 180.0, 1)
+        if not ok:
+            return
         try:
-            smoothed = self.mesh_reparada.copy()
-            smoothed = trimesh.graph.smooth_shade(smoothed)
+            smoothed, info = operacoes.suavizar(
+                self.mesh_reparada, metodo=('taubin', 'hc', 'laplaciano')[metodos.index(metodo)], iteracoes=iteracoes,
+                pesos=pesos.lower(), angulo_feicao=angulo or None)
             self.mesh_reparada = smoothed
             self.gl_reparada.clear()
             item = create_glmeshitem(smoothed, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
             self.analisar_malha(smoothed, self.label_analise_reparada)
             self.centralizar_camera(self.gl_reparada, smoothed)
+            self.update_status_bar(f"✨ Suavizada: {iteracoes} iterações, {info['vertices_fixos']} vértices fixos", 'success')
         except Exception as e:
             from PyQt5.QtWidgets import QMessageBox
             QMessageBox.warning(self, 'Erro ao Suavizar', f'Não foi possível suavizar a malha.\n{e}')
@@ -833,25 +1445,8 @@ class MeshRepairApp(QMainWindow):
     def remover_duplicados(self, threshold):
         if self.mesh_reparada is None:
             return
-        mesh = self.mesh_reparada.copy()
         try:
-            # Remover vértices duplicados manualmente
-            verts = mesh.vertices
-            faces = mesh.faces
-            tree = cKDTree(verts)
-            groups = tree.query_ball_point(verts, threshold)
-            # Mapear cada vértice para o menor índice do seu grupo
-            mapping = np.arange(len(verts))
-            for i, group in enumerate(groups):
-                min_idx = min(group)
-                mapping[i] = min_idx
-            # Atualizar faces
-            new_faces = mapping[faces]
-            # Remover vértices não usados
-            unique, inverse = np.unique(new_faces, return_inverse=True)
-            new_verts = verts[unique]
-            new_faces = inverse.reshape(new_faces.shape)
-            merged = trimesh.Trimesh(vertices=new_verts, faces=new_faces, process=False)
+            merged, _ = operacoes.remover_duplicados(self.mesh_reparada, threshold)
             self.mesh_reparada = merged
             self.gl_reparada.clear()
             item = create_glmeshitem(merged, color=(0.1, 0.8, 0.1, 1))
@@ -865,15 +1460,8 @@ class MeshRepairApp(QMainWindow):
     def recalcular_normais(self, orientacao):
         if self.mesh_reparada is None:
             return
-        mesh = self.mesh_reparada.copy()
         try:
-            if orientacao == 'out':
-                mesh.rezero()
-                mesh.fix_normals()
-            elif orientacao == 'in':
-                mesh.rezero()
-                mesh.fix_normals()
-                mesh.invert()
+            mesh, _ = operacoes.recalcular_normais(self.mesh_reparada, orientacao)
             self.mesh_reparada = mesh
             self.gl_reparada.clear()
             item = create_glmeshitem(mesh, color=(0.1, 0.8, 0.1, 1))
@@ -887,17 +1475,28 @@ class MeshRepairApp(QMainWindow):
     def preencher_buracos(self):
         if self.mesh_reparada is None:
             return
-        mesh = self.mesh_reparada.copy()
+        max_arestas, ok = QInputDialog.getInt(self, 'Preencher Buracos', 'Máximo de arestas por buraco (0 = todos):',
+                                              MAX_ARESTAS_LACO, 0, 1000000, 1)
+        if not ok:
+            return
+        metodos = ['Área mínima', 'Área mínima + suavização', 'Ear clipping']
+        metodo, ok = QInputDialog.getItem(self, 'Preencher Buracos', 'Triangulação do remendo:', metodos, 0, False)
+        if not ok:
+            return
+        mesh = self.mesh_reparada
         try:
-            meshfix = pymeshfix.MeshFix(mesh.vertices, mesh.faces)
-            meshfix.repair(verbose=True)
-            manifold = trimesh.Trimesh(vertices=meshfix.v, faces=meshfix.f)
+            # Só os laços de borda são remendados; o resto da malha não é reescrito
+            manifold, info = operacoes.preencher_buracos(
+                mesh, max_arestas=max_arestas or None,
+                metodo='orelhas' if metodo == 'Ear clipping' else 'area', suavizar=metodo == metodos[1])
+            remendo = info['faces_adicionadas']
             self.mesh_reparada = manifold
             self.gl_reparada.clear()
             item = create_glmeshitem(manifold, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
-            self.analisar_malha(manifold, self.label_analise_reparada)
+            self.atualizar_analise_reparada(manifold, faces_adicionadas=remendo, vertices_adicionados=info['vertices_adicionados'])
             self.centralizar_camera(self.gl_reparada, manifold)
+            self.update_status_bar(f'🕳️ {info["buracos"]} buraco(s) preenchido(s) com {len(remendo)} faces', 'success')
         except Exception as e:
             from PyQt5.QtWidgets import QMessageBox
             QMessageBox.warning(self, 'Erro ao Preencher Buracos', f'Não foi possível preencher buracos/tornar manifold.\n{e}')
@@ -907,19 +1506,23 @@ class MeshRepairApp(QMainWindow):
             return
         mesh = self.mesh_reparada.copy()
         try:
-            # Remove faces não-manifold
-            if hasattr(mesh, 'faces_nonmanifold') and len(mesh.faces_nonmanifold) > 0:
+            # Remove faces não-manifold (que tocam arestas com mais de 2 faces)
+            if self.analise_reparada is None:
+                self.analise_reparada = AnaliseIncremental(mesh)
+            faces_nonmanifold = self.analise_reparada.faces_nao_manifold(mesh.faces)
+            cleaned = mesh
+            removidas = None
+            if len(faces_nonmanifold) > 0:
                 mask = np.ones(len(mesh.faces), dtype=bool)
-                mask[mesh.faces_nonmanifold] = False
-                new_faces = mesh.faces[mask]
-                cleaned = trimesh.Trimesh(vertices=mesh.vertices, faces=new_faces, process=True)
-            else:
-                cleaned = mesh
+                mask[faces_nonmanifold] = False
+                removidas = mesh.faces[~mask]
+                # Mantém o array de vértices para que a análise seja atualizada localmente
+                cleaned.update_faces(mask)
             self.mesh_reparada = cleaned
             self.gl_reparada.clear()
             item = create_glmeshitem(cleaned, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
-            self.analisar_malha(cleaned, self.label_analise_reparada)
+            self.atualizar_analise_reparada(cleaned, faces_removidas=removidas)
             self.centralizar_camera(self.gl_reparada, cleaned)
         except Exception as e:
             from PyQt5.QtWidgets import QMessageBox
@@ -930,59 +1533,65 @@ class MeshRepairApp(QMainWindow):
             return
         from PyQt5.QtWidgets import QInputDialog
         fator, ok = QInputDialog.getDouble(self, 'Simplificar Malha', 'Fator de redução (0.0 a 1.0):', 0.5, 0.01, 1.0, 2)
-        if ok:
-            self.simplificar_malha(fator)
+        if not ok:
+            return
+        if len(self.mesh_reparada.faces) >= MIN_FACES_PARTICIONAR:
+            modos = [f'Particionada ({os.cpu_count() or 1} processos em paralelo)', 'Única (pymeshlab)']
+            modo, ok = QInputDialog.getItem(self, 'Simplificar Malha', 'Modo de decimação:', modos, 0, False)
+            if not ok:
+                return
+            if modo == modos[0]:
+                self.simplificar_particionado(fator)
+                return
+        self.simplificar_malha(fator)
+
+    def simplificar_particionado(self, fator):
+        """Decimação por clusters em processos separados; a thread só espera e repassa o progresso"""
+        mesh = self.mesh_reparada
+
+        def trabalho(cancelamento, progresso):
+            def ao_terminar_cluster(concluidos, total):
+                progresso(int(100 * concluidos / total), f'Simplificando: {concluidos}/{total} clusters')
+            return operacoes.simplificar(mesh, fator, particionado=True, ao_terminar_cluster=ao_terminar_cluster,
+                                         cancelar=cancelamento)
+
+        self._operar_cancelavel('Simplificação particionada', trabalho,
+                                lambda resultado: self._malha_simplificada(*resultado), erro=('Erro ao Simplificar', 'Não foi possível simplificar a malha.'), progresso=True)
+
+    def _malha_simplificada(self, simplified, info):
+        self.mesh_reparada = simplified
+        self.gl_reparada.clear()
+        self.gl_reparada.addItem(create_glmeshitem(simplified, color=(0.1, 0.8, 0.1, 1)))
+        self.analisar_malha(simplified, self.label_analise_reparada)
+        self.centralizar_camera(self.gl_reparada, simplified)
+        self.update_status_bar(f"📉 Simplificada: {len(simplified.faces)} faces ({info['clusters']} clusters)", 'success')
 
     def simplificar_malha(self, fator):
         if self.mesh_reparada is None:
             return
-        import pymeshlab
-        import numpy as np
-        try:
-            m = self.mesh_reparada
-            ms = pymeshlab.MeshSet()
-            ms.add_mesh(pymeshlab.Mesh(m.vertices, m.faces))
-            ms.meshing_decimation_quadric_edge_collapse(targetfacenum=int(len(m.faces)*fator), preservenormal=True)
-            new_mesh = ms.current_mesh()
-            vertices = np.array(new_mesh.vertex_matrix())
-            faces = np.array(new_mesh.face_matrix())
-            simplified = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
-            simplified = centralizar_na_origem(simplified)
-            self.mesh_reparada = simplified
-            self.gl_reparada.clear()
-            item = create_glmeshitem(simplified, color=(0.1, 0.8, 0.1, 1))
-            self.gl_reparada.addItem(item)
-            self.analisar_malha(simplified, self.label_analise_reparada)
-            self.centralizar_camera(self.gl_reparada, simplified)
-        except Exception as e:
-            from PyQt5.QtWidgets import QMessageBox
-            QMessageBox.warning(self, 'Erro ao Simplificar', f'Não foi possível simplificar a malha.\n{e}')
+        mesh = self.mesh_reparada
+        self._operar_cancelavel('Simplificação',
+                                lambda cancelamento: operacoes.simplificar(mesh, fator, cancelar=cancelamento)[0],
+                                self._mostrar_reparada, ('Erro ao Simplificar', 'Não foi possível simplificar a malha.'))
 
     def triangulate_faces(self):
         if self.mesh_reparada is None:
             return
-        import numpy as np
-        from PyQt5.QtWidgets import QMessageBox
-        faces = self.mesh_reparada.faces
+        from PyQt5.QtWidgets import QMessageBox, QInputDialog
+        poligonos = self.poligonos_atuais()
         # Detectar se já está toda em triângulos
-        if np.all([len(set(face)) == 3 for face in faces]):
+        if poligonos is None or set(poligonos.contagem_por_tamanho()) <= {3}:
             QMessageBox.information(self, 'Triangular Faces', 'A malha já está toda em triângulos!')
             return
+        metodos = ['Ear clipping (faces côncavas)', 'Leque (fan)']
+        escolha, ok = QInputDialog.getItem(self, 'Triangular Faces', 'Método de triangulação:', metodos, 0, False)
+        if not ok:
+            return
         try:
+            metodo = 'orelhas' if escolha == metodos[0] else 'leque'
             verts = self.mesh_reparada.vertices
-            new_faces = []
-            for face in faces:
-                unique = list(dict.fromkeys(face))
-                if len(unique) < 3:
-                    continue
-                if len(unique) == 3:
-                    new_faces.append(unique)
-                else:
-                    # Fan triangulation
-                    for i in range(1, len(unique) - 1):
-                        new_faces.append([unique[0], unique[i], unique[i+1]])
-            tri = trimesh.Trimesh(vertices=verts, faces=np.array(new_faces), process=True)
-            tri = centralizar_na_origem(tri)
+            new_faces = poligonos.triangular(metodo, vertices=verts)
+            tri = trimesh.Trimesh(vertices=verts, faces=new_faces, process=True)
             self.mesh_reparada = tri
             self.gl_reparada.clear()
             item = create_glmeshitem(tri, color=(0.1, 0.8, 0.1, 1))
@@ -995,55 +1604,30 @@ class MeshRepairApp(QMainWindow):
     def quadrangulate_faces(self):
         if self.mesh_reparada is None:
             return
-        import numpy as np
         from PyQt5.QtWidgets import QMessageBox
-        faces = self.mesh_reparada.faces
-        verts = self.mesh_reparada.vertices
-        quads = []
-        # Agrupar pares de triângulos adjacentes em quadriláteros
-        # (Simples: só para faces já trianguladas)
-        if np.all([len(set(face)) == 3 for face in faces]):
-            from collections import defaultdict
-            edge_map = defaultdict(list)
-            for idx, face in enumerate(faces):
-                for i in range(3):
-                    a, b = sorted((face[i], face[(i+1)%3]))
-                    edge_map[(a, b)].append(idx)
-            paired = set()
-            for idx, face in enumerate(faces):
-                if idx in paired:
-                    continue
-                found = False
-                for i in range(3):
-                    a, b = sorted((face[i], face[(i+1)%3]))
-                    adj = [f for f in edge_map[(a, b)] if f != idx and f not in paired]
-                    if adj:
-                        j = adj[0]
-                        f2 = faces[j]
-                        quad = list(set(face) | set(f2))
-                        if len(quad) == 4:
-                            quads.append(quad)
-                            paired.add(idx)
-                            paired.add(j)
-                            found = True
-                            break
-            # Só criar malha se todas as faces foram agrupadas em quadriláteros
-            if len(quads)*2 == len(faces):
-                try:
-                    quad = trimesh.Trimesh(vertices=verts, faces=np.array(quads), process=True)
-                    quad = centralizar_na_origem(quad)
-                    self.mesh_reparada = quad
-                    self.gl_reparada.clear()
-                    item = create_glmeshitem(quad, color=(0.1, 0.8, 0.1, 1))
-                    self.gl_reparada.addItem(item)
-                    self.analisar_malha(quad, self.label_analise_reparada)
-                    self.centralizar_camera(self.gl_reparada, quad)
-                except Exception as e:
-                    QMessageBox.warning(self, 'Erro ao Quadrangular', f'Não foi possível quadrangular as faces.\n{e}')
-            else:
-                QMessageBox.warning(self, 'Quadrangular Faces', 'Não foi possível quadrangular toda a malha. Só é possível quadrangular se todos os triângulos puderem ser agrupados em pares.')
-        else:
-            QMessageBox.warning(self, 'Quadrangular Faces', 'A quadrangulação automática só é suportada para malhas totalmente trianguladas.')
+        try:
+            # Emparelha triângulos adjacentes por qualidade do quad (planaridade e ângulos)
+            poligonos = quadrangular(self.mesh_reparada.vertices, self.mesh_reparada.faces)
+            contagem = poligonos.contagem_por_tamanho()
+            if contagem.get(4, 0) == 0:
+                QMessageBox.warning(self, 'Quadrangular Faces', 'Nenhum par de triângulos adequado para formar quadriláteros.')
+                return
+            # A geometria triangulada não muda: só a topologia poligonal é guardada
+            self.poligonos_reparada = (poligonos, self.mesh_reparada)
+            self.gl_reparada.clear()
+            item = create_glmeshitem(self.mesh_reparada, color=(0.1, 0.8, 0.1, 1), draw_edges=False)
+            self.gl_reparada.addItem(item)
+            self.gl_reparada.addItem(create_poly_edges_item(poligonos))
+            self.update_status_bar(f'✅ Malha quad-dominante: {contagem.get(4, 0)} quads, {contagem.get(3, 0)} triângulos', 'success')
+        except Exception as e:
+            QMessageBox.warning(self, 'Erro ao Quadrangular', f'Não foi possível quadrangular as faces.\n{e}')
+
+    def poligonos_atuais(self):
+        """Topologia poligonal da malha reparada, se ainda corresponder à malha atual"""
+        if self.poligonos_reparada is None:
+            return None
+        poligonos, mesh = self.poligonos_reparada
+        return poligonos if mesh is self.mesh_reparada else None
 
     def remover_faces_degeneradas(self):
         if self.mesh_reparada is None:
@@ -1054,15 +1638,16 @@ class MeshRepairApp(QMainWindow):
         # Faces degeneradas: área zero ou vértices repetidos/colineares
         areas = mesh.area_faces
         mask = areas > 1e-12
-        faces_validas = mesh.faces[mask]
+        removidas = mesh.faces[~mask]
         try:
-            cleaned = trimesh.Trimesh(vertices=mesh.vertices, faces=faces_validas, process=True)
-            cleaned = centralizar_na_origem(cleaned)
+            # Remove só as faces afetadas, sem reindexar vértices, e informa a análise
+            cleaned = mesh
+            cleaned.update_faces(mask)
             self.mesh_reparada = cleaned
             self.gl_reparada.clear()
             item = create_glmeshitem(cleaned, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
-            self.analisar_malha(cleaned, self.label_analise_reparada)
+            self.atualizar_analise_reparada(cleaned, faces_removidas=removidas)
             self.centralizar_camera(self.gl_reparada, cleaned)
         except Exception as e:
             QMessageBox.warning(self, 'Erro ao Remover Faces Degeneradas', f'Não foi possível remover faces degeneradas.\n{e}')
@@ -1078,14 +1663,20 @@ class MeshRepairApp(QMainWindow):
     def remesh_voxel(self, voxel_size):
         if self.mesh_reparada is None:
             return
-        import trimesh
         from PyQt5.QtWidgets import QMessageBox
         try:
-            mesh = self.mesh_reparada.copy()
-            # Voxel remesh
-            v = mesh.voxelized(voxel_size)
-            remeshed = v.as_boxes()
-            remeshed = centralizar_na_origem(remeshed)
+            mesh = self.mesh_reparada
+            parametros = self.verificar_memoria(
+                'Remesh (Voxel)', 'remesh_voxel', {'tamanho_voxel': voxel_size},
+                reduzir=lambda: self._reduzir_voxel(mesh, voxel_size))
+            if parametros is None:
+                return
+            # Voxel remesh esparso: campo de distância só na faixa da superfície + marching cubes por bloco
+            try:
+                remeshed, _ = operacoes.remesh_voxel(mesh, **parametros)
+            except ValueError as e:
+                QMessageBox.warning(self, 'Remesh (Voxel)', str(e))
+                return
             self.mesh_reparada = remeshed
             self.gl_reparada.clear()
             item = create_glmeshitem(remeshed, color=(0.1, 0.8, 0.1, 1))
@@ -1109,27 +1700,11 @@ class MeshRepairApp(QMainWindow):
     def remesh_surface(self, edge_length):
         if self.mesh_reparada is None:
             return
-        import pymeshlab
-        import numpy as np
-        from PyQt5.QtWidgets import QMessageBox
-        try:
-            m = self.mesh_reparada
-            ms = pymeshlab.MeshSet()
-            ms.add_mesh(pymeshlab.Mesh(m.vertices, m.faces))
-            ms.meshing_isotropic_explicit_remeshing(targetlen=pymeshlab.PureValue(edge_length))
-            new_mesh = ms.current_mesh()
-            vertices = np.array(new_mesh.vertex_matrix())
-            faces = np.array(new_mesh.face_matrix())
-            remeshed = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
-            remeshed = centralizar_na_origem(remeshed)
-            self.mesh_reparada = remeshed
-            self.gl_reparada.clear()
-            item = create_glmeshitem(remeshed, color=(0.1, 0.8, 0.1, 1))
-            self.gl_reparada.addItem(item)
-            self.analisar_malha(remeshed, self.label_analise_reparada)
-            self.centralizar_camera(self.gl_reparada, remeshed)
-        except Exception as e:
-            QMessageBox.warning(self, 'Erro ao Remesh (Surface)', f'Não foi possível refazer a malha por superfície.\n{e}')
+        mesh = self.mesh_reparada
+        self._operar_cancelavel('Remesh (Surface)',
+                                lambda cancelamento: operacoes.remesh_surface(mesh, edge_length, cancelar=cancelamento)[0],
+                                self._mostrar_reparada,
+                                ('Erro ao Remesh (Surface)', 'Não foi possível refazer a malha por superfície.'))
 
     def listar_metodos_pymeshlab(self):
         import pymeshlab
@@ -1171,44 +1746,22 @@ class MeshRepairApp(QMainWindow):
     def auto_retopology(self, target_faces, edge_length):
         if self.mesh_reparada is None:
             return
-        import pymeshlab
-        import numpy as np
-        from PyQt5.QtWidgets import QMessageBox
-        try:
-            # 1. Simplificação
-            m = self.mesh_reparada
-            ms = pymeshlab.MeshSet()
-            ms.add_mesh(pymeshlab.Mesh(m.vertices, m.faces))
-            ms.meshing_decimation_quadric_edge_collapse(targetfacenum=target_faces, preservenormal=True)
-            new_mesh = ms.current_mesh()
-            vertices = np.array(new_mesh.vertex_matrix())
-            faces = np.array(new_mesh.face_matrix())
-            simplified = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
-            # 2. Remesh Surface
-            ms = pymeshlab.MeshSet()
-            ms.add_mesh(pymeshlab.Mesh(simplified.vertices, simplified.faces))
-            ms.meshing_isotropic_explicit_remeshing(targetlen=pymeshlab.PureValue(edge_length))
-            new_mesh = ms.current_mesh()
-            vertices = np.array(new_mesh.vertex_matrix())
-            faces = np.array(new_mesh.face_matrix())
+        mesh = self.mesh_reparada
+
+        def trabalho(cancelamento):
+            # 1. Simplificação e 2. Remesh Surface, num subprocesso isolado (um crash do MeshLab não fecha a janela)
+            decimacao = ('meshing_decimation_quadric_edge_collapse', {'targetfacenum': target_faces, 'preservenormal': True})
+            remesh = ('meshing_isotropic_explicit_remeshing', {'targetlen': ('PureValue', edge_length)})
+            vertices, faces, _ = pymeshlab_isolado(mesh.vertices, mesh.faces, [
+                [decimacao, remesh],
+                [('meshing_remove_duplicate_vertices', {}), ('meshing_repair_non_manifold_edges', {}), decimacao, remesh],
+            ], descricao='Auto Retopology', cancelar=cancelamento)
             remeshed = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
-            # 3. Suavização
-            ms = pymeshlab.MeshSet()
-            ms.add_mesh(pymeshlab.Mesh(remeshed.vertices, remeshed.faces))
-            ms.apply_coord_laplacian_smoothing(stepsmoothnum=10)
-            new_mesh = ms.current_mesh()
-            vertices = np.array(new_mesh.vertex_matrix())
-            faces = np.array(new_mesh.face_matrix())
-            final_mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
-            final_mesh = centralizar_na_origem(final_mesh)
-            self.mesh_reparada = final_mesh
-            self.gl_reparada.clear()
-            item = create_glmeshitem(final_mesh, color=(0.1, 0.8, 0.1, 1))
-            self.gl_reparada.addItem(item)
-            self.analisar_malha(final_mesh, self.label_analise_reparada)
-            self.centralizar_camera(self.gl_reparada, final_mesh)
-        except Exception as e:
-            QMessageBox.warning(self, 'Erro no Auto Retopology', f'Não foi possível executar auto retopologia.\n{e}')
+            # 3. Suavização (Laplaciano esparso, sem outra ida e volta ao pymeshlab); a borda desliza sobre si mesma
+            return operacoes.suavizar(remeshed, metodo='laplaciano', iteracoes=10, fator=1.0, fixar_borda=False)[0]
+
+        self._operar_cancelavel('Auto Retopology', trabalho, self._mostrar_reparada,
+                                ('Erro no Auto Retopology', 'Não foi possível executar auto retopologia.'))
 
     def shade_smooth(self):
         if self.mesh_reparada is None:
@@ -1303,7 +1856,7 @@ class MeshRepairApp(QMainWindow):
             self.gl_reparada.clear()
             item = create_glmeshitem(mesh, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
-            self.analisar_malha(mesh, self.label_analise_reparada)
+            self.analisar_malha(mesh, self.label_analise_reparada, self.analise_reparada)
             self.centralizar_camera(self.gl_reparada, mesh)
         except Exception as e:
             QMessageBox.warning(self, 'Erro no Auto Smooth', f'Não foi possível aplicar Auto Smooth.\n{e}')
@@ -1312,24 +1865,23 @@ class MeshRepairApp(QMainWindow):
         if self.mesh_original is None or self.mesh_reparada is None:
             return
         import trimesh
-        import numpy as np
         from PyQt5.QtWidgets import QMessageBox
+        from proximidade import transferir_atributos
         try:
             orig = self.mesh_original
             rep = self.mesh_reparada
-            if len(orig.vertices) == len(rep.vertices):
-                rep.vertex_normals = orig.vertex_normals.copy()
-            else:
-                # Transferência por proximidade (k-d tree)
-                from scipy.spatial import cKDTree
-                tree = cKDTree(orig.vertices)
-                dists, idxs = tree.query(rep.vertices)
-                rep.vertex_normals = orig.vertex_normals[idxs]
+            # Projeta cada vértice na superfície da original e interpola normais/cores/UVs no triângulo
+            atributos = transferir_atributos(orig, rep.vertices, self.indice_original())
+            if 'uv' in atributos:
+                rep.visual = trimesh.visual.TextureVisuals(uv=atributos['uv'], material=orig.visual.material)
+            elif 'cores' in atributos:
+                rep.visual.vertex_colors = atributos['cores']
+            rep.vertex_normals = atributos['normais']
             self.mesh_reparada = rep
             self.gl_reparada.clear()
             item = create_glmeshitem(rep, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
-            self.analisar_malha(rep, self.label_analise_reparada)
+            self.analisar_malha(rep, self.label_analise_reparada, self.analise_reparada)
             self.centralizar_camera(self.gl_reparada, rep)
         except Exception as e:
             QMessageBox.warning(self, 'Erro ao Transferir Normais', f'Não foi possível transferir as normais.\n{e}')
@@ -1363,7 +1915,7 @@ class MeshRepairApp(QMainWindow):
             self.gl_reparada.clear()
             item = create_glmeshitem(mesh, color=(0.1, 0.8, 0.1, 1))
             self.gl_reparada.addItem(item)
-            self.analisar_malha(mesh, self.label_analise_reparada)
+            self.analisar_malha(mesh, self.label_analise_reparada, self.analise_reparada)
             self.centralizar_camera(self.gl_reparada, mesh)
         except Exception as e:
             QMessageBox.warning(self, 'Erro em Weighted Normals', f'Não foi possível aplicar Weighted Normals.\n{e}')
@@ -1434,23 +1986,18 @@ class MeshRepairApp(QMainWindow):
         import numpy as np
         from PyQt5.QtWidgets import QMessageBox, QInputDialog
         try:
-            mesh = self.mesh_reparada.copy()
+            mesh = self.mesh_reparada
             # Remover componentes desconectados pequenos
             min_faces, ok = QInputDialog.getInt(self, 'Mesh Cleanup', 'Mínimo de faces por componente para manter:', 50, 1, 10000, 1)
             if not ok:
                 return
-            comps = mesh.split(only_watertight=False)
-            comps = [c for c in comps if len(c.faces) >= min_faces]
-            if not comps:
-                QMessageBox.warning(self, 'Mesh Cleanup', 'Nenhuma componente atende ao critério. Nada foi removido.')
+            # Rótulos de componentes via grafo esparso de adjacência entre faces
+            try:
+                cleaned, info = operacoes.mesh_cleanup(mesh, min_faces)
+            except ValueError as e:
+                QMessageBox.warning(self, 'Mesh Cleanup', str(e))
                 return
-            cleaned = trimesh.util.concatenate(comps)
-            # Remover vértices soltos
-            mask = np.unique(cleaned.faces)
-            cleaned.vertices = cleaned.vertices[mask]
-            remap = {old: new for new, old in enumerate(mask)}
-            cleaned.faces = np.vectorize(remap.get)(cleaned.faces)
-            cleaned = trimesh.Trimesh(vertices=cleaned.vertices, faces=cleaned.faces, process=True)
+            self.update_status_bar(f'🧹 {info["componentes_removidas"]} de {info["componentes"]} componentes removidas', 'success')
             self.mesh_reparada = cleaned
             self.gl_reparada.clear()
             item = create_glmeshitem(cleaned, color=(0.1, 0.8, 0.1, 1))
@@ -1493,7 +2040,7 @@ class MeshRepairApp(QMainWindow):
             faces = mesh.faces
             
             # Usa KDTree para encontrar vértices próximos
-            tree = cKDTree(vertices)
+            tree = spatial.cKDTree(vertices)
             
             # Encontra grupos de vértices próximos
             groups = tree.query_ball_point(vertices, threshold)
@@ -1571,42 +2118,11 @@ class MeshRepairApp(QMainWindow):
                 if is_interior:
                     faces_to_remove.add(face_idx)
             
-            # Remove faces intersectantes (faces que se cruzam)
-            # Detecta interseções usando bounding boxes das faces
-            for i in range(len(mesh.faces)):
-                if i in faces_to_remove:
-                    continue
-                    
-                face1 = mesh.faces[i]
-                vertices1 = mesh.vertices[face1]
-                
-                for j in range(i + 1, len(mesh.faces)):
-                    if j in faces_to_remove:
-                        continue
-                        
-                    face2 = mesh.faces[j]
-                    vertices2 = mesh.vertices[face2]
-                    
-                    # Verifica se as faces compartilham vértices
-                    shared_vertices = set(face1) & set(face2)
-                    if len(shared_vertices) >= 2:
-                        # Faces compartilham arestas, verifica se há interseção
-                        # Calcula bounding box das faces
-                        bbox1_min = np.min(vertices1, axis=0)
-                        bbox1_max = np.max(vertices1, axis=0)
-                        bbox2_min = np.min(vertices2, axis=0)
-                        bbox2_max = np.max(vertices2, axis=0)
-                        
-                        # Se os bounding boxes se intersectam, pode haver interseção
-                        if (bbox1_min < bbox2_max).all() and (bbox2_min < bbox1_max).all():
-                            # Verifica se há sobreposição significativa
-                            overlap_volume = np.prod(np.minimum(bbox1_max, bbox2_max) - np.maximum(bbox1_min, bbox2_min))
-                            bbox1_volume = np.prod(bbox1_max - bbox1_min)
-                            bbox2_volume = np.prod(bbox2_max - bbox2_min)
-                            
-                            # Se há sobreposição significativa, remove uma das faces
-                            if overlap_volume > 0.1 * min(bbox1_volume, bbox2_volume):
-                                faces_to_remove.add(j)
+            # Remove faces intersectantes: pares que se cruzam de fato (grade espacial + teste triângulo-triângulo)
+            from autointersecao import pares_que_se_cruzam
+            for i, j in pares_que_se_cruzam(mesh.vertices, mesh.faces):
+                if i not in faces_to_remove:
+                    faces_to_remove.add(int(j))
             
             if not faces_to_remove:
                 print("Nenhuma face interior ou intersectante encontrada")
@@ -1642,6 +2158,29 @@ class MeshRepairApp(QMainWindow):
             import traceback
             traceback.print_exc()
 
+    def resolver_intersecoes(self):
+        """Remove as regiões que se cruzam e remenda cada uma localmente"""
+        if self.mesh_reparada is None:
+            return
+        try:
+            self.update_status_bar('✂️ Procurando autointerseções...', 'info')
+            nova, info = operacoes.resolver_intersecoes(self.mesh_reparada)
+            if info['pares'] == 0:
+                self.update_status_bar('✅ Nenhuma autointerseção encontrada', 'success')
+                return
+            self.mesh_reparada = nova
+            self.gl_reparada.clear()
+            self.gl_reparada.addItem(create_glmeshitem(nova, color=(0.1, 0.8, 0.1, 1)))
+            self.analisar_malha(nova, self.label_analise_reparada)
+            self.centralizar_camera(self.gl_reparada, nova)
+            texto = (f"✂️ {info['pares']} pares de faces que se cruzam em {info['regioes']} regiões; "
+                     f"{info['buracos']} remendo(s)")
+            if info['restantes']:
+                texto += f", {info['restantes']} pares restantes (ex.: corpos distintos se atravessando)"
+            self.update_status_bar(texto, 'success' if not info['restantes'] else 'warning')
+        except Exception as e:
+            QMessageBox.warning(self, 'Resolver Autointerseções', f'Não foi possível resolver as interseções.\n{e}')
+
     def edge_split_dialog(self):
         """Diálogo para configurar o Edge Split Modifier"""
         if self.mesh_reparada is None:
@@ -1802,61 +2341,16 @@ class MeshRepairApp(QMainWindow):
             return
         
         try:
-            print(f"Aplicando Subdivision Surface com {iterations} iterações")
-            
-            mesh = self.mesh_reparada.copy()
+            mesh = self.mesh_reparada
+            parametros = self.verificar_memoria(
+                'Subdivision Surface', 'subdivisao', {'iteracoes': iterations},
+                reduzir=lambda: self._reduzir_parametro('subdivisao', 'iteracoes', range(iterations - 1, 0, -1)))
+            if parametros is None:
+                return
+            print(f"Aplicando Subdivision Surface com {parametros['iteracoes']} iterações")
             
-            # Aplica a subdivisão de superfície
-            # PyMeshLab tem uma função de subdivisão de superfície, mas a implementação
-            # pode variar. Aqui, vamos usar a subdivisão de Catmull-Clark, que é
-            # uma das mais populares e robustas.
-            # A subdivisão de Catmull-Clark adiciona vértices nas arestas e faces,
-            # e recalcula as normais.
-            
-            # Primeiro, adiciona vértices nas arestas
-            new_verts = []
-            for v in mesh.vertices:
-                new_verts.append(v)
-            
-            # Adiciona vértices nas faces
-            for f in mesh.faces:
-                # Catmull-Clark: adiciona um vértice no centro da face
-                center = np.mean(mesh.vertices[f], axis=0)
-                new_verts.append(center)
-            
-            # Adiciona vértices nas arestas
-            for e in mesh.edges:
-                # Catmull-Clark: adiciona um vértice no meio da aresta
-                v0 = mesh.vertices[e[0]]
-                v1 = mesh.vertices[e[1]]
-                new_verts.append((v0 + v1) / 2)
-            
-            # Atualiza a malha com os novos vértices
-            new_mesh = trimesh.Trimesh(vertices=np.array(new_verts), faces=mesh.faces, process=True)
-            
-            # Recalcula as normais após a subdivisão
-            new_mesh.fix_normals()
-            
-            # Aplica a subdivisão recursivamente
-            for _ in range(iterations):
-                # Adiciona vértices nas arestas
-                new_verts = []
-                for v in new_mesh.vertices:
-                    new_verts.append(v)
-                
-                # Adiciona vértices nas faces
-                for f in new_mesh.faces:
-                    center = np.mean(new_mesh.vertices[f], axis=0)
-                    new_verts.append(center)
-                
-                # Adiciona vértices nas arestas
-                for e in new_mesh.edges:
-                    v0 = new_mesh.vertices[e[0]]
-                    v1 = new_mesh.vertices[e[1]]
-                    new_verts.append((v0 + v1) / 2)
-                
-                new_mesh = trimesh.Trimesh(vertices=np.array(new_verts), faces=new_mesh.faces, process=True)
-                new_mesh.fix_normals()
+            # Loop subdivision vetorizada (cada iteração multiplica as faces por 4)
+            new_mesh, _ = operacoes.subdivisao(mesh, **parametros)
             
             self.mesh_reparada = new_mesh
             self.gl_reparada.clear()
@@ -1865,7 +2359,7 @@ class MeshRepairApp(QMainWindow):
             self.analisar_malha(new_mesh, self.label_analise_reparada)
             self.centralizar_camera(self.gl_reparada, new_mesh)
             
-            print(f"Subdivision Surface aplicada com sucesso com {iterations} iterações. "
+            print(f"Subdivision Surface aplicada com sucesso com {parametros['iteracoes']} iterações. "
                   f"Vértices: {len(new_mesh.vertices)}, Faces: {len(new_mesh.faces)}")
             
         except Exception as e:
@@ -1905,54 +2399,11 @@ class MeshRepairApp(QMainWindow):
                 print("Espessura deve ser maior que 0 para criar casca")
                 return
             
-            mesh = self.mesh_reparada.copy()
-            
-            # Calcula as normais dos vértices para direção da casca
-            mesh.vertex_normals = mesh.vertex_normals
-            
-            # Cria vértices externos deslocados na direção das normais
-            outer_vertices = mesh.vertices + mesh.vertex_normals * thickness
-            
-            # Combina vértices originais e externos
-            all_vertices = np.vstack([mesh.vertices, outer_vertices])
-            
-            # Cria faces para conectar a malha interna com a externa
-            new_faces = []
-            
-            # Adiciona as faces originais
-            new_faces.extend(mesh.faces)
-            
-            # Adiciona faces externas (invertidas para manter orientação correta)
-            for face in mesh.faces:
-                # Face externa com vértices deslocados
-                outer_face = [v + len(mesh.vertices) for v in face]
-                # Inverte a ordem para manter orientação
-                outer_face = [outer_face[0], outer_face[2], outer_face[1]]
-                new_faces.append(outer_face)
-            
-            # Cria faces laterais para conectar as bordas
-            for edge in mesh.edges_unique:
-                # Encontra faces que compartilham esta aresta
-                edge_faces = []
-                for face_idx, face in enumerate(mesh.faces):
-                    for i in range(3):
-                        v1, v2 = face[i], face[(i + 1) % 3]
-                        if (v1 == edge[0] and v2 == edge[1]) or (v1 == edge[1] and v2 == edge[0]):
-                            edge_faces.append(face_idx)
-                
-                if len(edge_faces) == 1:  # Aresta de borda
-                    # Cria duas faces triangulares para conectar a aresta interna com a externa
-                    v1_in, v2_in = edge[0], edge[1]
-                    v1_out, v2_out = v1_in + len(mesh.vertices), v2_in + len(mesh.vertices)
-                    
-                    # Primeira face triangular
-                    new_faces.append([v1_in, v2_in, v1_out])
-                    # Segunda face triangular
-                    new_faces.append([v2_in, v2_out, v1_out])
-            
-            # Cria nova malha com casca
-            new_mesh = trimesh.Trimesh(vertices=all_vertices, faces=new_faces, process=True)
-            new_mesh.fix_normals()
+            mesh = self.mesh_reparada
+            # A casca não tem parâmetro que reduza o tamanho: só dá para continuar ou abortar
+            if self.verificar_memoria('Solidify Modifier', 'solidificar', {'espessura': thickness}) is None:
+                return
+            new_mesh, _ = operacoes.solidificar(mesh, thickness)
             
             self.mesh_reparada = new_mesh
             self.gl_reparada.clear()
@@ -1962,14 +2413,149 @@ class MeshRepairApp(QMainWindow):
             self.centralizar_camera(self.gl_reparada, new_mesh)
             
             print(f"Solidify Modifier aplicado com sucesso. "
-                  f"Vértices: {len(mesh.vertices)} → {len(all_vertices)}, "
-                  f"Faces: {len(mesh.faces)} → {len(new_faces)}")
+                  f"Vértices: {len(mesh.vertices)} → {len(new_mesh.vertices)}, "
+                  f"Faces: {len(mesh.faces)} → {len(new_mesh.faces)}")
             
         except Exception as e:
             print(f"Erro ao aplicar Solidify Modifier: {e}")
             import traceback
             traceback.print_exc()
 
+    def reordenar_reparada(self):
+        """Reordena a malha reparada no lugar e redesenha; a topologia poligonal acompanha"""
+        mesh = self.mesh_reparada
+        poligonos = self.poligonos_atuais()
+        _, info = reordenar(mesh, no_lugar=True)
+        if poligonos is not None:
+            self.poligonos_reparada = (reordenar_poligonos(poligonos, info['ordem_vertices'], mesh.vertices), mesh)
+        self.gl_reparada.clear()
+        self.gl_reparada.addItem(create_glmeshitem(mesh, color=(0.1, 0.8, 0.1, 1)))
+        if self.poligonos_atuais() is not None:
+            self.gl_reparada.addItem(create_poly_edges_item(self.poligonos_atuais()))
+
+    def _tempo_desenho(self, gl_widget, mesh):
+        """Tempo para montar o item GL e desenhar um quadro (grabFramebuffer força o paintGL)"""
+        import time
+
+        inicio = time.perf_counter()
+        gl_widget.clear()
+        gl_widget.addItem(create_glmeshitem(mesh, color=(0.1, 0.8, 0.1, 1)))
+        gl_widget.grabFramebuffer()
+        return time.perf_counter() - inicio
+
+    def medir_reordenacao(self):
+        """Reordena a malha reparada e mostra os tempos de análise e desenho antes e depois"""
+        from PyQt5.QtWidgets import QMessageBox
+        if self.mesh_reparada is None:
+            return
+        if self.cena_reparada is not None:
+            QMessageBox.information(self, 'Localidade', 'A reordenação vale para malha única, não para cenas.')
+            return
+        mesh = self.mesh_reparada
+        try:
+            self.update_status_bar('⏱️ Medindo antes da reordenação...', 'info')
+            antes = medir_localidade(mesh)
+            antes['render'] = self._tempo_desenho(self.gl_reparada, mesh)
+            self.reordenar_reparada()
+            depois = medir_localidade(mesh)
+            depois['render'] = self._tempo_desenho(self.gl_reparada, mesh)
+            # Mesma geometria, ordem nova: a análise incremental é refeita com os índices novos
+            self.analisar_malha(mesh, self.label_analise_reparada, AnaliseIncremental(mesh))
+        except Exception as e:
+            QMessageBox.warning(self, 'Erro na Reordenação', f'Não foi possível reordenar a malha.\n{e}')
+            self.update_status_bar('❌ Erro ao reordenar malha', 'error')
+            return
+        nomes = {'analise': 'Análise', 'desenho': 'Preparo do desenho', 'render': 'Item GL + quadro'}
+        texto = '\n'.join(f'{nomes[k]}: {antes[k] * 1000:.1f} ms → {depois[k] * 1000:.1f} ms' for k in nomes)
+        QMessageBox.information(self, 'Localidade (Antes × Depois)', texto)
+        self.update_status_bar('🧭 Vértices e faces reordenados', 'success')
+
+    def alternar_modo_compacto(self, ligado):
+        """Troca o tipo dos buffers da aplicação e redesenha; a malha trimesh continua em float64"""
+        global MODO_COMPACTO
+        MODO_COMPACTO = ligado
+        # O índice guarda arrays no tipo do modo: é refeito sob demanda
+        self._indice_original = None
+        for gl_widget, mesh, cena, itens, cor in (
+                (self.gl_original, self.mesh_original, self.cena_original, self.itens_original, (0.1, 0.3, 1, 1)),
+                (self.gl_reparada, self.mesh_reparada, self.cena_reparada, self.itens_reparada, (0.1, 0.8, 0.1, 1))):
+            if cena is not None:
+                self._desenhar_cena(gl_widget, cena, itens)
+            elif mesh is not None:
+                gl_widget.clear()
+                gl_widget.addItem(create_glmeshitem(mesh, color=cor))
+        if self.poligonos_atuais() is not None:
+            self.gl_reparada.addItem(create_poly_edges_item(self.poligonos_atuais()))
+        if self.action_mapa_desvio.isChecked() and self.mesh_reparada is not None:
+            self.atualizar_mapa_desvio()
+        self.update_status_bar(f'🗜️ Modo compacto {"ligado" if ligado else "desligado"}', 'info')
+
+    def memoria_em_uso(self):
+        """[(descrição, bytes)] dos buffers mantidos pela aplicação"""
+        def buffers_gl(gl_widget):
+            # MeshData e os arrays que o item monta para o OpenGL (vértices por face, normais, cores, linhas)
+            nomes = ('vertexes', 'normals', 'colors', 'faces', 'edges', 'edgeVerts', 'pos')
+            return sum(bytes_arrays([getattr(item, 'opts', None)] + [getattr(item, n, None) for n in nomes])
+                       for item in gl_widget.items)
+
+        itens = []
+        for nome, mesh in (('original', self.mesh_original), ('reparada', self.mesh_reparada)):
+            memoria = memoria_malha(mesh)
+            itens.append((f'Malha {nome} (vértices + faces)', memoria['geometria']))
+            itens.append((f'Malha {nome} (caches do trimesh)', memoria['cache']))
+        itens.append(('Viewport original (buffers GL)', buffers_gl(self.gl_original)))
+        itens.append(('Viewport reparada (buffers GL)', buffers_gl(self.gl_reparada)))
+        itens.append(('Análises incrementais', bytes_arrays([self.analise_original, self.analise_reparada])))
+        itens.append(('Topologia poligonal', bytes_arrays([self.poligonos_original, self.poligonos_reparada])))
+        itens.append(('Índice de proximidade', bytes_arrays(self._indice_original)))
+        return itens
+
+    def alternar_mapa_desvio(self, ligado):
+        if ligado:
+            self.atualizar_mapa_desvio()
+            return
+        # Volta à cor normal da malha reparada
+        if self.cena_reparada is not None:
+            self._desenhar_cena(self.gl_reparada, self.cena_reparada, self.itens_reparada)
+        elif self.mesh_reparada is not None:
+            self.gl_reparada.clear()
+            self.gl_reparada.addItem(create_glmeshitem(self.mesh_reparada, color=(0.1, 0.8, 0.1, 1)))
+
+    def atualizar_mapa_desvio(self):
+        """Distância com sinal de cada vértice da reparada à original, calculada fora da thread da GUI"""
+        if self.mesh_original is None or self.mesh_reparada is None:
+            self.update_status_bar('ℹ️ O mapa de desvio precisa da malha original e da reparada', 'info')
+            return
+        from desvio import mapa_desvio
+        original, reparada = self.mesh_original, self.mesh_reparada
+
+        def trabalho(progresso):
+            progresso(0, 'Calculando desvio...')
+            return reparada, mapa_desvio(original, reparada, self.indice_original())
+
+        self.update_status_bar('📏 Calculando mapa de desvio...', 'info')
+        # Com parent a thread sobrevive mesmo se outra operação disparar um novo cálculo antes de terminar
+        tarefa = TarefaSegundoPlano(trabalho, self)
+        tarefa.concluida.connect(self._desvio_calculado)
+        tarefa.falhou.connect(
+            lambda erro: QMessageBox.warning(self, 'Mapa de Desvio', f'Não foi possível calcular o desvio.\n{erro}'))
+        tarefa.finished.connect(tarefa.deleteLater)
+        tarefa.start()
+
+    def _desvio_calculado(self, resultado):
+        from desvio import cores_desvio
+        reparada, desvio = resultado
+        # Outra operação trocou a malha enquanto calculava: o resultado dela virá em seguida
+        if reparada is not self.mesh_reparada or not self.action_mapa_desvio.isChecked():
+            return
+        self.gl_reparada.clear()
+        self.itens_reparada.clear()
+        cores = cores_desvio(desvio['desvios'])
+        self.gl_reparada.addItem(create_glmeshitem(reparada, cores_vertices=cores, draw_edges=False))
+        self.update_status_bar(
+            f"📏 Desvio: Hausdorff {desvio['hausdorff']:.4g}, máx {desvio['max']:.4g}, "
+            f"média {desvio['media']:.4g}, RMS {desvio['rms']:.4g} (azul: para dentro, vermelho: para fora)", 'success')
+
     def estatisticas_malha_dialog(self):
         """Diálogo para mostrar estatísticas detalhadas da malha"""
         if self.mesh_reparada is None:
@@ -2002,10 +2588,11 @@ class MeshRepairApp(QMainWindow):
             print(f"Arestas únicas: {num_edges}")
             
             # Análise de tipos de faces (N-gons)
-            face_vertex_counts = {}
-            for face in mesh.faces:
-                num_verts = len(face)
-                face_vertex_counts[num_verts] = face_vertex_counts.get(num_verts, 0) + 1
+            poligonos = self.poligonos_atuais()
+            if poligonos is not None:
+                face_vertex_counts = poligonos.contagem_por_tamanho()
+            else:
+                face_vertex_counts = {3: num_faces}
             
             print("\n=== TIPOS DE FACES ===")
             for num_verts, count in sorted(face_vertex_counts.items()):
@@ -2016,6 +2603,12 @@ class MeshRepairApp(QMainWindow):
                 else:
                     print(f"{num_verts}-gons: {count}")
             
+            # Topologia poligonal do arquivo carregado (antes da triangulação)
+            if self.poligonos_original is not None:
+                print("\n=== TOPOLOGIA DO ARQUIVO ORIGINAL ===")
+                for num_verts, count in sorted(self.poligonos_original.contagem_por_tamanho().items()):
+                    print(f"Faces com {num_verts} vértices: {count}")
+            
             # Análise de pólos (vértices com número anormal de arestas)
             vertex_edge_counts = {}
             for edge in mesh.edges:
@@ -2119,6 +2712,14 @@ class MeshRepairApp(QMainWindow):
             if 'acute_angles' in locals() and acute_angles > 0:
                 print("⚠️  Considere suavizar ângulos muito agudos")
             
+            # Memória dos buffers mantidos pela aplicação (modo compacto reduz viewports, índice e SDF)
+            print(f"\n=== MEMÓRIA (modo compacto: {'sim' if MODO_COMPACTO else 'não'}) ===")
+            memoria = self.memoria_em_uso()
+            for descricao, n_bytes in memoria:
+                print(f"{descricao}: {formatar_bytes(n_bytes)}")
+            memoria_total = sum(n_bytes for _, n_bytes in memoria)
+            print(f"Total: {formatar_bytes(memoria_total)}")
+            
             print("=== FIM DAS ESTATÍSTICAS ===\n")
             
             # Mostra diálogo com resumo
@@ -2129,7 +2730,9 @@ class MeshRepairApp(QMainWindow):
                 f"Triângulos: {face_vertex_counts.get(3, 0)}\n"
                 f"Quads: {face_vertex_counts.get(4, 0)}\n"
                 f"N-gons: {sum(count for verts, count in face_vertex_counts.items() if verts > 4)}\n"
-                f"Pólos: {len([v for v, c in pole_vertices if c != 4])}\n\n"
+                f"Pólos: {len([v for v, c in pole_vertices if c != 4])}\n"
+                f"Memória em buffers: {formatar_bytes(memoria_total)}"
+                f"{' (compacto)' if MODO_COMPACTO else ''}\n\n"
                 f"Verifique o console para detalhes completos.")
             
         except Exception as e:
@@ -2142,4 +2745,10 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = MeshRepairApp()
     window.show()
+    if os.environ.get('MESHDOCTOR_MEDIR_INICIALIZACAO'):
+        # Usado por benchmark_inicializacao.py: fecha assim que a janela é exibida
+        QTimer.singleShot(0, app.quit)
+    elif os.environ.get('MESHDOCTOR_PREAQUECER', '1') != '0':
+        # Carrega os backends em segundo plano depois que a janela já apareceu
+        QTimer.singleShot(0, lambda: pre_aquecer([trimesh, spatial, pymeshfix, pymeshlab]))
     sys.exit(app.exec_()) 
\ No newline at end of file
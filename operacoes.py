@@ -0,0 +1,256 @@
+"""Operações de malha sem interface: usadas pela GUI, pelo CLI e pelo serviço.
+
+Cada operação recebe uma malha trimesh e parâmetros nomeados e retorna
+(malha_nova, info), onde info é um dicionário com contadores/arrays extras.
+"""
+import numpy as np
+
+from analise_incremental import AnaliseIncremental
+from autointersecao import resolver_autointersecoes
+from buracos import MAX_ARESTAS_LACO, arestas_de_borda, preencher_buracos_locais
+from custo_memoria import estimar_remesh_voxel, estimar_solidificar, estimar_subdivisao
+from decimacao_paralela import MIN_FACES_PARTICIONAR, decimar_particionado
+from execucao_isolada import executar_isolado, meshfix, pymeshlab_isolado
+from topologia import remover_componentes_pequenos
+from voxel_esparso import remesh_voxel_esparso
+
+
+# Parâmetros do MeshFix, do padrão ao mais conservador (ver execucao_isolada.meshfix)
+TENTATIVAS_MESHFIX = ({}, {'limpar': True}, {'limpar': True, 'joincomp': True})
+
+
+def centralizar_na_origem(mesh):
+    # Move o centro do bounding box para a origem
+    if mesh is None or not hasattr(mesh, 'bounding_box'):
+        return mesh
+    bbox = mesh.bounding_box
+    center = bbox.centroid
+    mesh.vertices -= center
+    return mesh
+
+
+def preencher_buracos(mesh, max_arestas=MAX_ARESTAS_LACO, metodo='area', suavizar=False):
+    """Remenda só os laços de borda selecionados (ver buracos.py)"""
+    import trimesh
+
+    vertices, remendo, n_lacos = preencher_buracos_locais(
+        mesh.vertices, mesh.faces, max_arestas=max_arestas, metodo=metodo, suavizar=suavizar)
+    novos = vertices[len(mesh.vertices):]
+    remendada = trimesh.Trimesh(vertices=vertices, faces=np.concatenate([mesh.faces, remendo]), process=False)
+    return remendada, {'buracos': n_lacos, 'faces_adicionadas': remendo, 'vertices_adicionados': novos}
+
+
+def reparar(mesh, max_arestas=MAX_ARESTAS_LACO, cancelar=None):
+    """Reparo automático: remendo local dos buracos (até max_arestas) e MeshFix global só se ainda não fechou.
+
+    cancelar (threading.Event), quando acionado, mata o subprocesso do MeshFix (InterruptedError).
+    """
+    import trimesh
+
+    if mesh.is_watertight:
+        return mesh.copy(), {'buracos': 0, 'meshfix': False}
+    remendada, info = preencher_buracos(mesh, max_arestas=max_arestas)
+    if AnaliseIncremental(remendada).watertight:
+        return remendada, {'buracos': info['buracos'], 'meshfix': False}
+    # Ainda aberta (não-manifold, buracos grandes): reparo global, num subprocesso (um segfault
+    # do MeshFix não derruba quem chamou) e com entrada limpa se a primeira tentativa falhar
+    vertices, faces, usados = executar_isolado(meshfix, mesh.vertices, mesh.faces, TENTATIVAS_MESHFIX,
+                                               descricao='MeshFix', cancelar=cancelar)
+    return trimesh.Trimesh(vertices=vertices, faces=faces), {'buracos': info['buracos'], 'meshfix': True,
+                                                             'parametros_meshfix': usados}
+
+
+def remover_duplicados(mesh, distancia=0.0001):
+    """Funde vértices a menos de distancia uns dos outros"""
+    import trimesh
+    from scipy import spatial
+
+    verts = mesh.vertices
+    faces = mesh.faces
+    tree = spatial.cKDTree(verts)
+    groups = tree.query_ball_point(verts, distancia)
+    # Mapear cada vértice para o menor índice do seu grupo
+    mapping = np.arange(len(verts))
+    for i, group in enumerate(groups):
+        mapping[i] = min(group)
+    new_faces = mapping[faces]
+    # Remover vértices não usados
+    unique, inverse = np.unique(new_faces, return_inverse=True)
+    merged = trimesh.Trimesh(vertices=verts[unique], faces=inverse.reshape(new_faces.shape), process=False)
+    return merged, {'vertices_removidos': len(verts) - len(unique)}
+
+
+def recalcular_normais(mesh, orientacao='out'):
+    """Reorienta as faces para fora ('out') ou para dentro ('in')"""
+    mesh = mesh.copy()
+    mesh.rezero()
+    mesh.fix_normals()
+    if orientacao == 'in':
+        mesh.invert()
+    return mesh, {}
+
+
+def suavizar(mesh, metodo='taubin', iteracoes=10, pesos='uniforme', fixar_borda=True, angulo_feicao=None, **parametros):
+    """Move os vértices: Taubin, HC ou Laplaciano simples com operador esparso em cache (ver suavizacao.py)"""
+    from suavizacao import suavizar_vertices
+
+    vertices, op = suavizar_vertices(mesh.vertices, mesh.faces, metodo, iteracoes, pesos, fixar_borda,
+                                     angulo_feicao, **parametros)
+    suavizada = mesh.copy()
+    suavizada.vertices = vertices
+    return suavizada, {'vertices_fixos': int(op.fixos.sum()), 'arestas_feicao': op.n_arestas_feicao}
+
+
+def simplificar(mesh, fator=0.5, particionado=False, workers=None, ao_terminar_cluster=None, cancelar=None):
+    """Decimação quadric edge collapse (pymeshlab) para fator * faces.
+
+    Com particionado (e malha grande), clusters decimados em paralelo e
+    costurados (ver decimacao_paralela.py). cancelar (threading.Event) mata os
+    subprocessos do pymeshlab.
+    """
+    import trimesh
+
+    if particionado and len(mesh.faces) >= MIN_FACES_PARTICIONAR:
+        vertices, faces, info = decimar_particionado(mesh.vertices, mesh.faces, fator, workers=workers,
+                                                     ao_terminar_cluster=ao_terminar_cluster, cancelar=cancelar)
+        return trimesh.Trimesh(vertices=vertices, faces=faces, process=True), info
+    alvo = int(len(mesh.faces) * fator)
+    # Sem optimalplacement na segunda tentativa: quádricas degeneradas não passam pelo sistema linear
+    vertices, faces, _ = pymeshlab_isolado(mesh.vertices, mesh.faces, [
+        [('meshing_decimation_quadric_edge_collapse', {'targetfacenum': alvo, 'preservenormal': True})],
+        [('meshing_decimation_quadric_edge_collapse', {'targetfacenum': alvo, 'optimalplacement': False})],
+    ], descricao='Simplificação', cancelar=cancelar)
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=True), {}
+
+
+def remesh_voxel(mesh, tamanho_voxel=1.0):
+    """Voxel remesh esparso: campo de distância só na faixa da superfície + marching cubes por bloco"""
+    import trimesh
+
+    vertices, faces = remesh_voxel_esparso(mesh.vertices, mesh.faces, tamanho_voxel)
+    if len(faces) == 0:
+        raise ValueError('O tamanho de voxel é grande demais para esta malha.')
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=True), {}
+
+
+def remesh_surface(mesh, comprimento=1.0, cancelar=None):
+    """Remesh isotrópico (pymeshlab) com comprimento alvo de aresta; cancelar como em simplificar"""
+    import trimesh
+
+    if comprimento <= 0:
+        raise ValueError('O comprimento da aresta deve ser positivo.')
+    remesh = ('meshing_isotropic_explicit_remeshing', {'targetlen': ('PureValue', comprimento)})
+    # Segunda tentativa: tira duplicados e geometria não-manifold, que travam o remesh
+    vertices, faces, _ = pymeshlab_isolado(mesh.vertices, mesh.faces, [
+        [remesh],
+        [('meshing_remove_duplicate_vertices', {}), ('meshing_remove_null_faces', {}),
+         ('meshing_repair_non_manifold_edges', {}), ('meshing_repair_non_manifold_vertices', {}), remesh],
+    ], descricao='Remesh', cancelar=cancelar)
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=True), {}
+
+
+def mesh_cleanup(mesh, min_faces=50):
+    """Remove componentes conexas com menos de min_faces faces"""
+    import trimesh
+
+    verts, faces, n_comps, n_removidas = remover_componentes_pequenos(mesh.vertices, mesh.faces, min_faces)
+    if len(faces) == 0:
+        raise ValueError('Nenhuma componente atende ao critério. Nada foi removido.')
+    limpa = trimesh.Trimesh(vertices=verts, faces=faces, process=True)
+    return limpa, {'componentes': n_comps, 'componentes_removidas': n_removidas}
+
+
+def subdivisao(mesh, iteracoes=1):
+    """Loop subdivision (vetorizada): cada iteração multiplica as faces por 4"""
+    import trimesh
+
+    vertices, faces = trimesh.remesh.subdivide_loop(mesh.vertices, mesh.faces, iterations=iteracoes)
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False), {}
+
+
+def solidificar(mesh, espessura=1.0):
+    """Casca: cópia deslocada pelas normais dos vértices, invertida, e paredes nas arestas de borda"""
+    import trimesh
+
+    if espessura <= 0:
+        raise ValueError('Espessura deve ser maior que 0 para criar casca')
+    n = len(mesh.vertices)
+    externos = mesh.vertices + mesh.vertex_normals * espessura
+    faces = np.asarray(mesh.faces, dtype=np.int64)
+    # Arestas de borda (a -> b) na orientação das faces; a parede (b, a, a', b') fecha a casca
+    a, b = arestas_de_borda(faces).T
+    paredes = np.concatenate([np.column_stack([b, a, a + n]), np.column_stack([b, a + n, b + n])])
+    casca = trimesh.Trimesh(vertices=np.vstack([mesh.vertices, externos]),
+                            faces=np.concatenate([faces, faces[:, ::-1] + n, paredes]), process=True)
+    casca.fix_normals()
+    return casca, {'arestas_borda': len(a)}
+
+
+def resolver_intersecoes(mesh, anel=1, iteracoes=3):
+    """Remove as regiões que se autointersectam e remenda cada uma localmente (ver autointersecao.py)"""
+    import trimesh
+
+    vertices, faces, info = resolver_autointersecoes(mesh.vertices, mesh.faces, anel=anel, iteracoes=iteracoes)
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False), info
+
+
+def reordenar_localidade(mesh):
+    """Vértices na ordem de Morton e faces ordenadas por vértice (só muda a ordem, não a geometria)"""
+    from localidade import reordenar
+
+    return reordenar(mesh)
+
+
+def estatisticas(mesh):
+    """Não altera a malha; info traz contagens, área e volume (volume só se fechada)"""
+    analise = AnaliseIncremental(mesh)
+    info = {
+        'vertices': len(mesh.vertices), 'faces': len(mesh.faces), 'watertight': analise.watertight,
+        'arestas_abertas': analise.n_arestas_abertas, 'arestas_nao_manifold': analise.n_arestas_nao_manifold,
+        'vertices_duplicados': analise.n_duplicados, 'area': float(mesh.area),
+    }
+    if analise.watertight:
+        info['volume'] = float(mesh.volume)
+    return mesh, info
+
+
+# Modelos de custo (custo_memoria) das operações que podem estourar a memória
+ESTIMATIVAS = {
+    'subdivisao': lambda mesh, iteracoes=1: estimar_subdivisao(len(mesh.vertices), len(mesh.faces), iteracoes),
+    'remesh_voxel': lambda mesh, tamanho_voxel=1.0: estimar_remesh_voxel(mesh.area, len(mesh.faces), tamanho_voxel),
+    'solidificar': lambda mesh, espessura=1.0: estimar_solidificar(
+        len(mesh.vertices), len(mesh.faces), len(arestas_de_borda(mesh.faces))),
+}
+
+
+def estimar_custo(nome, mesh, **parametros):
+    """Saída e pico de memória previstos para a operação, ou None se ela não tem modelo de custo"""
+    if nome not in ESTIMATIVAS:
+        return None
+    return ESTIMATIVAS[nome](mesh, **parametros)
+
+
+# Nome -> função; é a lista de operações aceitas pelo serviço
+OPERACOES = {
+    'reparar': reparar,
+    'preencher_buracos': preencher_buracos,
+    'remover_duplicados': remover_duplicados,
+    'recalcular_normais': recalcular_normais,
+    'suavizar': suavizar,
+    'simplificar': simplificar,
+    'remesh_voxel': remesh_voxel,
+    'remesh_surface': remesh_surface,
+    'mesh_cleanup': mesh_cleanup,
+    'subdivisao': subdivisao,
+    'solidificar': solidificar,
+    'resolver_intersecoes': resolver_intersecoes,
+    'reordenar_localidade': reordenar_localidade,
+    'estatisticas': estatisticas,
+}
+
+
+def executar(nome, mesh, **parametros):
+    """Executa uma operação do registro pelo nome"""
+    if nome not in OPERACOES:
+        raise ValueError(f'Operação desconhecida: {nome}')
+    return OPERACOES[nome](mesh, **parametros)
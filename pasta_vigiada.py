@@ -0,0 +1,320 @@
+"""Modo vigia: repara automaticamente as malhas que chegam numa pasta (ex.: compartilhamento de rede).
+
+Uso: python reparar_malha.py --vigiar PASTA [--workers N] [--intervalo 2] [--estabilidade 5] [--recursivo]
+                                             [--tempo-limite 1800]
+
+Um arquivo só é despachado depois de ficar `estabilidade` segundos sem mudar
+de tamanho nem de mtime: upload em andamento não é lido pela metade. Ao lado
+de peca.stl ficam peca_reparado.stl e peca.stl.relatorio.json; o relatório
+guarda tamanho e mtime_ns da entrada reparada e marca o arquivo como
+processado (um reinício não repete o trabalho e um arquivo substituído, mesmo
+por uma cópia com mtime antigo, é reprocessado). Um reparo que passa de
+`tempo_limite` segundos ganha relatório de erro e o worker travado é morto.
+Se um processo do pool morre (ex.: falta de memória), os arquivos que estavam
+no pool repetem cada um no seu processo: só o culpado fica com o erro.
+
+A pasta é varrida a cada `intervalo` segundos; com o pacote watchdog
+instalado, eventos do inotify acordam a varredura antes disso (em shares de
+rede o inotify não vê escritas remotas, então a varredura periódica fica).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from buracos import MAX_ARESTAS_LACO
+from custo_memoria import BYTES_POR_FACE, cabe, memoria_disponivel
+
+ENTRADAS = ('.stl', '.obj', '.ply', '.off', '.glb', '.3mf', '.md3d')
+SUFIXO_RELATORIO = '.relatorio.json'
+# Nomes típicos de upload ainda em andamento (e o temporário da própria exportação)
+TEMPORARIOS = ('.part', '.partial', '.parcial', '.tmp', '.crdownload', '~')
+# STL binário: ~50 bytes por face; formatos de texto gastam mais, então a estimativa fica por cima
+BYTES_ARQUIVO_POR_FACE = 50
+# Segundos de parede por reparo (o MeshFix sozinho pode levar 3 tentativas x 300 s)
+TEMPO_LIMITE = 1800
+
+
+def caminho_relatorio(caminho):
+    return caminho + SUFIXO_RELATORIO
+
+
+def eh_entrada(nome):
+    """Malha de entrada: não é saída do reparo, cache .md3d, relatório nem upload incompleto"""
+    minusculo = nome.lower()
+    base, extensao = os.path.splitext(minusculo)
+    if extensao not in ENTRADAS or nome.startswith('.') or minusculo.endswith(TEMPORARIOS):
+        return False
+    # peca.stl.md3d é o cache nativo de peca.stl
+    if extensao == '.md3d' and os.path.splitext(base)[1] in ENTRADAS:
+        return False
+    return not base.endswith('_reparado')
+
+
+def assinatura(caminho):
+    """(tamanho, mtime_ns) da entrada: o relatório guarda a da versão reparada"""
+    estado = os.stat(caminho)
+    return estado.st_size, estado.st_mtime_ns
+
+
+def ja_processado(caminho):
+    """True se o relatório é da versão atual do arquivo (mesmos tamanho e mtime_ns).
+
+    Comparar o mtime do relatório com o do arquivo erra com cópias que
+    preservam o mtime (cp -p, rsync -a): a entrada nova parece mais velha.
+    Relatórios sem a assinatura (versões antigas) não contam.
+    """
+    try:
+        with open(caminho_relatorio(caminho), encoding='utf-8') as f:
+            relatorio = json.load(f)
+        return [relatorio.get('tamanho_entrada'), relatorio.get('mtime_ns_entrada')] == list(assinatura(caminho))
+    except (OSError, ValueError):
+        return False
+
+
+def pico_estimado(tamanho_arquivo):
+    """Pico de memória previsto para reparar um arquivo deste tamanho (malha lida + reparada)"""
+    return 2 * BYTES_POR_FACE * (tamanho_arquivo // BYTES_ARQUIVO_POR_FACE)
+
+
+def gravar_relatorio(caminho, relatorio):
+    """JSON ao lado do arquivo, gravado num temporário e renomeado (ninguém lê pela metade)"""
+    destino = caminho_relatorio(caminho)
+    with open(destino + '.parcial', 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    os.replace(destino + '.parcial', destino)
+
+
+def _reparar(caminho, max_arestas, cache, compressao):
+    """Roda num processo do pool"""
+    from reparar_malha import reparar_malha
+
+    inicio = time.perf_counter()
+    resumo = reparar_malha(caminho, cache=cache, compressao=compressao, max_arestas=max_arestas)
+    resumo['segundos'] = time.perf_counter() - inicio
+    return resumo
+
+
+def _matar(executor):
+    """Mata os processos do pool e o desliga sem esperar (um worker pode estar travado)"""
+    # ProcessPoolExecutor só ganhou terminate_workers no Python 3.14 (e shutdown esquece os processos)
+    for processo in list((getattr(executor, '_processes', None) or {}).values()):
+        processo.kill()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+class VigiaPasta:
+    """Varre a pasta, espera os arquivos estabilizarem e despacha os reparos para um pool de processos.
+
+    Contrapressão: no máximo limite_fila reparos em andamento (padrão: um por
+    worker) e um novo só começa se o pico previsto couber na memória livre
+    descontados os picos previstos dos que já estão em andamento; o resto
+    espera na fila só como caminho, sem ser lido.
+    """
+
+    def __init__(self, pasta, workers=None, intervalo=2.0, estabilidade=5.0, limite_fila=None, recursivo=False,
+                 max_arestas=MAX_ARESTAS_LACO, cache=True, compressao=None, tempo_limite=TEMPO_LIMITE):
+        self.pasta = pasta
+        self.workers = workers or os.cpu_count() or 1
+        self.intervalo = intervalo
+        self.estabilidade = estabilidade
+        self.limite_fila = limite_fila or self.workers
+        self.recursivo = recursivo
+        # Laços maiores que max_arestas ficam para o MeshFix: o custo do remendo local fica limitado
+        self.parametros = (max_arestas or MAX_ARESTAS_LACO, cache, compressao)
+        self.tempo_limite = tempo_limite
+        # caminho -> (tamanho, mtime_ns, instante da última mudança)
+        self.observados = {}
+        self.fila = deque()
+        # futuro -> (caminho, instante do despacho, assinatura da entrada despachada)
+        self.em_andamento = {}
+        # Arquivos que estavam num pool que quebrou: a próxima execução é sozinha, num pool próprio
+        self.sozinhos = set()
+        # futuro -> pool de um processo só de um arquivo em self.sozinhos
+        self.proprios = {}
+        self.processados = 0
+        self._acordar = threading.Event()
+
+    def listar(self):
+        """Entradas da pasta ainda sem relatório atualizado"""
+        pastas = [self.pasta]
+        while pastas:
+            with os.scandir(pastas.pop()) as itens:
+                for item in itens:
+                    if item.is_dir(follow_symlinks=False):
+                        if self.recursivo and not item.name.startswith('.'):
+                            pastas.append(item.path)
+                    elif item.is_file() and eh_entrada(item.name) and not ja_processado(item.path):
+                        yield item.path
+
+    def varrer(self, agora=None):
+        """Atualiza tamanho/mtime dos arquivos; os que ficaram estáveis entram na fila (e são retornados)"""
+        agora = time.monotonic() if agora is None else agora
+        ocupados = set(self.fila) | {caminho for caminho, _, _ in self.em_andamento.values()}
+        vistos, estaveis = set(), []
+        for caminho in self.listar():
+            if caminho in ocupados:
+                continue
+            try:
+                estado = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            vistos.add(caminho)
+            chave = (estado.st_size, estado.st_mtime_ns)
+            anterior = self.observados.get(caminho)
+            if anterior is None or anterior[:2] != chave:
+                self.observados[caminho] = (*chave, agora)
+            elif estado.st_size > 0 and agora - anterior[2] >= self.estabilidade:
+                del self.observados[caminho]
+                self.fila.append(caminho)
+                estaveis.append(caminho)
+        # Arquivos apagados/renomeados antes de estabilizar
+        for caminho in set(self.observados) - vistos:
+            del self.observados[caminho]
+        return estaveis
+
+    def despachar(self, executor):
+        """Submete da fila enquanto houver vaga e memória; retorna quantos foram submetidos"""
+        submetidos = 0
+        while self.fila and len(self.em_andamento) < self.limite_fila:
+            caminho = self.fila[0]
+            try:
+                entrada = assinatura(caminho)
+            except FileNotFoundError:
+                self.fila.popleft()
+                continue
+            pico = pico_estimado(entrada[0])
+            # Os já submetidos podem não ter alocado ainda: o pico previsto deles sai da memória livre
+            livre = memoria_disponivel()
+            if livre is not None:
+                livre -= sum(pico_estimado(e[0]) for _, _, e in self.em_andamento.values())
+            # Sempre deixa um rodar: senão um arquivo enorme esperaria para sempre
+            if self.em_andamento and not cabe({'pico_bytes': pico}, livre):
+                break
+            self.fila.popleft()
+            if caminho in self.sozinhos:
+                proprio = ProcessPoolExecutor(max_workers=1)
+                futuro = proprio.submit(_reparar, caminho, *self.parametros)
+                self.proprios[futuro] = proprio
+            else:
+                futuro = executor.submit(_reparar, caminho, *self.parametros)
+            self.em_andamento[futuro] = (caminho, time.time(), entrada)
+            submetidos += 1
+        return submetidos
+
+    def coletar(self, prontos):
+        """Grava o relatório de cada reparo terminado; retorna True se o pool compartilhado morreu"""
+        pool_quebrado = False
+        for futuro in prontos:
+            caminho, inicio, entrada = self.em_andamento.pop(futuro)
+            proprio = self.proprios.pop(futuro, None)
+            if proprio is not None:
+                proprio.shutdown()
+            relatorio = {'entrada': caminho, 'tamanho_entrada': entrada[0], 'mtime_ns_entrada': entrada[1],
+                         'inicio': inicio, 'fim': time.time()}
+            try:
+                relatorio.update(estado='ok', erro=None, **futuro.result())
+            except BrokenProcessPool:
+                if proprio is None:
+                    # Pool compartilhado: não dá para saber qual arquivo foi o culpado, cada um repete sozinho
+                    pool_quebrado = True
+                    self.sozinhos.add(caminho)
+                    self.fila.appendleft(caminho)
+                    continue
+                relatorio.update(estado='erro', erro='O processo de reparo morreu (falta de memória?)')
+            except Exception as e:
+                relatorio.update(estado='erro', erro=f'{type(e).__name__}: {e}')
+            self._registrar(caminho, relatorio)
+        return pool_quebrado
+
+    def expirar(self, agora=None):
+        """Relatório de erro para os reparos além do tempo limite; retorna True se algum do pool compartilhado
+        expirou (pool a matar). Um reparo num pool próprio tem o seu processo morto aqui mesmo."""
+        agora = time.time() if agora is None else agora
+        expirados = [futuro for futuro, (_, inicio, _) in self.em_andamento.items()
+                     if not futuro.done() and agora - inicio > self.tempo_limite]
+        compartilhado = False
+        for futuro in expirados:
+            caminho, inicio, entrada = self.em_andamento.pop(futuro)
+            proprio = self.proprios.pop(futuro, None)
+            if proprio is None:
+                compartilhado = True
+            else:
+                _matar(proprio)
+            self._registrar(caminho, {'entrada': caminho, 'tamanho_entrada': entrada[0], 'mtime_ns_entrada': entrada[1],
+                                      'inicio': inicio, 'fim': agora, 'estado': 'erro',
+                                      'erro': f'Tempo limite de {self.tempo_limite:g} s esgotado'})
+        return compartilhado
+
+    def _registrar(self, caminho, relatorio):
+        gravar_relatorio(caminho, relatorio)
+        self.sozinhos.discard(caminho)
+        self.processados += 1
+        print(f"{os.path.basename(caminho)}: {relatorio['estado']}"
+              + (f" ({relatorio['erro']})" if relatorio['erro'] else f" -> {os.path.basename(relatorio['saida'])}"))
+
+    def _recriar_pool(self, executor, quebrado=False):
+        """Mata os workers (um pode estar travado) e devolve à fila o que ainda estava no pool.
+
+        Com quebrado (um processo morreu), esses arquivos também podem ser o
+        culpado e repetem sozinhos. Os reparos em pools próprios seguem.
+        """
+        _matar(executor)
+        for futuro in [f for f in self.em_andamento if f not in self.proprios]:
+            caminho = self.em_andamento.pop(futuro)[0]
+            self.fila.appendleft(caminho)
+            if quebrado:
+                self.sozinhos.add(caminho)
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def _observar_eventos(self):
+        """inotify (watchdog) acorda a varredura; sem o pacote, fica só a varredura periódica"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+        acordar = self._acordar
+
+        class AoMudar(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                acordar.set()
+
+        observador = Observer()
+        observador.schedule(AoMudar(), self.pasta, recursive=self.recursivo)
+        observador.daemon = True
+        observador.start()
+        return observador
+
+    def executar(self, parar=None):
+        """Laço principal, até parar (threading.Event) ser acionado ou Ctrl+C"""
+        parar = parar or threading.Event()
+        observador = self._observar_eventos()
+        print(f"Vigiando {self.pasta} ({self.workers} worker(s), "
+              f"{'inotify + ' if observador else ''}varredura a cada {self.intervalo:g} s)")
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while not parar.is_set():
+                self.varrer()
+                self.despachar(executor)
+                if self.em_andamento:
+                    prontos, _ = wait(self.em_andamento, timeout=self.intervalo, return_when=FIRST_COMPLETED)
+                    # Pool quebrado ou worker travado: os outros reparos em andamento recomeçam num pool novo
+                    quebrado = self.coletar(prontos)
+                    if self.expirar() or quebrado:
+                        executor = self._recriar_pool(executor, quebrado)
+                else:
+                    self._acordar.wait(self.intervalo)
+                    self._acordar.clear()
+        except KeyboardInterrupt:
+            print("Encerrando: esperando os reparos em andamento...")
+        finally:
+            for proprio in [executor] + list(self.proprios.values()):
+                proprio.shutdown(wait=True, cancel_futures=True)
+            self.coletar([f for f in list(self.em_andamento) if f.done() and not f.cancelled()])
+            if observador is not None:
+                observador.stop()
+        return self.processados
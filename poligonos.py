@@ -0,0 +1,330 @@
+"""Malhas poligonais em layout CSR (offsets + índices) e conversões tri <-> quad."""
+import numpy as np
+
+from analise_incremental import chaves_arestas
+
+
+class MalhaPoligonal:
+    """Faces de tamanho variável: a face i usa indices[offsets[i]:offsets[i + 1]]"""
+
+    def __init__(self, vertices, offsets, indices):
+        self.vertices = np.asarray(vertices, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    @classmethod
+    def de_faces(cls, vertices, *grupos):
+        """Monta a malha a partir de arrays homogêneos de faces, ex.: (quads, triangulos)"""
+        grupos = [np.asarray(g, dtype=np.int64) for g in grupos if len(g) > 0]
+        if not grupos:
+            return cls(vertices, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        tamanhos = np.concatenate([np.full(len(g), g.shape[1]) for g in grupos])
+        offsets = np.concatenate([[0], np.cumsum(tamanhos)])
+        indices = np.concatenate([g.ravel() for g in grupos])
+        return cls(vertices, offsets, indices)
+
+    @property
+    def n_faces(self):
+        return len(self.offsets) - 1
+
+    @property
+    def tamanhos(self):
+        return np.diff(self.offsets)
+
+    def contagem_por_tamanho(self):
+        """Dicionário {número de vértices: quantidade de faces}"""
+        tamanhos, contagens = np.unique(self.tamanhos, return_counts=True)
+        return {int(t): int(c) for t, c in zip(tamanhos, contagens)}
+
+    def arestas(self):
+        """Arestas únicas das faces poligonais (sem as diagonais da triangulação)"""
+        proximo = np.arange(1, len(self.indices) + 1)
+        # O último canto de cada face liga de volta ao primeiro
+        proximo[self.offsets[1:] - 1] = self.offsets[:-1]
+        arestas = np.column_stack([self.indices, self.indices[proximo]])
+        arestas.sort(axis=1)
+        return np.unique(arestas, axis=0)
+
+    def faces_de_tamanho(self, tamanho):
+        """Retorna (índices das faces, array (n, tamanho)) das faces com esse número de vértices"""
+        faces = np.flatnonzero(self.tamanhos == tamanho)
+        cantos = self.offsets[faces][:, None] + np.arange(tamanho)
+        return faces, self.indices[cantos]
+
+    def triangular(self, metodo='leque', vertices=None):
+        """Triangula todas as faces, vetorizado por tamanho de face.
+
+        metodo='leque' liga o primeiro vértice aos demais (exato para faces
+        convexas); metodo='orelhas' usa ear clipping e respeita faces côncavas.
+        """
+        if vertices is None:
+            vertices = self.vertices
+        triangulos = []
+        for tamanho in np.unique(self.tamanhos):
+            if tamanho < 3:
+                continue
+            _, faces = self.faces_de_tamanho(tamanho)
+            if tamanho == 3:
+                triangulos.append(faces)
+            elif metodo == 'orelhas' and tamanho > 4:
+                triangulos.append(triangular_orelhas(vertices, faces))
+            elif metodo == 'orelhas':
+                triangulos.append(triangular_quads(vertices, faces))
+            else:
+                triangulos.append(triangular_leque(faces))
+        if not triangulos:
+            return np.zeros((0, 3), dtype=np.int64)
+        return np.concatenate(triangulos)
+
+
+def triangular_leque(faces):
+    """Leque a partir do primeiro vértice para um bloco (n, k) de faces de mesmo tamanho"""
+    tamanho = faces.shape[1]
+    leque = np.arange(1, tamanho - 1)
+    tris = np.stack([
+        np.repeat(faces[:, :1], tamanho - 2, axis=1),
+        faces[:, leque],
+        faces[:, leque + 1],
+    ], axis=2)
+    return tris.reshape(-1, 3)
+
+
+def triangular_quads(vertices, quads):
+    """Divide cada quad pela diagonal mais curta (a correta em quads côncavos)"""
+    pontos = vertices[quads]
+    diagonal_02 = np.linalg.norm(pontos[:, 2] - pontos[:, 0], axis=1)
+    diagonal_13 = np.linalg.norm(pontos[:, 3] - pontos[:, 1], axis=1)
+    usa_13 = diagonal_13 < diagonal_02
+    rotacionados = np.where(usa_13[:, None], np.roll(quads, -1, axis=1), quads)
+    return triangular_leque(rotacionados)
+
+
+def projetar_no_plano(pontos):
+    """Projeta blocos (n, k, 3) de polígonos no plano da normal de Newell, orientados no sentido anti-horário"""
+    atual = pontos
+    seguinte = np.roll(pontos, -1, axis=1)
+    normal = np.stack([
+        ((atual[..., 1] - seguinte[..., 1]) * (atual[..., 2] + seguinte[..., 2])).sum(axis=1),
+        ((atual[..., 2] - seguinte[..., 2]) * (atual[..., 0] + seguinte[..., 0])).sum(axis=1),
+        ((atual[..., 0] - seguinte[..., 0]) * (atual[..., 1] + seguinte[..., 1])).sum(axis=1),
+    ], axis=1)
+    normal /= np.maximum(np.linalg.norm(normal, axis=1), 1e-300)[:, None]
+    # Base ortonormal (u, v) com u x v = normal
+    auxiliar = np.where(np.abs(normal[:, :1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+    u = np.cross(auxiliar, normal)
+    u /= np.maximum(np.linalg.norm(u, axis=1), 1e-300)[:, None]
+    v = np.cross(normal, u)
+    return np.stack([np.einsum('nkj,nj->nk', pontos, u), np.einsum('nkj,nj->nk', pontos, v)], axis=2)
+
+
+def triangular_orelhas(vertices, faces, bloco=2_000_000):
+    """Ear clipping vetorizado sobre um bloco (n, k) de polígonos de mesmo tamanho.
+
+    Cada passo corta as orelhas não adjacentes de todos os polígonos ao mesmo
+    tempo (O(n * k^2) por passo, O(log k) passos num laço quase convexo; no pior
+    caso, uma espiral, continuam k passos). Processado em fatias para limitar a
+    memória em k^2 por polígono.
+    """
+    n, tamanho = faces.shape
+    fatia = max(1, bloco // (tamanho * tamanho))
+    resultado = []
+    for inicio in range(0, n, fatia):
+        resultado.append(_orelhas_bloco(vertices, faces[inicio:inicio + fatia]))
+    return np.concatenate(resultado)
+
+
+def _orelhas_bloco(vertices, faces):
+    n, tamanho = faces.shape
+    pontos = projetar_no_plano(vertices[faces])
+    linhas = np.arange(n)[:, None]
+    anterior = np.tile((np.arange(tamanho) - 1) % tamanho, (n, 1))
+    seguinte = np.tile((np.arange(tamanho) + 1) % tamanho, (n, 1))
+    vivo = np.ones((n, tamanho), dtype=bool)
+    restantes = np.full(n, tamanho)
+    # Prioridade por canto: entre orelhas vizinhas só a de maior prioridade é cortada no passo
+    prioridade = np.random.default_rng(0).permutation(tamanho)[None, :]
+    poligono, tris = [], []
+    while (restantes > 3).any():
+        if restantes.max() <= tamanho // 2:
+            # Compacta os cantos vivos (na ordem do ciclo) no começo das linhas: o passo é O(k^2)
+            tamanho = int(restantes.max())
+            vivos = np.argsort(~vivo, axis=1, kind='stable')[:, :tamanho]
+            pontos, faces = pontos[linhas, vivos], faces[linhas, vivos]
+            posicao = np.arange(tamanho)[None, :]
+            vivo = posicao < restantes[:, None]
+            anterior = (posicao - 1) % restantes[:, None]
+            seguinte = (posicao + 1) % restantes[:, None]
+            prioridade = prioridade[0, vivos[0]][None, :]
+        proprio = np.eye(tamanho, dtype=bool)[None]
+        a = pontos[linhas, anterior]
+        c = pontos[linhas, seguinte]
+        ab = pontos - a
+        bc = c - pontos
+        convexo = vivo & (ab[..., 0] * bc[..., 1] - ab[..., 1] * bc[..., 0] > 0)
+        # Nenhum outro vértice vivo pode estar estritamente dentro do triângulo (a, b, c)
+        q = pontos[:, None, :, :]
+        lado_ab = _lado(a[:, :, None], pontos[:, :, None], q)
+        lado_bc = _lado(pontos[:, :, None], c[:, :, None], q)
+        lado_ca = _lado(c[:, :, None], a[:, :, None], q)
+        dentro = (lado_ab > 0) & (lado_bc > 0) & (lado_ca > 0)
+        vizinhos = proprio | (np.arange(tamanho)[None, None, :] == anterior[:, :, None]) | \
+            (np.arange(tamanho)[None, None, :] == seguinte[:, :, None])
+        dentro &= vivo[:, None, :] & ~vizinhos
+        orelha = convexo & ~dentro.any(axis=2) & (restantes > 3)[:, None]
+        # Orelhas não adjacentes continuam orelhas depois de cortadas juntas: várias por passo,
+        # então um laço quase convexo de k cantos termina em O(log k) passos em vez de k
+        corta = orelha & ~(orelha[linhas, anterior] & (prioridade[0, anterior] > prioridade)) & \
+            ~(orelha[linhas, seguinte] & (prioridade[0, seguinte] > prioridade))
+        # Polígonos degenerados sem orelha válida cortam o primeiro vértice vivo
+        sem_orelha = ~orelha.any(axis=1) & (restantes > 3)
+        corta[np.flatnonzero(sem_orelha), vivo[sem_orelha].argmax(axis=1)] = True
+        # Nunca abaixo de 3 cantos vivos
+        corta &= np.cumsum(corta, axis=1) <= (restantes - 3)[:, None]
+        linha, escolha = np.nonzero(corta)
+        ant = anterior[linha, escolha]
+        seg = seguinte[linha, escolha]
+        poligono.append(linha)
+        tris.append(np.column_stack([faces[linha, ant], faces[linha, escolha], faces[linha, seg]]))
+        seguinte[linha, ant] = seg
+        anterior[linha, seg] = ant
+        vivo[linha, escolha] = False
+        restantes -= np.bincount(linha, minlength=n)
+    linha = np.arange(n)
+    ultimo = vivo.argmax(axis=1)
+    poligono.append(linha)
+    tris.append(np.column_stack([
+        faces[linha, anterior[linha, ultimo]], faces[linha, ultimo], faces[linha, seguinte[linha, ultimo]],
+    ]))
+    # Reagrupa para manter os triângulos de cada polígono consecutivos
+    ordem = np.argsort(np.concatenate(poligono), kind='stable')
+    return np.concatenate(tris)[ordem]
+
+
+def _lado(p0, p1, q):
+    return (p1[..., 0] - p0[..., 0]) * (q[..., 1] - p0[..., 1]) - (p1[..., 1] - p0[..., 1]) * (q[..., 0] - p0[..., 0])
+
+
+def carregar_obj_poligonal(caminho):
+    """Lê um OBJ preservando as faces poligonais (quads, n-gons) em layout CSR"""
+    vertices = []
+    faces = []
+    referencias = []
+    with open(caminho, 'r', encoding='utf-8', errors='replace') as f:
+        for linha in f:
+            if linha.startswith('v '):
+                vertices.append(linha.split()[1:4])
+            elif linha.startswith('f '):
+                faces.append(linha)
+                # Índices negativos são relativos aos vértices lidos até aqui
+                referencias.append(len(vertices))
+    vertices = np.array(vertices, dtype=np.float64).reshape(-1, 3)
+    if not faces:
+        return MalhaPoligonal(vertices, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    tokens = [linha.split()[1:] for linha in faces]
+    tamanhos = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    # Descarta texturas/normais ("v/vt/vn") e converte de base 1 para base 0
+    indices = np.array([t.partition('/')[0] for face in tokens for t in face], dtype=np.int64)
+    base = np.repeat(np.asarray(referencias, dtype=np.int64), tamanhos)
+    indices = np.where(indices < 0, base + indices, indices - 1)
+    offsets = np.concatenate([[0], np.cumsum(tamanhos)])
+    return MalhaPoligonal(vertices, offsets, indices)
+
+
+def pares_adjacentes(faces):
+    """Pares de triângulos que compartilham uma aresta manifold e o quad (a, d, b, c) que formam"""
+    faces = np.asarray(faces, dtype=np.int64)
+    chaves = chaves_arestas(faces)
+    ordem = np.argsort(chaves, kind='stable')
+    ordenadas = chaves[ordem]
+    inicio = np.flatnonzero(np.r_[True, ordenadas[1:] != ordenadas[:-1]])
+    tamanho_run = np.diff(np.r_[inicio, len(ordenadas)])
+    # Só arestas compartilhadas por exatamente duas faces
+    inicio = inicio[tamanho_run == 2]
+    primeiro, segundo = ordem[inicio], ordem[inicio + 1]
+    f1, j1 = primeiro // 3, primeiro % 3
+    f2, j2 = segundo // 3, segundo % 3
+    a = faces[f1, j1]
+    b = faces[f1, (j1 + 1) % 3]
+    c = faces[f1, (j1 + 2) % 3]
+    d = faces[f2, (j2 + 2) % 3]
+    quads = np.column_stack([a, d, b, c])
+    validos = (f1 != f2) & (d != a) & (d != b) & (d != c)
+    return f1[validos], f2[validos], quads[validos]
+
+
+def pontuar_quads(vertices, quads, normais_1, normais_2):
+    """Qualidade de cada quad candidato (menor é melhor) e máscara de convexidade"""
+    pontos = vertices[quads]
+    anterior = np.roll(pontos, 1, axis=1) - pontos
+    seguinte = np.roll(pontos, -1, axis=1) - pontos
+    normas = np.linalg.norm(anterior, axis=2) * np.linalg.norm(seguinte, axis=2)
+    cosseno = np.einsum('ijk,ijk->ij', anterior, seguinte) / np.where(normas > 0, normas, 1.0)
+    angulos = np.arccos(np.clip(cosseno, -1.0, 1.0))
+    # Desvio médio dos ângulos internos em relação a 90°, normalizado para [0, 1]
+    desvio_angulo = np.abs(angulos - np.pi / 2).mean(axis=1) / (np.pi / 2)
+    # Planaridade: 0 quando os dois triângulos são coplanares
+    planaridade = 1.0 - np.clip(np.einsum('ij,ij->i', normais_1, normais_2), -1.0, 1.0)
+    normal_media = normais_1 + normais_2
+    cantos = np.cross(seguinte, anterior)
+    convexo = (np.einsum('ijk,ik->ij', cantos, normal_media) > 0).all(axis=1)
+    return planaridade + desvio_angulo, convexo
+
+
+def emparelhar_guloso(f1, f2, pontuacao, n_faces):
+    """Emparelhamento guloso por pontuação, em rodadas vetorizadas de melhores mútuos.
+
+    Em cada rodada cada face escolhe o seu melhor candidato livre; um par entra
+    quando é a melhor escolha das duas faces. O resultado é o mesmo do guloso
+    sequencial sobre a lista ordenada, sem laço Python por aresta.
+    """
+    ranking = np.empty(len(pontuacao), dtype=np.int64)
+    ranking[np.argsort(pontuacao, kind='stable')] = np.arange(len(pontuacao))
+    pareada = np.zeros(n_faces, dtype=bool)
+    escolhidos = []
+    ativos = np.arange(len(pontuacao))
+    while len(ativos) > 0:
+        melhor = np.full(n_faces, len(pontuacao), dtype=np.int64)
+        np.minimum.at(melhor, f1[ativos], ranking[ativos])
+        np.minimum.at(melhor, f2[ativos], ranking[ativos])
+        aceitos = ativos[(melhor[f1[ativos]] == ranking[ativos]) & (melhor[f2[ativos]] == ranking[ativos])]
+        escolhidos.append(aceitos)
+        pareada[f1[aceitos]] = True
+        pareada[f2[aceitos]] = True
+        ativos = ativos[~(pareada[f1[ativos]] | pareada[f2[ativos]])]
+    if not escolhidos:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(escolhidos)
+
+
+def quadrangular(vertices, faces, angulo_max=40.0, desvio_max=0.6):
+    """Converte uma malha triangular em malha quad-dominante (MalhaPoligonal).
+
+    Pares com ângulo entre normais acima de angulo_max (graus), quads não
+    convexos ou com desvio médio de ângulo acima de desvio_max (fração de 90°)
+    são descartados; os triângulos que sobram ficam na malha como triângulos.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    # Triângulos degenerados (índices repetidos) não participam
+    validas = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+    f1, f2, quads = pares_adjacentes(faces)
+    mantidos = validas[f1] & validas[f2]
+    f1, f2, quads = f1[mantidos], f2[mantidos], quads[mantidos]
+
+    tris = vertices[faces]
+    normais = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    comprimentos = np.linalg.norm(normais, axis=1)
+    normais /= np.where(comprimentos > 0, comprimentos, 1.0)[:, None]
+
+    pontuacao, convexo = pontuar_quads(vertices, quads, normais[f1], normais[f2])
+    planaridade_max = 1.0 - np.cos(np.deg2rad(angulo_max))
+    planaridade = 1.0 - np.clip(np.einsum('ij,ij->i', normais[f1], normais[f2]), -1.0, 1.0)
+    aceitaveis = convexo & (planaridade <= planaridade_max) & (pontuacao - planaridade <= desvio_max)
+    f1, f2, quads, pontuacao = f1[aceitaveis], f2[aceitaveis], quads[aceitaveis], pontuacao[aceitaveis]
+
+    escolhidos = emparelhar_guloso(f1, f2, pontuacao, len(faces))
+    pareada = np.zeros(len(faces), dtype=bool)
+    pareada[f1[escolhidos]] = True
+    pareada[f2[escolhidos]] = True
+    restantes = faces[validas & ~pareada]
+    return MalhaPoligonal.de_faces(vertices, quads[escolhidos], restantes)
@@ -0,0 +1,224 @@
+"""Ponto mais próximo na superfície de uma malha: índice espacial reutilizável e interpolação baricêntrica."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from compacto import compactar
+
+
+def _dot(u, v):
+    return np.einsum('...i,...i->...', u, v)
+
+
+def ponto_mais_proximo_triangulo(p, a, b, c):
+    """Ponto de cada triângulo (a, b, c) mais próximo de p, vetorizado (Ericson, Real-Time Collision Detection).
+
+    Retorna (pontos, baricentricas) com baricentricas (n, 3) em relação a (a, b, c).
+    """
+    ab, ac, ap = b - a, c - a, p - a
+    d1, d2 = _dot(ab, ap), _dot(ac, ap)
+    bp = p - b
+    d3, d4 = _dot(ab, bp), _dot(ac, bp)
+    cp = p - c
+    d5, d6 = _dot(ab, cp), _dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Interior; as regiões abaixo sobrescrevem na ordem inversa da precedência
+        soma = va + vb + vc
+        v, w = vb / soma, vc / soma
+        regiao = (va <= 0) & (d4 >= d3) & (d5 >= d6)
+        t = (d4 - d3)[regiao] / ((d4 - d3) + (d5 - d6))[regiao]
+        v[regiao], w[regiao] = 1 - t, t
+        regiao = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        v[regiao], w[regiao] = 0, d2[regiao] / (d2 - d6)[regiao]
+        regiao = (d6 >= 0) & (d5 <= d6)
+        v[regiao], w[regiao] = 0, 1
+        regiao = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        v[regiao], w[regiao] = d1[regiao] / (d1 - d3)[regiao], 0
+        regiao = (d3 >= 0) & (d4 <= d3)
+        v[regiao], w[regiao] = 1, 0
+        regiao = (d1 <= 0) & (d2 <= 0)
+        v[regiao], w[regiao] = 0, 0
+    # Triângulos degenerados sem região válida ficam com o primeiro vértice
+    invalidos = ~(np.isfinite(v) & np.isfinite(w))
+    v[invalidos], w[invalidos] = 0, 0
+    pontos = a + v[..., None] * ab + w[..., None] * ac
+    return pontos, np.stack([1 - v - w, v, w], axis=-1)
+
+
+def _centroides_subdivididos(vertices, faces, n):
+    """Centroides dos n² subtriângulos de cada face (subdivisão uniforme) e a face de origem"""
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+    cima = (i + j <= n - 1)
+    baixo = (i + j <= n - 2)
+    u = np.concatenate([(i[cima] + 1 / 3), (i[baixo] + 2 / 3)]) / n
+    v = np.concatenate([(j[cima] + 1 / 3), (j[baixo] + 2 / 3)]) / n
+    a, b, c = (vertices[faces[:, k]] for k in range(3))
+    centros = a[:, None] + u[None, :, None] * (b - a)[:, None] + v[None, :, None] * (c - a)[:, None]
+    return centros.reshape(-1, 3), np.repeat(np.arange(len(faces)), len(u))
+
+
+class IndiceProximidade:
+    """Índice para consultas de ponto mais próximo na superfície (faz o papel de uma BVH).
+
+    Uma KD-tree guarda um "representante" por face (o centroide) e as faces
+    grandes são divididas em vários representantes, de modo que todo ponto de
+    uma face fica a no máximo `raio` de algum representante dela. Assim a
+    busca pelos k representantes mais próximos + distância exata aos
+    triângulos candidatos tem um critério de parada exato.
+
+    Com compacto, vértices e faces ficam em float32/int32; as distâncias são
+    sempre calculadas em float64.
+    """
+
+    def __init__(self, vertices, faces, compacto=False):
+        from scipy.spatial import cKDTree
+
+        self.vertices, self.faces = compactar(vertices, faces, compacto)
+        tri = self.vertices[self.faces].astype(np.float64, copy=False)
+        centroides = tri.mean(axis=1)
+        raios = np.linalg.norm(tri - centroides[:, None], axis=2).max(axis=1)
+        # Raio de cobertura: a maioria das faces usa só o centroide
+        self.raio = float(np.percentile(raios, 90)) if len(raios) else 0.0
+        if self.raio <= 0:
+            self.raio = float(raios.max()) if len(raios) else 0.0
+        divisoes = np.ones(len(raios), dtype=np.int64)
+        while self.raio > 0:
+            divisoes = np.maximum(1, np.ceil(raios / self.raio).astype(np.int64))
+            # Faces de tamanhos muito desiguais: limita os representantes a ~8 por face
+            if (divisoes ** 2).sum() <= 8 * len(raios):
+                break
+            self.raio *= 2
+        representantes, origem = [centroides[divisoes == 1]], [np.flatnonzero(divisoes == 1)]
+        for n in np.unique(divisoes[divisoes > 1]):
+            faces_n = np.flatnonzero(divisoes == n)
+            centros, locais = _centroides_subdivididos(self.vertices, self.faces[faces_n], n)
+            representantes.append(centros)
+            origem.append(faces_n[locais])
+        self.origem = np.concatenate(origem)
+        # Raio de cada representante (o subtriângulo é a face reduzida por 1/n)
+        self.raios = raios[self.origem] / divisoes[self.origem]
+        self.arvore = cKDTree(np.concatenate(representantes))
+
+    def _triangulos(self, faces):
+        """Vértices (..., 3, 3) das faces em float64, mesmo no modo compacto"""
+        return self.vertices[self.faces[faces]].astype(np.float64, copy=False)
+
+    def _melhores(self, pontos, candidatos):
+        """Melhor face entre os candidatos (m, k) de cada ponto"""
+        faces = self.origem[candidatos]
+        tri = self._triangulos(faces)
+        p = np.broadcast_to(pontos[:, None], tri.shape[:2] + (3,))
+        proximos, bary = ponto_mais_proximo_triangulo(p, tri[..., 0, :], tri[..., 1, :], tri[..., 2, :])
+        dist = np.linalg.norm(proximos - p, axis=-1)
+        melhor = dist.argmin(axis=1)
+        linhas = np.arange(len(pontos))
+        return proximos[linhas, melhor], dist[linhas, melhor], faces[linhas, melhor], bary[linhas, melhor]
+
+    def _avaliar_pares(self, pontos, dono, candidatos, resultado):
+        """Distância exata dos pares achatados (ponto dono, representante); guarda a menor de cada ponto"""
+        if len(candidatos) == 0:
+            return
+        faces = self.origem[candidatos]
+        tri = self._triangulos(faces)
+        p = pontos[dono]
+        proximos, bary = ponto_mais_proximo_triangulo(p, tri[:, 0], tri[:, 1], tri[:, 2])
+        dist = np.linalg.norm(proximos - p, axis=1)
+        # Menor distância de cada ponto: primeiro da ordenação por (dono, distância)
+        ordem = np.lexsort((dist, dono))
+        primeiro = ordem[np.r_[True, dono[ordem][1:] != dono[ordem][:-1]]]
+        alvo = dono[primeiro]
+        melhora = dist[primeiro] < resultado[1][alvo]
+        primeiro, alvo = primeiro[melhora], alvo[melhora]
+        for destino, valor in zip(resultado, (proximos, dist, faces, bary)):
+            destino[alvo] = valor[primeiro]
+
+    def _consultar_bloco(self, pontos, k_inicial=8, k_max=512):
+        n_repr = self.arvore.n
+        k = min(k_inicial, n_repr)
+        dist_repr, candidatos = self.arvore.query(pontos, k=k)
+        dist_repr, candidatos = dist_repr.reshape(len(pontos), -1), candidatos.reshape(len(pontos), -1)
+        resultado = list(self._melhores(pontos, candidatos))
+        # Faces fora dos k candidatos estão a pelo menos (k-ésimo representante - raio)
+        pendentes = np.flatnonzero((dist_repr[:, -1] - self.raio < resultado[1]) & (k < n_repr))
+        while len(pendentes) and k < k_max:
+            anterior, k = k, min(k * 4, n_repr)
+            dist_repr, candidatos = self.arvore.query(pontos[pendentes], k=k)
+            dist_repr, candidatos = dist_repr.reshape(len(pendentes), -1), candidatos.reshape(len(pendentes), -1)
+            # Dos candidatos novos, só os que podem ter face mais perto que a melhor atual
+            novos = candidatos[:, anterior:]
+            linhas, colunas = np.nonzero(dist_repr[:, anterior:] - self.raios[novos]
+                                         < resultado[1][pendentes][:, None])
+            self._avaliar_pares(pontos, pendentes[linhas], novos[linhas, colunas], resultado)
+            certos = (dist_repr[:, -1] - self.raio >= resultado[1][pendentes]) | (k >= n_repr)
+            pendentes = pendentes[~certos]
+        if len(pendentes):
+            self._busca_em_raio(pontos, pendentes, resultado)
+        return resultado
+
+    def _busca_em_raio(self, pontos, pendentes, resultado, max_pares=2000000):
+        # Pontos longe da superfície (ou faces muito desiguais): todos os representantes dentro do limite
+        vizinhos = self.arvore.query_ball_point(pontos[pendentes], resultado[1][pendentes] + self.raio)
+        tamanhos = np.array([len(v) for v in vizinhos], dtype=np.int64)
+        if tamanhos.sum() == 0:
+            return
+        # Pares achatados em lotes de ~max_pares
+        acumulado = np.cumsum(tamanhos)
+        cortes = np.searchsorted(acumulado, np.arange(max_pares, acumulado[-1], max_pares)) + 1
+        limites = np.unique(np.r_[0, cortes[cortes < len(pendentes)], len(pendentes)])
+        for inicio, fim in zip(limites[:-1], limites[1:]):
+            lote = np.arange(inicio, fim)
+            candidatos = np.concatenate([vizinhos[i] for i in lote]).astype(np.int64)
+            self._avaliar_pares(pontos, pendentes[np.repeat(lote, tamanhos[lote])], candidatos, resultado)
+
+    def consultar(self, pontos, workers=None, bloco=32768):
+        """(pontos_proximos, distancias, faces, baricentricas) para cada ponto, em blocos paralelos"""
+        pontos = np.asarray(pontos, dtype=np.float64).reshape(-1, 3)
+        blocos = [pontos[i:i + bloco] for i in range(0, len(pontos), bloco)]
+        if workers is None:
+            workers = min(len(blocos), os.cpu_count() or 1)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                partes = list(executor.map(self._consultar_bloco, blocos))
+        else:
+            partes = [self._consultar_bloco(b) for b in blocos]
+        if not partes:
+            return np.zeros((0, 3)), np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+        return tuple(np.concatenate([parte[i] for parte in partes]) for i in range(4))
+
+
+def interpolar(valores, faces, indices_faces, baricentricas):
+    """Interpola valores por vértice (n, ...) nos pontos dados por (face, baricêntricas)"""
+    valores = np.asarray(valores)
+    cantos = faces[indices_faces]
+    pesos = baricentricas.reshape(baricentricas.shape + (1,) * (valores.ndim - 1))
+    return (valores[cantos] * pesos).sum(axis=1)
+
+
+def transferir_atributos(origem, pontos, indice=None):
+    """Normais, cores e UVs da malha origem projetados nos pontos (ex.: vértices da malha reparada).
+
+    Retorna um dicionário só com os atributos que a origem tem; 'normais' sempre.
+    """
+    if indice is None:
+        indice = IndiceProximidade(origem.vertices, origem.faces)
+    _, distancias, faces, bary = indice.consultar(pontos)
+    atributos = {'distancias': distancias}
+    normais = interpolar(origem.vertex_normals, indice.faces, faces, bary)
+    comprimento = np.linalg.norm(normais, axis=1, keepdims=True)
+    # Onde as normais se cancelam (quina viva) fica a normal da face
+    atributos['normais'] = np.where(comprimento > 1e-12, normais / np.maximum(comprimento, 1e-12),
+                                    origem.face_normals[faces])
+    visual = getattr(origem, 'visual', None)
+    if visual is not None and visual.kind == 'vertex':
+        cores = interpolar(visual.vertex_colors.astype(np.float64), indice.faces, faces, bary)
+        atributos['cores'] = np.clip(np.round(cores), 0, 255).astype(np.uint8)
+    elif visual is not None and visual.kind == 'face':
+        atributos['cores'] = visual.face_colors[faces]
+    uv = getattr(visual, 'uv', None)
+    if uv is not None and len(uv) == len(origem.vertices):
+        atributos['uv'] = interpolar(uv, indice.faces, faces, bary)
+    return atributos
@@ -0,0 +1,222 @@
+"""Relatório de um lote de peças: reparo num pool de processos, miniaturas antes/depois e métricas em HTML.
+
+Uso: python relatorio_lote.py peca1.stl peca2.obj ... --saida relatorio/ [--workers N]
+         [--operacao reparar] [--operacao simplificar:fator=0.5] [--tamanho 192] [--suave] [--salvar-reparadas]
+
+Não precisa de display nem de GPU: as imagens vêm de render_cpu. O HTML fica
+em <saida>/relatorio.html e as imagens em <saida>/imagens/.
+"""
+import argparse
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from analise_incremental import AnaliseIncremental
+from exportacao import FORMATOS, exportar
+from render_cpu import enquadramento, miniaturas, salvar_png
+
+# Rótulos das métricas, na mesma ordem do painel de análise da GUI (analisar_malha)
+METRICAS = (
+    ('vertices', 'Vértices'),
+    ('faces', 'Faces'),
+    ('arestas_abertas', 'Buracos (arestas abertas)'),
+    ('watertight', 'Watertight'),
+    ('nao_manifold', 'Arestas não-manifold'),
+    ('duplicados', 'Vértices duplicados'),
+)
+
+
+def metricas(mesh):
+    """As mesmas contagens do painel de análise da GUI"""
+    analise = AnaliseIncremental(mesh)
+    return {
+        'vertices': analise.n_vertices, 'faces': analise.n_faces,
+        'arestas_abertas': analise.n_arestas_abertas, 'watertight': bool(analise.watertight),
+        'nao_manifold': analise.n_arestas_nao_manifold, 'duplicados': analise.n_duplicados,
+    }
+
+
+def ler_operacao(texto):
+    """'nome' ou 'nome:chave=valor,chave=valor' -> {'nome': ..., chave: valor} (valores em JSON quando der)"""
+    nome, _, resto = texto.partition(':')
+    passo = {'nome': nome}
+    for par in filter(None, resto.split(',')):
+        chave, _, valor = par.partition('=')
+        try:
+            passo[chave] = json.loads(valor)
+        except ValueError:
+            passo[chave] = valor
+    return passo
+
+
+def processar_peca(indice, caminho, passos, pasta_imagens, tamanho=192, sombreamento='flat', pasta_reparadas=None):
+    """Roda num processo do pool: lê, renderiza, repara, renderiza de novo. Erros vão no resultado."""
+    import operacoes
+    from servico import ler_entrada
+
+    nome = os.path.basename(caminho)
+    resultado = {'indice': indice, 'entrada': caminho, 'nome': nome, 'erro': None,
+                 'antes': None, 'depois': None, 'imagens_antes': [], 'imagens_depois': [], 'operacoes': []}
+    inicio = time.perf_counter()
+
+    def salvar_vistas(mesh, quadro, etapa):
+        nomes = []
+        for k, imagem in enumerate(miniaturas(mesh, tamanho=tamanho, sombreamento=sombreamento, quadro=quadro)):
+            arquivo = f'{indice:04d}_{etapa}_{k}.png'
+            salvar_png(os.path.join(pasta_imagens, arquivo), imagem)
+            nomes.append(arquivo)
+        return nomes
+
+    try:
+        mesh = ler_entrada(caminho)
+        # Mesmo enquadramento antes e depois: as miniaturas ficam comparáveis
+        quadro = enquadramento(mesh.vertices)
+        resultado['antes'] = metricas(mesh)
+        resultado['imagens_antes'] = salvar_vistas(mesh, quadro, 'antes')
+        for passo in passos:
+            parametros = {k: v for k, v in passo.items() if k != 'nome'}
+            mesh, _ = operacoes.executar(passo['nome'], mesh, **parametros)
+            resultado['operacoes'].append(passo['nome'])
+        resultado['depois'] = metricas(mesh)
+        resultado['imagens_depois'] = salvar_vistas(mesh, quadro, 'depois')
+        if pasta_reparadas:
+            raiz, ext = os.path.splitext(nome)
+            exportar(os.path.join(pasta_reparadas, f'{raiz}_reparado{ext if ext.lower() in FORMATOS else ".stl"}'), mesh)
+    except Exception as e:
+        resultado['erro'] = f'{type(e).__name__}: {e}'
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def _celula_metrica(chave, antes, depois):
+    formatar = (lambda v: 'Sim' if v else 'Não') if chave == 'watertight' else str
+    if depois is None or antes[chave] == depois[chave]:
+        return f'<td>{formatar(antes[chave])}</td>'
+    return f'<td>{formatar(antes[chave])} → <b>{formatar(depois[chave])}</b></td>'
+
+
+def gerar_html(resultados, passos, segundos_total):
+    """Página única com uma seção por peça: tabela de métricas e miniaturas antes/depois"""
+    falhas = sum(r['erro'] is not None for r in resultados)
+    fechadas = sum(bool(r['depois'] and r['depois']['watertight']) for r in resultados)
+    partes = [
+        '<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8"><title>Relatório do lote</title>',
+        '<style>body{font-family:sans-serif;margin:24px;color:#222}table{border-collapse:collapse;margin:8px 0}'
+        'td,th{border:1px solid #ccc;padding:3px 8px;text-align:left}.erro{color:#b00}.peca{margin-bottom:32px}'
+        'img{border:1px solid #ddd;margin:2px}</style></head><body>',
+        '<h1>Relatório do lote</h1>',
+        f'<p>{len(resultados)} peça(s), {fechadas} watertight depois do reparo, {falhas} com erro; '
+        f'operações: {html.escape(", ".join(p["nome"] for p in passos)) or "nenhuma"}; '
+        f'{segundos_total:.1f} s no total.</p>',
+    ]
+    for r in resultados:
+        partes.append(f'<div class="peca"><h2>{html.escape(r["nome"])}</h2>')
+        if r['antes'] is not None:
+            partes.append('<table><tr><th>Métrica</th><th>Antes → depois</th></tr>')
+            for chave, rotulo in METRICAS:
+                partes.append(f'<tr><td>{rotulo}</td>{_celula_metrica(chave, r["antes"], r["depois"])}</tr>')
+            partes.append(f'<tr><td>Tempo</td><td>{r["segundos"]:.2f} s</td></tr></table>')
+        if r['erro']:
+            partes.append(f'<p class="erro">Erro: {html.escape(r["erro"])}</p>')
+        for rotulo, imagens in (('Antes', r['imagens_antes']), ('Depois', r['imagens_depois'])):
+            if imagens:
+                figuras = ''.join(f'<img src="imagens/{arquivo}" alt="{rotulo}">' for arquivo in imagens)
+                partes.append(f'<p><b>{rotulo}</b><br>{figuras}</p>')
+        partes.append('</div>')
+    partes.append('</body></html>')
+    return '\n'.join(partes)
+
+
+def _resultado_com_erro(indice, caminho, erro):
+    return {'indice': indice, 'entrada': caminho, 'nome': os.path.basename(caminho), 'erro': erro,
+            'antes': None, 'depois': None, 'imagens_antes': [], 'imagens_depois': [], 'operacoes': [],
+            'segundos': 0.0}
+
+
+def _processar_em_pool(argumentos, workers):
+    """Peças num pool compartilhado; as que o pool quebrado levou junto rodam de novo, cada uma no seu processo.
+
+    Um processo morto (ex.: falta de memória) quebra o pool e falha todas as
+    peças pendentes com BrokenProcessPool, sem dizer qual foi a culpada: na
+    segunda rodada cada uma tem um pool só dela e só a culpada fica com o erro.
+    """
+    # Processos, não threads: a rasterização e o reparo são NumPy puro e uma peça não trava as outras
+    resultados = [None] * len(argumentos)
+    levadas = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(processar_peca, *a) for a in argumentos]
+        for i, futuro in enumerate(futuros):
+            try:
+                resultados[i] = futuro.result()
+            except BrokenProcessPool:
+                levadas.append(i)
+            except Exception as e:
+                resultados[i] = _resultado_com_erro(i, argumentos[i][1], f'{type(e).__name__}: {e}')
+    if levadas:
+        print(f"Um processo do pool morreu; repetindo {len(levadas)} peça(s) em processos separados")
+    for inicio in range(0, len(levadas), workers):
+        lote = levadas[inicio:inicio + workers]
+        executores = [ProcessPoolExecutor(max_workers=1) for _ in lote]
+        futuros = [executor.submit(processar_peca, *argumentos[i]) for executor, i in zip(executores, lote)]
+        for i, futuro, executor in zip(lote, futuros, executores):
+            try:
+                resultados[i] = futuro.result()
+            except BrokenProcessPool:
+                erro = 'O processo da peça morreu (falta de memória?)'
+                resultados[i] = _resultado_com_erro(i, argumentos[i][1], erro)
+            except Exception as e:
+                resultados[i] = _resultado_com_erro(i, argumentos[i][1], f'{type(e).__name__}: {e}')
+            executor.shutdown()
+    return resultados
+
+
+def gerar_relatorio(caminhos, pasta_saida, passos=({'nome': 'reparar'},), workers=None, tamanho=192,
+                    sombreamento='flat', salvar_reparadas=False):
+    """Processa as peças (em paralelo, um processo por peça) e grava o HTML; retorna (caminho_html, resultados)"""
+    pasta_imagens = os.path.join(pasta_saida, 'imagens')
+    os.makedirs(pasta_imagens, exist_ok=True)
+    pasta_reparadas = None
+    if salvar_reparadas:
+        pasta_reparadas = os.path.join(pasta_saida, 'reparadas')
+        os.makedirs(pasta_reparadas, exist_ok=True)
+    passos = [dict(p) for p in passos]
+    if workers is None:
+        workers = min(len(caminhos), os.cpu_count() or 1)
+    inicio = time.perf_counter()
+    argumentos = [(i, c, passos, pasta_imagens, tamanho, sombreamento, pasta_reparadas) for i, c in enumerate(caminhos)]
+    if workers > 1:
+        resultados = _processar_em_pool(argumentos, workers)
+    else:
+        resultados = [processar_peca(*a) for a in argumentos]
+    caminho_html = os.path.join(pasta_saida, 'relatorio.html')
+    with open(caminho_html, 'w', encoding='utf-8') as f:
+        f.write(gerar_html(resultados, passos, time.perf_counter() - inicio))
+    return caminho_html, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Repara um lote de malhas e gera um relatório HTML com miniaturas')
+    parser.add_argument('entradas', nargs='+')
+    parser.add_argument('--saida', default='relatorio_lote', help='pasta do relatório (padrão: relatorio_lote)')
+    parser.add_argument('--workers', type=int, help='processos em paralelo (padrão: núcleos disponíveis)')
+    parser.add_argument('--operacao', action='append', dest='operacoes', metavar='NOME[:CHAVE=VALOR,...]',
+                        help='operação a aplicar, na ordem (padrão: reparar); ver operacoes.OPERACOES')
+    parser.add_argument('--tamanho', type=int, default=192, help='lado das miniaturas em pixels')
+    parser.add_argument('--suave', action='store_true', help='sombreamento suave (normais interpoladas)')
+    parser.add_argument('--salvar-reparadas', action='store_true', help='grava as malhas reparadas em <saida>/reparadas')
+    args = parser.parse_args()
+    passos = [ler_operacao(o) for o in (args.operacoes or ['reparar'])]
+    caminho_html, resultados = gerar_relatorio(
+        args.entradas, args.saida, passos, workers=args.workers, tamanho=args.tamanho,
+        sombreamento='suave' if args.suave else 'flat', salvar_reparadas=args.salvar_reparadas)
+    for r in resultados:
+        estado = f"erro: {r['erro']}" if r['erro'] else f"{r['segundos']:.2f} s"
+        print(f"{r['nome']}: {estado}")
+    print(f"Relatório salvo em: {caminho_html}")
+
+
+if __name__ == '__main__':
+    main()
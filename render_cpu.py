@@ -0,0 +1,197 @@
+"""Renderizador por software (só NumPy) para miniaturas sem display/GPU: z-buffer, sombreamento e linhas.
+
+A projeção é ortográfica e o enquadramento vem da esfera envolvente, de modo
+que todas as vistas (e o antes/depois de uma mesma peça) ficam na mesma
+escala. As imagens são arrays (altura, largura, 3) uint8; png_bytes grava
+PNG só com zlib/struct.
+"""
+import struct
+import zlib
+
+import numpy as np
+
+# (azimute, elevação) em graus: frente/lado, costas e topo
+VISTAS_PADRAO = ((35, 25), (215, 25), (0, 89))
+FUNDO = (0.96, 0.96, 0.96)
+# Luz presa à câmera (vinda de cima/esquerda, por trás do observador)
+LUZ = np.array([-0.35, 0.45, 1.0]) / np.linalg.norm([-0.35, 0.45, 1.0])
+
+
+def enquadramento(vertices):
+    """(centro, raio) da esfera envolvente usada para enquadrar todas as vistas"""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if len(vertices) == 0:
+        return np.zeros(3), 1.0
+    centro = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    return centro, max(float(np.linalg.norm(vertices - centro, axis=1).max()), 1e-12)
+
+
+def rotacao_camera(azimute, elevacao):
+    """Matriz que leva coordenadas do mundo (z para cima) para as da câmera (z para o observador)"""
+    a, e = np.radians(azimute), np.radians(elevacao)
+    # Gira em torno do eixo vertical do mundo e depois inclina a câmera
+    rz = np.array([[np.cos(a), -np.sin(a), 0], [np.sin(a), np.cos(a), 0], [0, 0, 1]])
+    para_camera = np.array([[1, 0, 0], [0, 0, 1], [0, -1, 0]])
+    rx = np.array([[1, 0, 0], [0, np.cos(e), -np.sin(e)], [0, np.sin(e), np.cos(e)]])
+    return rx @ para_camera @ rz
+
+
+def normais_vertices(vertices, faces, normais_faces_nao_unitarias):
+    """Normais por vértice ponderadas pela área (soma das normais não unitárias das faces)"""
+    normais = np.zeros((len(vertices), 3))
+    for k in range(3):
+        for eixo in range(3):
+            normais[:, eixo] += np.bincount(faces[:, k], normais_faces_nao_unitarias[:, eixo], minlength=len(vertices))
+    return normais / np.maximum(np.linalg.norm(normais, axis=1), 1e-300)[:, None]
+
+
+def _cruz2(u, v):
+    return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+
+def _rasterizar(tela, profundidade, faces, largura, altura, max_candidatos=4_000_000):
+    """Z-buffer: (face visível por pixel, -1 no fundo). Triângulos menores que um pixel viram um ponto."""
+    zbuf = np.full(largura * altura, -np.inf)
+    fbuf = np.full(largura * altura, -1, dtype=np.int64)
+    tri = tela[faces]
+    # Pixels cujo centro (i + 0.5) cai na caixa do triângulo
+    x0 = np.clip(np.ceil(tri[..., 0].min(axis=1) - 0.5), 0, largura).astype(np.int64)
+    x1 = np.clip(np.floor(tri[..., 0].max(axis=1) - 0.5), -1, largura - 1).astype(np.int64)
+    y0 = np.clip(np.ceil(tri[..., 1].min(axis=1) - 0.5), 0, altura).astype(np.int64)
+    y1 = np.clip(np.floor(tri[..., 1].max(axis=1) - 0.5), -1, altura - 1).astype(np.int64)
+    nx, ny = np.maximum(x1 - x0 + 1, 0), np.maximum(y1 - y0 + 1, 0)
+    por_face = nx * ny
+    if len(faces) == 0:
+        return fbuf
+    # Em blocos de faces com ~max_candidatos pixels candidatos cada
+    acumulado = np.cumsum(por_face)
+    cortes = np.searchsorted(acumulado, np.arange(max_candidatos, acumulado[-1], max_candidatos))
+    limites = np.unique(np.r_[0, cortes, len(faces)])
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        f = np.arange(inicio, fim)
+        n = por_face[f]
+        dono = np.repeat(f, n)
+        local = np.arange(len(dono)) - np.repeat(np.cumsum(n) - n, n)
+        px = x0[dono] + local % nx[dono]
+        py = y0[dono] + local // np.maximum(nx[dono], 1)
+        centro = np.column_stack([px + 0.5, py + 0.5])
+        a, b, c = tri[dono, 0], tri[dono, 1], tri[dono, 2]
+        area = _cruz2(b - a, c - a)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w0 = _cruz2(b - centro, c - centro) / area
+            w1 = _cruz2(c - centro, a - centro) / area
+        w2 = 1 - w0 - w1
+        dentro = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (area != 0)
+        z = profundidade[faces[dono]]
+        prof = w0 * z[:, 0] + w1 * z[:, 1] + w2 * z[:, 2]
+        pixel, prof, dono = (py * largura + px)[dentro], prof[dentro], dono[dentro]
+        # Triângulos sem centro de pixel dentro: o centroide marca um pixel (evita furos em malhas densas)
+        sem_pixel = f[np.bincount(dono - inicio, minlength=len(f)) == 0]
+        if len(sem_pixel):
+            centroide = tri[sem_pixel].mean(axis=1)
+            cx, cy = np.floor(centroide[:, 0]).astype(np.int64), np.floor(centroide[:, 1]).astype(np.int64)
+            na_tela = (cx >= 0) & (cx < largura) & (cy >= 0) & (cy < altura)
+            pixel = np.r_[pixel, (cy * largura + cx)[na_tela]]
+            prof = np.r_[prof, profundidade[faces[sem_pixel[na_tela]]].mean(axis=1)]
+            dono = np.r_[dono, sem_pixel[na_tela]]
+        # Mais perto do observador (maior z) vence: primeiro de cada pixel na ordem (pixel, -z)
+        ordem = np.lexsort((-prof, pixel))
+        primeiro = ordem[np.r_[True, pixel[ordem][1:] != pixel[ordem][:-1]]] if len(ordem) else ordem
+        pixel, prof, dono = pixel[primeiro], prof[primeiro], dono[primeiro]
+        ganha = prof > zbuf[pixel]
+        zbuf[pixel[ganha]], fbuf[pixel[ganha]] = prof[ganha], dono[ganha]
+    return fbuf
+
+
+def _desenhar_linhas(imagem, pontos_a, pontos_b, cor, espessura=1):
+    """Segmentos em coordenadas de tela, por amostragem (desenhados por cima de tudo)"""
+    altura, largura = imagem.shape[:2]
+    n = np.ceil(np.abs(pontos_b - pontos_a).max(axis=1)).astype(np.int64) + 1
+    dono = np.repeat(np.arange(len(n)), n)
+    t = (np.arange(len(dono)) - np.repeat(np.cumsum(n) - n, n)) / np.maximum(n[dono] - 1, 1)
+    p = pontos_a[dono] + t[:, None] * (pontos_b - pontos_a)[dono]
+    for dx in range(espessura):
+        for dy in range(espessura):
+            x, y = np.floor(p[:, 0]).astype(np.int64) + dx, np.floor(p[:, 1]).astype(np.int64) + dy
+            na_tela = (x >= 0) & (x < largura) & (y >= 0) & (y < altura)
+            imagem[y[na_tela], x[na_tela]] = cor
+
+
+def renderizar(vertices, faces, azimute=35, elevacao=25, tamanho=256, sombreamento='flat',
+               cor=(0.55, 0.65, 0.85), linhas=None, cor_linhas=(0.9, 0.1, 0.1), quadro=None):
+    """Imagem (tamanho, tamanho, 3) uint8 da malha vista de (azimute, elevacao).
+
+    sombreamento é 'flat' (normal da face) ou 'suave' (normais interpoladas);
+    linhas são pares de índices de vértice (ex.: arestas abertas) desenhados
+    por cima. quadro = (centro, raio) fixa o enquadramento entre imagens.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    centro, raio = quadro if quadro is not None else enquadramento(vertices)
+    rotacao = rotacao_camera(azimute, elevacao)
+    camera = (vertices - centro) @ rotacao.T
+    escala = 0.47 * tamanho / raio
+    # Tela: x para a direita, y para baixo; profundidade cresce em direção ao observador
+    tela = np.column_stack([tamanho / 2 + camera[:, 0] * escala, tamanho / 2 - camera[:, 1] * escala])
+    fbuf = _rasterizar(tela, camera[:, 2], faces, tamanho, tamanho)
+    imagem = np.empty((tamanho * tamanho, 3))
+    imagem[:] = FUNDO
+    visiveis = np.flatnonzero(fbuf >= 0)
+    if len(visiveis):
+        tri = camera[faces]
+        normais_faces = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        face = fbuf[visiveis]
+        if sombreamento == 'suave':
+            normais_v = normais_vertices(camera, faces, normais_faces)
+            # Baricêntricas do centro do pixel na face vencedora
+            t = tela[faces[face]]
+            centro_px = np.column_stack([visiveis % tamanho + 0.5, visiveis // tamanho + 0.5])
+            area = _cruz2(t[:, 1] - t[:, 0], t[:, 2] - t[:, 0])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                w0 = np.nan_to_num(_cruz2(t[:, 1] - centro_px, t[:, 2] - centro_px) / area, nan=1 / 3)
+                w1 = np.nan_to_num(_cruz2(t[:, 2] - centro_px, t[:, 0] - centro_px) / area, nan=1 / 3)
+            pesos = np.clip(np.column_stack([w0, w1, 1 - w0 - w1]), 0, 1)
+            normais = np.einsum('ij,ijk->ik', pesos, normais_v[faces[face]])
+        else:
+            normais = normais_faces[face]
+        normais /= np.maximum(np.linalg.norm(normais, axis=1), 1e-300)[:, None]
+        # Lambert dos dois lados: malhas com normais invertidas também aparecem
+        intensidade = 0.25 + 0.75 * np.abs(normais @ LUZ)
+        imagem[visiveis] = intensidade[:, None] * np.asarray(cor)
+    imagem = (np.clip(imagem, 0, 1) * 255).astype(np.uint8).reshape(tamanho, tamanho, 3)
+    if linhas is not None and len(linhas):
+        linhas = np.asarray(linhas, dtype=np.int64).reshape(-1, 2)
+        cor_u8 = (np.asarray(cor_linhas) * 255).astype(np.uint8)
+        _desenhar_linhas(imagem, tela[linhas[:, 0]], tela[linhas[:, 1]], cor_u8, espessura=2 if tamanho >= 256 else 1)
+    return imagem
+
+
+def miniaturas(mesh, vistas=VISTAS_PADRAO, tamanho=192, sombreamento='flat', bordas=True, quadro=None):
+    """Uma imagem por vista (azimute, elevação); bordas desenha as arestas abertas em vermelho"""
+    from buracos import arestas_de_borda
+
+    vertices, faces = np.asarray(mesh.vertices), np.asarray(mesh.faces)
+    linhas = arestas_de_borda(faces) if bordas and len(faces) else None
+    if quadro is None:
+        quadro = enquadramento(vertices)
+    return [renderizar(vertices, faces, azimute, elevacao, tamanho, sombreamento, linhas=linhas, quadro=quadro)
+            for azimute, elevacao in vistas]
+
+
+def png_bytes(imagem):
+    """PNG (RGB 8 bits) de um array (altura, largura, 3) uint8, sem dependências além de zlib"""
+    imagem = np.ascontiguousarray(imagem, dtype=np.uint8)
+    altura, largura = imagem.shape[:2]
+    # Cada linha começa com o byte de filtro (0 = nenhum)
+    cru = np.concatenate([np.zeros((altura, 1), dtype=np.uint8), imagem.reshape(altura, -1)], axis=1).tobytes()
+
+    def bloco(tipo, dados):
+        return struct.pack('>I', len(dados)) + tipo + dados + struct.pack('>I', zlib.crc32(tipo + dados) & 0xFFFFFFFF)
+
+    cabecalho = struct.pack('>IIBBBBB', largura, altura, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + bloco(b'IHDR', cabecalho) + bloco(b'IDAT', zlib.compress(cru, 6)) + bloco(b'IEND', b'')
+
+
+def salvar_png(caminho, imagem):
+    with open(caminho, 'wb') as f:
+        f.write(png_bytes(imagem))
@@ -1,32 +1,79 @@
 import sys
 import os
-import trimesh
-import pymeshfix
+import argparse
 
-# Função para reparar a malha
-def reparar_malha(input_path, output_path=None):
-    # Carrega a malha
-    mesh = trimesh.load(input_path)
+# Função para reparar a malha; retorna um resumo (contagens antes/depois, buracos, MeshFix)
+def reparar_malha(input_path, output_path=None, cache=True, compressao=None, max_arestas=None):
+    # trimesh/pymeshfix são importados só aqui: a linha de uso não paga esse custo
+    from exportacao import exportar
+    from formato_nativo import EXTENSAO, salvar_cache, salvar_nativo, secoes_da_malha
+    from servico import ler_entrada
+    # Carrega a malha: o formato nativo (ou o cache .md3d válido ao lado do arquivo) é mapeado em memória, sem parse
+    mesh = ler_entrada(input_path)
+    if len(mesh.faces) == 0:
+        raise ValueError(f'Nenhuma face encontrada em {os.path.basename(input_path)}')
+    resumo = {'entrada': input_path, 'vertices_antes': len(mesh.vertices), 'faces_antes': len(mesh.faces),
+              'watertight_antes': bool(mesh.is_watertight), 'buracos': 0, 'meshfix': False}
     if not mesh.is_watertight:
         print("Malha não é watertight. Tentando reparar...")
-        # Repara a malha
-        meshfix = pymeshfix.MeshFix(mesh.vertices, mesh.faces)
-        meshfix.repair(verbose=True)
-        # Cria uma nova malha trimesh com os dados reparados
-        mesh = trimesh.Trimesh(vertices=meshfix.v, faces=meshfix.f)
+        from buracos import MAX_ARESTAS_LACO
+        from operacoes import reparar
+        # Remenda só os laços de borda (até max_arestas); MeshFix global só se ainda não fechou
+        mesh, info = reparar(mesh, max_arestas=max_arestas or MAX_ARESTAS_LACO)
+        resumo.update(buracos=info['buracos'], meshfix=info['meshfix'])
+        print(f"{info['buracos']} buraco(s) preenchido(s) localmente" + (", reparo global com MeshFix" if info['meshfix'] else ""))
     else:
         print("Malha já é watertight!")
     # Salva a malha reparada
     if not output_path:
         nome, ext = os.path.splitext(input_path)
         output_path = f"{nome}_reparado{ext}"
-    mesh.export(output_path)
+    if output_path.lower().endswith(EXTENSAO):
+        salvar_nativo(output_path, secoes_da_malha(mesh), compressao)
+    else:
+        # STL/PLY/OBJ/3MF/GLB gravados em fluxo, por blocos
+        exportar(output_path, mesh)
+        # Cache nativo ao lado da saída: a GUI e o próximo CLI abrem sem parse
+        if cache:
+            salvar_cache(output_path, mesh, compressao=compressao)
     print(f"Malha reparada salva em: {output_path}")
+    resumo.update(saida=output_path, vertices=len(mesh.vertices), faces=len(mesh.faces),
+                  watertight=bool(mesh.is_watertight))
+    return resumo
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Uso: python reparar_malha.py arquivo.stl [saida.stl]")
+        print("Uso: python reparar_malha.py arquivo.stl [saida.stl] [--sem-cache] [--compressao zstd|lz4] [--max-arestas N]")
+        print("     python reparar_malha.py --vigiar PASTA [--workers N] [--intervalo S] [--estabilidade S] [--recursivo] [--tempo-limite S]")
         sys.exit(1)
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    reparar_malha(input_file, output_file) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Repara uma malha STL/OBJ/.md3d')
+    parser.add_argument('entrada', nargs='?')
+    parser.add_argument('saida', nargs='?')
+    parser.add_argument('--sem-cache', action='store_true', help='não grava o cache .md3d ao lado da saída')
+    parser.add_argument('--compressao', choices=['zstd', 'lz4'], help='comprime o arquivo/cache .md3d')
+    parser.add_argument('--max-arestas', type=int, help='só preenche localmente buracos com até N arestas (padrão: 1000); os maiores vão para o MeshFix')
+    vigia = parser.add_argument_group('modo vigia (ver pasta_vigiada.py)')
+    vigia.add_argument('--vigiar', metavar='PASTA', help='repara cada malha que chegar na pasta')
+    vigia.add_argument('--workers', type=int, help='reparos em paralelo (padrão: núcleos disponíveis)')
+    vigia.add_argument('--intervalo', type=float, default=2.0, help='segundos entre varreduras (padrão: 2)')
+    vigia.add_argument('--estabilidade', type=float, default=5.0,
+                       help='segundos sem mudar de tamanho antes de ler o arquivo (padrão: 5)')
+    vigia.add_argument('--recursivo', action='store_true', help='vigia também as subpastas')
+    vigia.add_argument('--tempo-limite', type=float, default=1800.0,
+                       help='segundos por reparo antes de matar o worker e gravar relatório de erro (padrão: 1800)')
+    args = parser.parse_args()
+    if args.vigiar:
+        from pasta_vigiada import VigiaPasta
+        VigiaPasta(args.vigiar, workers=args.workers, intervalo=args.intervalo, estabilidade=args.estabilidade,
+                   recursivo=args.recursivo, max_arestas=args.max_arestas, cache=not args.sem_cache,
+                   compressao=args.compressao, tempo_limite=args.tempo_limite).executar()
+        sys.exit(0)
+    if not args.entrada:
+        parser.error('informe o arquivo de entrada ou --vigiar PASTA')
+    try:
+        reparar_malha(args.entrada, args.saida, cache=not args.sem_cache, compressao=args.compressao,
+                      max_arestas=args.max_arestas)
+    except RuntimeError as e:
+        # Falha do backend nativo (crash, tempo esgotado) já isolada num subprocesso: só o diagnóstico
+        print(f"Erro: {e}")
+        sys.exit(2)
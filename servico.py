@@ -0,0 +1,294 @@
+"""Serviço local de reparo: fila de jobs com pool de workers limitado, via HTTP.
+
+Uso: python servico.py [--porta 8765] [--socket /tmp/meshdoctor.sock] [--workers 2] [--fila 64]
+
+    POST /jobs       {"entrada": "peca.stl", "saida": "peca_ok.stl",
+                      "operacoes": [{"nome": "reparar"}, {"nome": "simplificar", "fator": 0.5}]}
+                     -> 202 {"id": ...}; 503 se a fila estiver cheia
+    GET  /jobs       lista de jobs
+    GET  /jobs/<id>  estado, progresso e resultado de um job
+    GET  /operacoes  operações aceitas (ver operacoes.OPERACOES)
+
+O servidor só escuta em localhost (ou num socket Unix). Os backends ficam
+importados e as malhas de entrada recentes ficam em cache entre os jobs.
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import operacoes
+from custo_memoria import cabe, formatar_bytes, memoria_disponivel
+from exportacao import exportar
+from formato_nativo import (
+    EXTENSAO, assinatura_arquivo, cache_valido, caminho_cache, carregar_nativo, malha_de_secoes, salvar_cache
+)
+from importacao_tardia import ModuloTardio, pre_aquecer
+
+ESTADOS_FINAIS = ('concluido', 'falhou')
+
+
+class Job:
+    def __init__(self, pedido):
+        self.id = uuid.uuid4().hex[:12]
+        self.pedido = pedido
+        self.estado = 'na_fila'
+        self.progresso = 0.0
+        self.mensagem = ''
+        self.resultado = None
+        self.erro = None
+        self.criado = time.time()
+        self.iniciado = None
+        self.terminado = None
+
+    def como_dict(self):
+        return {
+            'id': self.id, 'estado': self.estado, 'progresso': round(self.progresso, 3),
+            'mensagem': self.mensagem, 'resultado': self.resultado, 'erro': self.erro,
+            'entrada': self.pedido['entrada'], 'saida': self.pedido.get('saida'),
+            'criado': self.criado, 'iniciado': self.iniciado, 'terminado': self.terminado,
+        }
+
+
+class CacheMalhas:
+    """LRU das malhas de entrada, chaveada por (caminho, tamanho, mtime em ns); devolve cópias"""
+
+    def __init__(self, tamanho=4):
+        self.tamanho = tamanho
+        self._malhas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, caminho):
+        chave = (os.path.abspath(caminho),) + assinatura_arquivo(caminho)
+        with self._trava:
+            if chave in self._malhas:
+                self._malhas.move_to_end(chave)
+                return self._malhas[chave].copy()
+        mesh = ler_entrada(caminho)
+        with self._trava:
+            self._malhas[chave] = mesh
+            while len(self._malhas) > self.tamanho:
+                self._malhas.popitem(last=False)
+        return mesh.copy()
+
+
+def ler_entrada(caminho):
+    """Lê a malha de entrada, usando o formato/cache nativo quando houver.
+
+    Só o cache da versão atual é usado: ele guarda a geometria do arquivo,
+    sem a centralização/reordenação que a GUI aplica depois de ler (ver
+    formato_nativo.py). Caches antigos podem estar transladados e são ignorados.
+    """
+    import trimesh
+
+    if caminho.lower().endswith(EXTENSAO):
+        return malha_de_secoes(carregar_nativo(caminho))[0]
+    if cache_valido(caminho):
+        return malha_de_secoes(carregar_nativo(caminho_cache(caminho)))[0]
+    return trimesh.load(caminho, force='mesh')
+
+
+def _info_json(info):
+    """Só os valores escalares do info das operações vão para o resultado"""
+    resumo = {}
+    for chave, valor in info.items():
+        if isinstance(valor, (bool, int, float, str)):
+            resumo[chave] = valor
+        elif isinstance(valor, np.generic):
+            resumo[chave] = valor.item()
+        elif isinstance(valor, np.ndarray):
+            resumo[chave] = len(valor)
+    return resumo
+
+
+class ServicoReparo:
+    """Fila limitada de jobs atendida por um número fixo de workers"""
+
+    def __init__(self, workers=2, fila_max=64, historico=1000):
+        self.fila = queue.Queue(maxsize=fila_max)
+        self.jobs = OrderedDict()
+        self.historico = historico
+        self.cache = CacheMalhas()
+        self._trava = threading.Lock()
+        self._threads = [threading.Thread(target=self._trabalhar, name=f'worker-{i}', daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+        # Importa os backends uma vez, antes do primeiro job
+        pre_aquecer([ModuloTardio('trimesh'), ModuloTardio('pymeshfix'), ModuloTardio('pymeshlab')])
+
+    def submeter(self, pedido):
+        """Valida e enfileira um pedido; ValueError se inválido, queue.Full se a fila estiver cheia"""
+        if not isinstance(pedido, dict) or 'entrada' not in pedido:
+            raise ValueError('Pedido precisa do campo "entrada"')
+        if not os.path.exists(pedido['entrada']):
+            raise ValueError(f"Arquivo não encontrado: {pedido['entrada']}")
+        passos = pedido.setdefault('operacoes', [{'nome': 'reparar'}])
+        for passo in passos:
+            if not isinstance(passo, dict) or passo.get('nome') not in operacoes.OPERACOES:
+                raise ValueError(f'Operação inválida: {passo}')
+        job = Job(pedido)
+        with self._trava:
+            self.jobs[job.id] = job
+            self._limpar_historico()
+        try:
+            self.fila.put_nowait(job)
+        except queue.Full:
+            with self._trava:
+                del self.jobs[job.id]
+            raise
+        return job
+
+    def _limpar_historico(self):
+        finais = [j for j in self.jobs.values() if j.estado in ESTADOS_FINAIS]
+        for job in finais[:max(0, len(finais) - self.historico)]:
+            del self.jobs[job.id]
+
+    def consultar(self, job_id):
+        with self._trava:
+            return self.jobs.get(job_id)
+
+    def listar(self):
+        with self._trava:
+            return [job.como_dict() for job in self.jobs.values()]
+
+    def _trabalhar(self):
+        while True:
+            job = self.fila.get()
+            try:
+                self._executar(job)
+            except Exception as e:
+                job.estado = 'falhou'
+                job.erro = str(e)
+                print(f"Job {job.id} falhou: {e}")
+            finally:
+                job.terminado = time.time()
+                self.fila.task_done()
+
+    def _executar(self, job):
+        pedido = job.pedido
+        job.estado = 'executando'
+        job.iniciado = time.time()
+        job.mensagem = 'Lendo malha...'
+        mesh = self.cache.obter(pedido['entrada'])
+        passos = pedido['operacoes']
+        # Leitura e gravação contam como um passo cada na barra de progresso
+        total = len(passos) + 2
+        job.progresso = 1 / total
+        infos = []
+        for i, passo in enumerate(passos):
+            parametros = {k: v for k, v in passo.items() if k != 'nome'}
+            job.mensagem = f"{passo['nome']} ({i + 1}/{len(passos)})"
+            # Sem diálogo no serviço: o job falha antes de alocar em vez de ser morto pelo OOM
+            estimativa = operacoes.estimar_custo(passo['nome'], mesh, **parametros)
+            disponivel = memoria_disponivel()
+            if estimativa is not None and not cabe(estimativa, disponivel):
+                raise MemoryError(f"{passo['nome']} prevê pico de {formatar_bytes(estimativa['pico_bytes'])}, "
+                                  f"disponível {formatar_bytes(disponivel)}")
+            mesh, info = operacoes.executar(passo['nome'], mesh, **parametros)
+            infos.append({'nome': passo['nome'], **_info_json(info)})
+            job.progresso = (i + 2) / total
+        saida = pedido.get('saida')
+        if not saida:
+            nome, ext = os.path.splitext(pedido['entrada'])
+            saida = f"{nome}_reparado{ext if ext.lower() != EXTENSAO else '.stl'}"
+        job.mensagem = 'Salvando...'
+        exportar(saida, mesh)
+        if pedido.get('cache', True):
+            salvar_cache(saida, mesh)
+        job.resultado = {
+            'saida': saida, 'vertices': len(mesh.vertices), 'faces': len(mesh.faces),
+            'watertight': bool(mesh.is_watertight), 'operacoes': infos,
+        }
+        job.progresso = 1.0
+        job.mensagem = 'Concluído'
+        job.estado = 'concluido'
+
+
+class ManipuladorHTTP(BaseHTTPRequestHandler):
+    def _responder(self, codigo, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        servico = self.server.servico
+        if self.path == '/operacoes':
+            self._responder(200, sorted(operacoes.OPERACOES))
+        elif self.path == '/jobs':
+            self._responder(200, servico.listar())
+        elif self.path.startswith('/jobs/'):
+            job = servico.consultar(self.path[len('/jobs/'):])
+            if job is None:
+                self._responder(404, {'erro': 'Job não encontrado'})
+            else:
+                self._responder(200, job.como_dict())
+        else:
+            self._responder(404, {'erro': 'Caminho desconhecido'})
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._responder(404, {'erro': 'Caminho desconhecido'})
+            return
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+            pedido = json.loads(self.rfile.read(tamanho) or b'{}')
+            job = self.server.servico.submeter(pedido)
+        except (ValueError, TypeError) as e:
+            self._responder(400, {'erro': str(e)})
+        except queue.Full:
+            self._responder(503, {'erro': 'Fila cheia, tente novamente mais tarde'})
+        else:
+            self._responder(202, {'id': job.id, 'estado': job.estado})
+
+    def address_string(self):
+        # Em socket Unix o endereço do cliente não é uma tupla (host, porta)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def criar_servidor(servico, porta=8765, socket_unix=None):
+    if socket_unix:
+        if os.path.exists(socket_unix):
+            os.remove(socket_unix)
+        servidor = ServidorUnix(socket_unix, ManipuladorHTTP)
+    else:
+        servidor = ThreadingHTTPServer(('127.0.0.1', porta), ManipuladorHTTP)
+    servidor.servico = servico
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviço local de reparo de malhas (fila de jobs via HTTP)')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--socket', help='escuta num socket Unix em vez de localhost:porta')
+    parser.add_argument('--workers', type=int, default=2, help='jobs executados ao mesmo tempo')
+    parser.add_argument('--fila', type=int, default=64, help='máximo de jobs esperando na fila')
+    args = parser.parse_args()
+    servico = ServicoReparo(workers=args.workers, fila_max=args.fila)
+    servidor = criar_servidor(servico, args.porta, args.socket)
+    print(f"Serviço MeshDoctor3D ouvindo em {args.socket or f'http://127.0.0.1:{args.porta}'}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Suavização por Laplaciano esparso: Laplaciano simples, Taubin (λ|μ) e HC, cada iteração um produto esparso.
+
+O operador de média (linha i = média ponderada dos vizinhos de i) é montado
+uma vez por topologia e guardado em cache; as iterações só fazem
+matriz esparsa @ posições (n, 3). Vértices fixos (borda, cantos de feição)
+têm a linha igual à identidade, então não se movem em nenhum método.
+"""
+import hashlib
+
+import numpy as np
+
+from analise_incremental import chaves_arestas
+
+METODOS = ('taubin', 'hc', 'laplaciano')
+PESOS = ('uniforme', 'cotangente')
+
+# Últimos operadores montados: suavizar de novo a mesma malha não refaz a matriz
+_CACHE = {}
+_MAX_CACHE = 4
+
+
+def _assinatura(*arrays):
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype, a.shape)).encode())
+        h.update(a.data)
+    return h.hexdigest()
+
+
+def _cotangentes(vertices, faces):
+    """cot do ângulo oposto a cada aresta (0,1), (1,2), (2,0) de cada face, na ordem de chaves_arestas"""
+    tri = vertices[faces]
+    cots = np.empty((len(faces), 3))
+    for k, (i, j, oposto) in enumerate(((0, 1, 2), (1, 2, 0), (2, 0, 1))):
+        u = tri[:, i] - tri[:, oposto]
+        v = tri[:, j] - tri[:, oposto]
+        seno = np.linalg.norm(np.cross(u, v), axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cots[:, k] = np.where(seno > 0, np.einsum('ij,ij->i', u, v) / seno, 0.0)
+    return cots.ravel()
+
+
+class OperadorSuavizacao:
+    """Operador de média M (CSR, diagonal explícita) de uma malha e as matrizes (1 - f) I + f M por fator.
+
+    pesos: 'uniforme' (só topologia) ou 'cotangente' (calculados nas posições
+    dadas e mantidos fixos nas iterações).
+    fixar_borda: vértices de borda não se movem; sem isso, eles deslizam só
+    ao longo da borda (a média usa apenas os vizinhos de borda).
+    angulo_feicao: arestas com ângulo diedro acima dele (graus) são feições;
+    vértices numa curva de feição são suavizados só ao longo dela e pontas ou
+    cruzamentos de feições ficam fixos. Arestas não-manifold também prendem
+    os vértices.
+    """
+
+    def __init__(self, vertices, faces, pesos='uniforme', fixar_borda=True, angulo_feicao=None, fixos=None):
+        import scipy.sparse as sp
+
+        if pesos not in PESOS:
+            raise ValueError(f'Pesos desconhecidos: {pesos} (use {", ".join(PESOS)})')
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        n = len(vertices)
+        chaves = chaves_arestas(faces)
+        unicas, inverso, contagem = np.unique(chaves, return_inverse=True, return_counts=True)
+        inverso = inverso.ravel()
+        a = (unicas >> 32).astype(np.int64)
+        b = (unicas & 0xFFFFFFFF).astype(np.int64)
+        if pesos == 'cotangente':
+            w = 0.5 * np.bincount(inverso, weights=_cotangentes(vertices, faces), minlength=len(unicas))
+            # Pesos negativos (triângulos obtusos) tornam a média instável: cortados em zero
+            w = np.maximum(w, 0.0)
+        else:
+            w = np.ones(len(unicas))
+
+        fixo = np.zeros(n, dtype=bool)
+        if fixos is not None:
+            fixo[np.asarray(fixos)] = True
+        fixo[a[contagem > 2]] = True
+        fixo[b[contagem > 2]] = True
+        borda = contagem == 1
+        if fixar_borda:
+            fixo[a[borda]] = True
+            fixo[b[borda]] = True
+        # Arestas que restringem a média dos seus vértices a uma curva
+        curva = np.zeros(len(unicas), dtype=bool) if fixar_borda else borda.copy()
+        if angulo_feicao is not None:
+            # As duas faces de cada aresta manifold, pela ordem do inverso
+            ordem = np.argsort(inverso, kind='stable')
+            inicio = np.concatenate([[0], np.cumsum(contagem)[:-1]])
+            dupla = np.flatnonzero(contagem == 2)
+            f0, f1 = ordem[inicio[dupla]] // 3, ordem[inicio[dupla] + 1] // 3
+            normais = np.cross(vertices[faces[:, 1]] - vertices[faces[:, 0]], vertices[faces[:, 2]] - vertices[faces[:, 0]])
+            comprimento = np.linalg.norm(normais, axis=1)
+            normais /= np.where(comprimento > 0, comprimento, 1.0)[:, None]
+            cosseno = np.einsum('ij,ij->i', normais[f0], normais[f1])
+            curva[dupla[cosseno < np.cos(np.radians(angulo_feicao))]] = True
+        grau_curva = np.bincount(np.concatenate([a[curva], b[curva]]), minlength=n)
+        self.n_arestas_feicao = int(curva.sum() - (0 if fixar_borda else borda.sum()))
+        fixo |= (grau_curva > 0) & (grau_curva != 2)
+        em_curva = grau_curva == 2
+
+        # Nas linhas de vértices em curva, só os vizinhos pela curva contam
+        linhas = np.concatenate([a, b, np.arange(n)])
+        colunas = np.concatenate([b, a, np.arange(n)])
+        dados = np.concatenate([w, w, np.zeros(n)])
+        restrita = np.concatenate([em_curva[a] & ~curva, em_curva[b] & ~curva, np.zeros(n, dtype=bool)])
+        dados[restrita] = 0.0
+        soma = np.bincount(linhas, weights=dados, minlength=n)
+        if pesos == 'cotangente':
+            # Linhas só com pesos cortados: volta para a média uniforme
+            zeradas = (soma == 0)[linhas] & (linhas != colunas) & ~restrita
+            dados[zeradas] = 1.0
+            soma = np.bincount(linhas, weights=dados, minlength=n)
+        # Vértices isolados não têm média: ficam onde estão
+        fixo |= soma == 0
+        dados /= np.where(soma > 0, soma, 1.0)[linhas]
+        dados[fixo[linhas]] = 0.0
+        diagonal = linhas == colunas
+        dados[diagonal & fixo[linhas]] = 1.0
+        self.media = sp.csr_matrix((dados, (linhas, colunas)), shape=(n, n))
+        self.media.sum_duplicates()
+        coo = self.media.tocoo()
+        self._diagonal = (coo.row == coo.col).astype(np.float64)
+        self._matrizes = {1.0: self.media}
+        self.fixos = fixo
+        self.n_vertices = n
+
+    def matriz(self, fator):
+        """(1 - fator) I + fator M, com a mesma estrutura de M (só os dados mudam)"""
+        import scipy.sparse as sp
+
+        fator = float(fator)
+        if fator not in self._matrizes:
+            m = self.media
+            dados = fator * m.data + (1.0 - fator) * self._diagonal
+            self._matrizes[fator] = sp.csr_matrix((dados, m.indices, m.indptr), shape=m.shape)
+        return self._matrizes[fator]
+
+    def laplaciano(self, vertices, iteracoes=10, fator=0.5):
+        """p <- p + fator (M p - p): encolhe a malha com o número de iterações"""
+        p = np.array(vertices, dtype=np.float64)
+        a = self.matriz(fator)
+        for _ in range(iteracoes):
+            p = a @ p
+        return p
+
+    def taubin(self, vertices, iteracoes=10, fator=0.5, mu=-0.53):
+        """Um passo λ = fator (encolhe) e um μ < -λ (expande) por iteração: suaviza sem perder volume"""
+        p = np.array(vertices, dtype=np.float64)
+        a, b = self.matriz(fator), self.matriz(mu)
+        for _ in range(iteracoes):
+            p = b @ (a @ p)
+        return p
+
+    def hc(self, vertices, iteracoes=10, alfa=0.0, beta=0.5):
+        """Laplaciano com correção HC (Vollmer et al.): empurra cada ponto de volta para o original"""
+        original = np.asarray(vertices, dtype=np.float64)
+        p = original.copy()
+        m = self.media
+        for _ in range(iteracoes):
+            q = p
+            p = m @ q
+            d = p - (alfa * original + (1.0 - alfa) * q)
+            p -= beta * d + (1.0 - beta) * (m @ d)
+        return p
+
+    def aplicar(self, vertices, metodo='taubin', iteracoes=10, **parametros):
+        if metodo not in METODOS:
+            raise ValueError(f'Método de suavização desconhecido: {metodo} (use {", ".join(METODOS)})')
+        return getattr(self, metodo)(vertices, iteracoes, **parametros)
+
+
+def operador(vertices, faces, pesos='uniforme', fixar_borda=True, angulo_feicao=None):
+    """OperadorSuavizacao em cache: com pesos uniformes e sem feições ele só depende das faces"""
+    depende_posicoes = pesos != 'uniforme' or angulo_feicao is not None
+    chave = (_assinatura(faces, vertices) if depende_posicoes else _assinatura(faces),
+             len(vertices), pesos, bool(fixar_borda), angulo_feicao)
+    if chave not in _CACHE:
+        if len(_CACHE) >= _MAX_CACHE:
+            _CACHE.pop(next(iter(_CACHE)))
+        _CACHE[chave] = OperadorSuavizacao(vertices, faces, pesos, fixar_borda, angulo_feicao)
+    return _CACHE[chave]
+
+
+def suavizar_vertices(vertices, faces, metodo='taubin', iteracoes=10, pesos='uniforme', fixar_borda=True,
+                      angulo_feicao=None, **parametros):
+    """Novas posições dos vértices; parametros vão para o método (fator, mu, alfa, beta)"""
+    op = operador(vertices, faces, pesos, fixar_borda, angulo_feicao)
+    return op.aplicar(vertices, metodo, iteracoes, **parametros), op
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório (sem pacote instalável)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Máquinas de CI mais lentas podem escalar os orçamentos de tempo: MESHDOCTOR_FATOR_TEMPO=2
+FATOR_TEMPO = float(os.environ.get('MESHDOCTOR_FATOR_TEMPO', '1'))
+
+
+class Medicao:
+    def __init__(self, resultado, segundos, pico_bytes):
+        self.resultado = resultado
+        self.segundos = segundos
+        self.pico_bytes = pico_bytes
+
+    def dentro_do_orcamento(self, segundos, megabytes):
+        assert self.segundos <= segundos * FATOR_TEMPO, f'{self.segundos:.2f} s > orçamento de {segundos} s'
+        assert self.pico_bytes <= megabytes * 2 ** 20, \
+            f'pico de {self.pico_bytes / 2 ** 20:.1f} MB > orçamento de {megabytes} MB'
+
+
+@pytest.fixture
+def medir():
+    """medir(funcao, *args, **kwargs) -> Medicao com tempo de parede e pico de memória (tracemalloc)"""
+    def _medir(funcao, *args, **kwargs):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, **kwargs)
+            segundos = time.perf_counter() - inicio
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return Medicao(resultado, segundos, pico)
+    return _medir
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'desempenho: orçamento de tempo/memória (pular com -m "not desempenho")')
@@ -0,0 +1,107 @@
+"""Corpus de malhas defeituosas gerado proceduralmente (determinístico, sem arquivos binários no repo).
+
+Cada gerador devolve (mesh, esperado), onde esperado traz o que se sabe do
+defeito introduzido (ex.: quantos buracos) para as verificações dos testes.
+"""
+import numpy as np
+import trimesh
+from scipy.spatial import cKDTree
+
+
+def esfera(subdivisoes=4, raio=10.0):
+    return trimesh.creation.icosphere(subdivisions=subdivisoes, radius=raio)
+
+
+def _vertices_espalhados(mesh, n, rng):
+    """n vértices cujos anéis de faces não se tocam (cada um vira um buraco separado)"""
+    separacao = 4 * mesh.edges_unique_length.max()
+    arvore = cKDTree(mesh.vertices)
+    escolhidos, bloqueados = [], np.zeros(len(mesh.vertices), dtype=bool)
+    for v in rng.permutation(len(mesh.vertices)):
+        if bloqueados[v]:
+            continue
+        escolhidos.append(v)
+        bloqueados[arvore.query_ball_point(mesh.vertices[v], separacao)] = True
+        if len(escolhidos) == n:
+            break
+    return np.array(escolhidos)
+
+
+def com_buracos(n_buracos=10, subdivisoes=4, semente=0):
+    """Esfera sem o anel de faces de n vértices: n buracos de ~5-6 arestas"""
+    mesh = esfera(subdivisoes)
+    centros = _vertices_espalhados(mesh, n_buracos, np.random.default_rng(semente))
+    remover = np.isin(mesh.faces, centros).any(axis=1)
+    furada = trimesh.Trimesh(mesh.vertices, mesh.faces[~remover], process=False)
+    return furada, {'buracos': len(centros), 'volume': esfera(subdivisoes).volume}
+
+
+def nao_manifold(subdivisoes=3):
+    """Esfera com uma face extra pendurada numa aresta (3 faces na mesma aresta)"""
+    mesh = esfera(subdivisoes)
+    a, b = mesh.edges_unique[0]
+    extra = len(mesh.vertices)
+    vertices = np.vstack([mesh.vertices, mesh.vertices[[a, b]].mean(axis=0) * 1.5])
+    faces = np.vstack([mesh.faces, [[a, b, extra]]])
+    return trimesh.Trimesh(vertices, faces, process=False), {'arestas_nao_manifold': 1}
+
+
+def normais_invertidas(fracao=0.3, subdivisoes=4, semente=0):
+    """Esfera fechada com parte das faces em orientação trocada"""
+    mesh = esfera(subdivisoes)
+    faces = mesh.faces.copy()
+    trocar = np.random.default_rng(semente).random(len(faces)) < fracao
+    faces[trocar] = faces[trocar][:, ::-1]
+    return trimesh.Trimesh(mesh.vertices, faces, process=False), {'volume': mesh.volume}
+
+
+def sopa_duplicada(subdivisoes=3):
+    """Sopa de triângulos (STL sem vértices compartilhados): cada face com seus 3 vértices"""
+    mesh = esfera(subdivisoes)
+    vertices = mesh.vertices[mesh.faces].reshape(-1, 3)
+    faces = np.arange(len(vertices)).reshape(-1, 3)
+    return trimesh.Trimesh(vertices, faces, process=False), {'vertices': len(mesh.vertices)}
+
+
+def autointersecao():
+    """Duas caixas fechadas que se atravessam (cada uma manifold, a união não)"""
+    a = trimesh.creation.box([2, 2, 2])
+    b = trimesh.creation.box([2, 2, 2])
+    b.apply_translation([1, 1, 1])
+    return trimesh.util.concatenate([a, b]), {'componentes': 2}
+
+
+def dobrada(subdivisoes=3):
+    """Esfera com um vértice empurrado através do lado oposto: o leque dele atravessa a superfície"""
+    mesh = esfera(subdivisoes)
+    vertices = mesh.vertices.copy()
+    vertices[0] *= -1.3
+    return trimesh.Trimesh(vertices, mesh.faces, process=False), {}
+
+
+def com_detritos(n_detritos=5):
+    """Esfera e pequenas caixas soltas ao redor (componentes de 12 faces)"""
+    mesh = esfera(3)
+    caixas = []
+    for i in range(n_detritos):
+        caixa = trimesh.creation.box([0.5, 0.5, 0.5])
+        caixa.apply_translation([15 + 2 * i, 0, 0])
+        caixas.append(caixa)
+    return trimesh.util.concatenate([mesh] + caixas), {'detritos': n_detritos, 'faces_esfera': len(mesh.faces)}
+
+
+def placa_aberta(n=20):
+    """Grade plana n x n (superfície aberta, uma única borda)"""
+    x, y = np.meshgrid(np.linspace(0, 10, n + 1), np.linspace(0, 10, n + 1))
+    vertices = np.column_stack([x.ravel(), y.ravel(), np.zeros(x.size)])
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+    v0 = (i * (n + 1) + j).ravel()
+    faces = np.concatenate([np.column_stack([v0, v0 + 1, v0 + n + 2]), np.column_stack([v0, v0 + n + 2, v0 + n + 1])])
+    return trimesh.Trimesh(vertices, faces, process=False), {'arestas_borda': 4 * n}
+
+
+def cilindro_sem_tampa(secoes=1500):
+    """Cilindro sem a tampa de cima: uma única borda aberta de `secoes` arestas"""
+    mesh = trimesh.creation.cylinder(radius=10.0, height=10.0, sections=secoes)
+    aberta = trimesh.Trimesh(mesh.vertices, mesh.faces[mesh.triangles_center[:, 2] < 4.99], process=True)
+    return aberta, {'arestas_borda': secoes, 'volume': mesh.volume}
@@ -0,0 +1,68 @@
+"""Cena com vários corpos: separação em componentes e operações só nos corpos escolhidos."""
+import threading
+
+import numpy as np
+import pytest
+import trimesh
+
+import corpus
+from cena import Cena
+
+
+def _montagem():
+    """Três esferas afastadas (a do meio bem pequena) numa malha só, como um STL de montagem"""
+    esferas = [corpus.esfera(2), corpus.esfera(2, raio=0.1), corpus.esfera(3)]
+    for i, esfera in enumerate(esferas):
+        esfera.apply_translation([30.0 * i, 0, 0])
+    return trimesh.util.concatenate(esferas), esferas
+
+
+def test_de_componentes_separa_os_corpos():
+    mesh, esferas = _montagem()
+    cena = Cena.de_componentes(mesh)
+    assert len(cena) == 3
+    assert sorted(len(c.mesh.faces) for c in cena.corpos) == sorted(len(e.faces) for e in esferas)
+    # Cada corpo só com os seus vértices e fechado
+    assert sum(len(c.mesh.vertices) for c in cena.corpos) == len(mesh.vertices)
+    assert all(c.mesh.is_watertight for c in cena.corpos)
+    # min_faces descarta os corpos pequenos
+    assert len(Cena.de_componentes(mesh, min_faces=len(esferas[0].faces) + 1)) == 1
+
+
+def test_aplicar_so_nos_selecionados_compartilha_os_outros():
+    original = Cena.de_componentes(_montagem()[0])
+    faces_antes = [len(c.mesh.faces) for c in original.corpos]
+    cena = original.copy(malhas=False)
+    cena.corpos[1].selecionado = False
+    infos, erros = cena.aplicar('subdivisao', workers=2)
+    assert sorted(infos) == [0, 2] and not erros
+    assert [len(c.mesh.faces) for c in cena.corpos] == [4 * faces_antes[0], faces_antes[1], 4 * faces_antes[2]]
+    # O corpo não selecionado é o mesmo objeto (nem copiado nem refeito); a cena de origem fica intacta
+    assert cena.corpos[1].mesh is original.corpos[1].mesh
+    assert [len(c.mesh.faces) for c in original.corpos] == faces_antes
+
+
+def test_aplicar_reporta_erro_por_corpo():
+    cena = Cena.de_componentes(_montagem()[0])
+    antes = [c.mesh for c in cena.corpos]
+    pequena = int(np.argmin([c.mesh.scale for c in cena.corpos]))
+    concluidos = []
+    # Voxel de 1.0: some com a esfera de raio 0.1, as outras são remalhadas
+    infos, erros = cena.aplicar('remesh_voxel', [0, 1, 2], tamanho_voxel=1.0,
+                                ao_terminar_corpo=lambda i, n, total: concluidos.append((n, total)))
+    assert list(erros) == [pequena] and isinstance(erros[pequena], ValueError)
+    assert sorted(infos) == sorted(set(range(3)) - {pequena})
+    # O corpo com erro mantém a malha anterior
+    assert cena.corpos[pequena].mesh is antes[pequena]
+    assert all(cena.corpos[i].mesh is not antes[i] for i in infos)
+    assert concluidos == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_aplicar_cancelado():
+    cena = Cena.de_componentes(_montagem()[0])
+    cancelar = threading.Event()
+    cancelar.set()
+    antes = [c.mesh for c in cena.corpos]
+    with pytest.raises(InterruptedError):
+        cena.aplicar('subdivisao', cancelar=cancelar)
+    assert all(c.mesh is m for c, m in zip(cena.corpos, antes))
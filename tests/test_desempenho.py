@@ -0,0 +1,133 @@
+"""Orçamentos de tempo e memória por operação em malhas grandes do corpus.
+
+Os orçamentos ficam ~3x acima do medido (com tracemalloc ligado, que deixa
+tudo mais lento); estourar um deles indica regressão de desempenho.
+"""
+import numpy as np
+import pytest
+
+import corpus
+import operacoes
+from desvio import mapa_desvio
+
+pytestmark = pytest.mark.desempenho
+
+
+@pytest.fixture(scope='module')
+def esfera_grande():
+    return corpus.esfera(6)
+
+
+def test_preencher_buracos_malha_grande(medir):
+    furada, esperado = corpus.com_buracos(200, subdivisoes=7)
+    medicao = medir(operacoes.preencher_buracos, furada)
+    assert medicao.resultado[1]['buracos'] == esperado['buracos']
+    medicao.dentro_do_orcamento(segundos=1.5, megabytes=200)
+
+
+def test_preencher_buraco_enorme(medir):
+    aberta, esperado = corpus.cilindro_sem_tampa(1500)
+    # Acima do limite padrão o laço fica para o MeshFix, sem triangular nada
+    medicao = medir(operacoes.preencher_buracos, aberta)
+    assert medicao.resultado[1]['buracos'] == 0
+    medicao.dentro_do_orcamento(segundos=0.1, megabytes=10)
+    medicao = medir(operacoes.preencher_buracos, aberta, max_arestas=None)
+    mesh, info = medicao.resultado
+    assert info['buracos'] == 1 and mesh.is_watertight
+    assert mesh.volume == pytest.approx(esperado['volume'], rel=1e-6)
+    medicao.dentro_do_orcamento(segundos=1.5, megabytes=330)
+
+
+def test_remesh_voxel(medir, esfera_grande):
+    medicao = medir(operacoes.remesh_voxel, esfera_grande, tamanho_voxel=0.2)
+    medicao.dentro_do_orcamento(segundos=12, megabytes=160)
+
+
+def test_subdivisao(medir):
+    medicao = medir(operacoes.subdivisao, corpus.esfera(4), iteracoes=2)
+    medicao.dentro_do_orcamento(segundos=4, megabytes=70)
+
+
+def test_solidificar(medir, esfera_grande):
+    medicao = medir(operacoes.solidificar, esfera_grande, espessura=0.1)
+    medicao.dentro_do_orcamento(segundos=2.5, megabytes=250)
+
+
+def test_remover_duplicados(medir):
+    medicao = medir(operacoes.remover_duplicados, corpus.sopa_duplicada(5)[0])
+    medicao.dentro_do_orcamento(segundos=3, megabytes=65)
+
+
+def test_pares_que_se_cruzam(medir):
+    from autointersecao import pares_que_se_cruzam
+    esfera = corpus.esfera(7)
+    medicao = medir(pares_que_se_cruzam, esfera.vertices, esfera.faces)
+    assert len(medicao.resultado) == 0
+    medicao.dentro_do_orcamento(segundos=8, megabytes=600)
+
+
+def test_pares_candidatos_em_leque(medir):
+    import trimesh
+
+    from autointersecao import pares_candidatos
+    # Tampas de cilindro CAD: 4000 faces longas num leque em volta do centro (16M pares numa grade única)
+    cilindro = trimesh.creation.cylinder(radius=1, height=1, sections=4000)
+    medicao = medir(pares_candidatos, np.asarray(cilindro.vertices), np.asarray(cilindro.faces))
+    assert len(medicao.resultado) < 20 * len(cilindro.faces)
+    medicao.dentro_do_orcamento(segundos=3, megabytes=700)
+
+
+def test_mapa_desvio(medir, esfera_grande):
+    medicao = medir(mapa_desvio, esfera_grande, esfera_grande)
+    assert medicao.resultado['hausdorff'] < 1e-9
+    medicao.dentro_do_orcamento(segundos=3, megabytes=320)
+
+
+def test_miniaturas(medir, esfera_grande):
+    from render_cpu import miniaturas
+    medicao = medir(miniaturas, esfera_grande, tamanho=256)
+    medicao.dentro_do_orcamento(segundos=2, megabytes=150)
+
+
+def test_reordenar_localidade(medir, esfera_grande):
+    medicao = medir(operacoes.reordenar_localidade, esfera_grande)
+    medicao.dentro_do_orcamento(segundos=0.5, megabytes=80)
+
+
+def test_suavizar(medir):
+    esfera = corpus.esfera(7)
+    medicao = medir(operacoes.suavizar, esfera, iteracoes=20)
+    medicao.dentro_do_orcamento(segundos=1.5, megabytes=250)
+    # Segunda passada na mesma topologia: operador em cache, só os produtos esparsos
+    medir(operacoes.suavizar, medicao.resultado[0], iteracoes=20).dentro_do_orcamento(segundos=0.8, megabytes=60)
+
+
+@pytest.mark.parametrize('extensao, segundos', [('.stl', 0.1), ('.ply', 0.05), ('.glb', 0.05), ('.3mf', 2.5)])
+def test_exportar(medir, tmp_path, esfera_grande, extensao, segundos):
+    from exportacao import exportar
+    # Em fluxo: o pico fica num bloco, não num objeto por face
+    medicao = medir(exportar, str(tmp_path / f'esfera{extensao}'), esfera_grande)
+    medicao.dentro_do_orcamento(segundos=segundos, megabytes=40)
+
+
+def test_campo_distancia(medir, esfera_grande):
+    from campo_distancia import CampoDistancia
+    medicao = medir(CampoDistancia, esfera_grande)
+    medicao.dentro_do_orcamento(segundos=30, megabytes=1300)
+    pontos = np.random.default_rng(0).uniform(-10.5, 10.5, (1000000, 3))
+    pontos *= 10 / np.maximum(np.linalg.norm(pontos, axis=1), 1e-9)[:, None]
+    medir(medicao.resultado.consultar, pontos).dentro_do_orcamento(segundos=2.5, megabytes=800)
+
+
+@pytest.mark.parametrize('nome, parametros', [
+    ('subdivisao', {'iteracoes': 2}),
+    ('remesh_voxel', {'tamanho_voxel': 0.3}),
+    ('solidificar', {'espessura': 0.1}),
+])
+def test_modelo_de_custo_cobre_o_pico(medir, nome, parametros):
+    # O guarda de memória (custo_memoria) só protege se a estimativa não ficar abaixo do real
+    mesh = corpus.esfera(5)
+    estimativa = operacoes.estimar_custo(nome, mesh, **parametros)
+    medicao = medir(operacoes.executar, nome, mesh, **parametros)
+    assert medicao.pico_bytes <= estimativa['pico_bytes']
+    assert len(medicao.resultado[0].faces) <= 1.5 * estimativa['faces']
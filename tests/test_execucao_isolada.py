@@ -0,0 +1,99 @@
+"""Execução isolada: falhas nativas viram RuntimeError e a próxima tentativa assume."""
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import corpus
+from execucao_isolada import executar_isolado
+
+
+# Funções de teste no topo do módulo: o subprocesso (spawn) precisa importá-las
+def escalar(vertices, faces, fator=2.0, travar=False, derrubar=False):
+    if derrubar:
+        os.kill(os.getpid(), signal.SIGSEGV)
+    if travar:
+        time.sleep(60)
+    return vertices * fator, faces[:, ::-1]
+
+
+def falhar(vertices, faces):
+    raise ValueError('entrada patológica')
+
+
+def travar_cluster(vertices, faces, alvo):
+    time.sleep(60)
+
+
+def decimar_ou_derrubar(vertices, faces, alvo):
+    # No lugar do pymeshlab: o cluster que contém o vértice mais alto derruba o processo, os outros travam
+    if vertices[:, 2].max() >= 9.99:
+        os.kill(os.getpid(), signal.SIGSEGV)
+    time.sleep(60)
+
+
+def test_executar_isolado_devolve_os_arrays():
+    esfera = corpus.esfera(3)
+    vertices, faces, usados = executar_isolado(escalar, esfera.vertices, esfera.faces, [{'fator': 3.0}])
+    assert np.allclose(vertices, esfera.vertices * 3) and np.array_equal(faces, esfera.faces[:, ::-1])
+    assert usados == {'fator': 3.0}
+
+
+def test_segfault_e_tempo_esgotado_caem_para_a_proxima_tentativa():
+    esfera = corpus.esfera(2)
+    inicio = time.perf_counter()
+    vertices, _, usados = executar_isolado(escalar, esfera.vertices, esfera.faces,
+                                           [{'derrubar': True}, {'travar': True}, {'fator': 0.5}], tempo_limite=3)
+    assert usados == {'fator': 0.5} and np.allclose(vertices, esfera.vertices * 0.5)
+    assert time.perf_counter() - inicio < 30
+
+
+def test_todas_as_tentativas_falham():
+    esfera = corpus.esfera(1)
+    with pytest.raises(RuntimeError) as erro:
+        executar_isolado(falhar, esfera.vertices, esfera.faces, [{}], descricao='MeshFix')
+    assert 'MeshFix' in str(erro.value) and 'entrada patológica' in str(erro.value)
+    with pytest.raises(RuntimeError, match='SIGSEGV'):
+        executar_isolado(escalar, esfera.vertices, esfera.faces, [{'derrubar': True}])
+
+
+def test_cancelar_mata_o_subprocesso():
+    esfera = corpus.esfera(2)
+    cancelar = threading.Event()
+    threading.Timer(1.0, cancelar.set).start()
+    inicio = time.perf_counter()
+    # As tentativas seguintes não rodam: cancelamento não é falha
+    with pytest.raises(InterruptedError):
+        executar_isolado(escalar, esfera.vertices, esfera.faces, [{'travar': True}, {'fator': 0.5}],
+                         tempo_limite=30, cancelar=cancelar)
+    assert time.perf_counter() - inicio < 10
+    assert not [p for p in multiprocessing.active_children() if p.is_alive()]
+
+
+def test_cluster_que_derruba_o_processo_vira_erro_e_para_os_outros(monkeypatch):
+    import decimacao_paralela
+    monkeypatch.setattr(decimacao_paralela, '_decimar_cluster', decimar_ou_derrubar)
+    esfera = corpus.esfera(3)
+    inicio = time.perf_counter()
+    with pytest.raises(RuntimeError, match='SIGSEGV'):
+        decimacao_paralela.decimar_particionado(esfera.vertices, esfera.faces, 0.5, workers=2, n_clusters=4)
+    assert time.perf_counter() - inicio < 20
+    assert not [p for p in multiprocessing.active_children() if p.is_alive()]
+
+
+def test_cancelar_a_decimacao_particionada(monkeypatch):
+    import decimacao_paralela
+    monkeypatch.setattr(decimacao_paralela, '_decimar_cluster', travar_cluster)
+    esfera = corpus.esfera(3)
+    cancelar = threading.Event()
+    threading.Timer(1.0, cancelar.set).start()
+    inicio = time.perf_counter()
+    with pytest.raises(InterruptedError):
+        decimacao_paralela.decimar_particionado(esfera.vertices, esfera.faces, 0.5, workers=2,
+                                                cancelar=cancelar, tempo_limite=30)
+    assert time.perf_counter() - inicio < 10
+    assert not [p for p in multiprocessing.active_children() if p.is_alive()]
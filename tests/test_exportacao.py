@@ -0,0 +1,109 @@
+"""Exportadores em fluxo: o arquivo relido (trimesh) tem a mesma geometria da malha gravada."""
+import json
+import os
+import struct
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+import pytest
+import trimesh
+
+import corpus
+from exportacao import exportar
+
+
+@pytest.mark.parametrize('extensao', ['.stl', '.ply', '.obj', '.glb'])
+def test_exportar_e_reler(tmp_path, extensao):
+    esfera = corpus.esfera(3)
+    caminho = str(tmp_path / f'esfera{extensao}')
+    avancos = []
+    # Blocos pequenos: a costura entre blocos também é exercitada
+    exportar(caminho, esfera, ao_avancar=lambda feitos, total: avancos.append((feitos, total)), bloco=100)
+    relida = trimesh.load(caminho, force='mesh')
+    assert len(relida.faces) == len(esfera.faces) and relida.is_watertight
+    assert np.isclose(relida.volume, esfera.volume, rtol=1e-5)
+    assert len(avancos) > 2 and avancos[-1][0] == avancos[-1][1]
+    assert not os.path.exists(caminho + '.parcial')
+
+
+def test_exportar_ply_com_cores(tmp_path):
+    esfera = corpus.esfera(2)
+    cores = np.random.default_rng(0).integers(0, 255, (len(esfera.vertices), 4)).astype(np.uint8)
+    esfera.visual.vertex_colors = cores
+    exportar(str(tmp_path / 'cores.ply'), esfera)
+    relida = trimesh.load(str(tmp_path / 'cores.ply'), process=False)
+    assert (relida.visual.vertex_colors == cores).all()
+
+
+def _normais_gravadas(caminho):
+    """Normais por vértice como estão no arquivo (o trimesh.load as recalcula ao validar a malha)"""
+    from trimesh.exchange.gltf import load_glb
+    from trimesh.exchange.ply import load_ply
+
+    with open(caminho, 'rb') as f:
+        if caminho.endswith('.ply'):
+            return load_ply(f)['vertex_normals']
+        if caminho.endswith('.obj'):
+            return np.array([linha.split()[1:] for linha in f.read().decode().splitlines()
+                             if linha.startswith('vn ')], dtype=float)
+        malha = next(iter(load_glb(f)['geometry'].values()))
+        f.seek(12)
+        tamanho, _ = struct.unpack('<I4s', f.read(8))
+        escala = json.loads(f.read(tamanho))['nodes'][0].get('scale', [1.0, 1.0, 1.0])
+    # Normal no espaço do mundo: inversa transposta da escala do nó
+    normais = malha['vertex_normals'] / np.asarray(escala)
+    return normais / np.linalg.norm(normais, axis=1)[:, None]
+
+
+@pytest.mark.parametrize('extensao,opcoes', [('.ply', {}), ('.obj', {}), ('.glb', {}), ('.glb', {'quantizar': True})])
+def test_exportar_mantem_normais(tmp_path, extensao, opcoes):
+    esfera = corpus.esfera(2)
+    # Normais personalizadas (ex.: transferidas), diferentes das calculadas pelas faces
+    normais = esfera.vertex_normals + np.random.default_rng(0).normal(0, 0.2, (len(esfera.vertices), 3))
+    normais /= np.linalg.norm(normais, axis=1)[:, None]
+    esfera.vertex_normals = normais
+    caminho = str(tmp_path / f'normais{extensao}')
+    exportar(caminho, esfera, **opcoes)
+    assert np.allclose(_normais_gravadas(caminho), normais, atol=1e-4)
+
+
+def test_exportar_ply_com_uv_e_obj_texturizado(tmp_path):
+    from PIL import Image
+
+    caixa = trimesh.creation.box()
+    caixa.unmerge_vertices()
+    uv = np.random.default_rng(0).random((len(caixa.vertices), 2))
+    caixa.visual = trimesh.visual.TextureVisuals(uv=uv, image=Image.new('RGB', (4, 4), (255, 0, 0)))
+    exportar(str(tmp_path / 'caixa.ply'), caixa)
+    relida = trimesh.load(str(tmp_path / 'caixa.ply'), process=False)
+    assert np.allclose(relida.visual.uv, uv)
+    # OBJ texturizado: material e imagem ficam com o exportador do trimesh
+    exportar(str(tmp_path / 'caixa.obj'), caixa)
+    texto = open(tmp_path / 'caixa.obj', encoding='utf-8').read()
+    assert texto.count('\nvt ') == len(uv) and 'mtllib' in texto
+
+
+def test_exportar_glb_quantizado(tmp_path):
+    esfera = corpus.esfera(4)
+    exportar(str(tmp_path / 'normal.glb'), esfera)
+    exportar(str(tmp_path / 'quantizado.glb'), esfera, quantizar=True)
+    relida = trimesh.load(str(tmp_path / 'quantizado.glb'), force='mesh')
+    assert np.abs(relida.bounds - esfera.bounds).max() < 1e-6
+    assert np.isclose(relida.volume, esfera.volume, rtol=1e-3)
+    assert os.path.getsize(tmp_path / 'quantizado.glb') < os.path.getsize(tmp_path / 'normal.glb')
+
+
+def test_exportar_3mf(tmp_path):
+    esfera = corpus.esfera(3)
+    caminho = str(tmp_path / 'esfera.3mf')
+    exportar(caminho, esfera, bloco=100)
+    with zipfile.ZipFile(caminho) as pacote:
+        assert {'[Content_Types].xml', '_rels/.rels', '3D/3dmodel.model'} <= set(pacote.namelist())
+        modelo = ET.fromstring(pacote.read('3D/3dmodel.model'))
+        comprimido = pacote.getinfo('3D/3dmodel.model').compress_size
+        assert comprimido < pacote.getinfo('3D/3dmodel.model').file_size / 2
+    ns = {'m': 'http://schemas.microsoft.com/3dmanufacturing/core/2015/02'}
+    vertices = np.array([[float(v.get(e)) for e in 'xyz'] for v in modelo.iterfind('.//m:vertex', ns)])
+    faces = np.array([[int(t.get(f'v{k}')) for k in (1, 2, 3)] for t in modelo.iterfind('.//m:triangle', ns)])
+    assert np.allclose(vertices, esfera.vertices) and np.array_equal(faces, esfera.faces)
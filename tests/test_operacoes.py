@@ -0,0 +1,338 @@
+"""Qualidade esperada de cada operação sobre o corpus de malhas defeituosas."""
+import numpy as np
+import pytest
+import trimesh
+
+import corpus
+import operacoes
+from analise_incremental import AnaliseIncremental
+from autointersecao import pares_que_se_cruzam
+from campo_distancia import CampoDistancia
+from desvio import mapa_desvio
+
+
+def test_corpus_tem_os_defeitos():
+    furada, esperado = corpus.com_buracos(8)
+    assert AnaliseIncremental(furada).n_arestas_abertas > 0
+    assert AnaliseIncremental(corpus.nao_manifold()[0]).n_arestas_nao_manifold == 1
+    assert not corpus.normais_invertidas()[0].is_winding_consistent
+    assert AnaliseIncremental(corpus.sopa_duplicada()[0]).n_duplicados > 0
+    dobrada = corpus.dobrada()[0]
+    assert len(pares_que_se_cruzam(dobrada.vertices, dobrada.faces)) > 0
+
+
+def test_preencher_buracos_fecha_todos():
+    furada, esperado = corpus.com_buracos(12)
+    mesh, info = operacoes.preencher_buracos(furada)
+    assert info['buracos'] == esperado['buracos']
+    assert AnaliseIncremental(mesh).watertight
+    assert mesh.is_winding_consistent
+    # Os remendos são planos sobre buracos pequenos: o volume quase não muda
+    assert mesh.volume == pytest.approx(esperado['volume'], rel=0.01)
+
+
+def test_preencher_buracos_respeita_max_arestas():
+    furada, _ = corpus.com_buracos(6)
+    mesh, info = operacoes.preencher_buracos(furada, max_arestas=3)
+    assert info['buracos'] == 0
+    assert len(mesh.faces) == len(furada.faces)
+
+
+def test_preencher_buracos_com_suavizacao_cria_vertices():
+    furada, _ = corpus.com_buracos(4)
+    mesh, info = operacoes.preencher_buracos(furada, suavizar=True)
+    assert len(info['vertices_adicionados']) > 0
+    assert AnaliseIncremental(mesh).watertight
+
+
+def test_reparar_local_sem_meshfix():
+    furada, esperado = corpus.com_buracos(10)
+    mesh, info = operacoes.reparar(furada)
+    assert info == {'buracos': esperado['buracos'], 'meshfix': False}
+    assert mesh.is_watertight
+
+
+def test_reparar_malha_fechada_nao_altera():
+    mesh, _ = corpus.autointersecao()
+    reparada, info = operacoes.reparar(mesh)
+    assert info == {'buracos': 0, 'meshfix': False}
+    assert np.array_equal(reparada.faces, mesh.faces)
+
+
+def test_reparar_nao_manifold_com_meshfix():
+    pytest.importorskip('pymeshfix')
+    mesh, _ = corpus.nao_manifold()
+    reparada, info = operacoes.reparar(mesh)
+    assert info['meshfix']
+    assert reparada.is_watertight
+
+
+def test_remover_duplicados_solda_a_sopa():
+    sopa, esperado = corpus.sopa_duplicada()
+    mesh, info = operacoes.remover_duplicados(sopa)
+    assert len(mesh.vertices) == esperado['vertices']
+    assert info['vertices_removidos'] == len(sopa.vertices) - esperado['vertices']
+    assert AnaliseIncremental(mesh).watertight
+
+
+@pytest.mark.parametrize('orientacao, sinal', [('out', 1), ('in', -1)])
+def test_recalcular_normais(orientacao, sinal):
+    invertida, esperado = corpus.normais_invertidas()
+    mesh, _ = operacoes.recalcular_normais(invertida, orientacao)
+    assert mesh.is_winding_consistent
+    assert mesh.volume == pytest.approx(sinal * esperado['volume'], rel=1e-6)
+
+
+def test_resolver_intersecoes_dobra():
+    dobrada, _ = corpus.dobrada()
+    assert len(pares_que_se_cruzam(dobrada.vertices, dobrada.faces)) > 0
+    mesh, info = operacoes.resolver_intersecoes(dobrada)
+    assert info['pares'] > 0 and info['restantes'] == 0
+    assert len(pares_que_se_cruzam(mesh.vertices, mesh.faces)) == 0
+    assert AnaliseIncremental(mesh).watertight
+    assert mesh.is_winding_consistent
+
+
+def test_resolver_intersecoes_preserva_buracos_existentes():
+    furada, _ = corpus.com_buracos(3)
+    mesh, info = operacoes.resolver_intersecoes(furada)
+    assert info['pares'] == 0
+    assert len(mesh.faces) == len(furada.faces)
+
+
+def test_esfera_sem_autointersecoes():
+    esfera = corpus.esfera(4)
+    assert len(pares_que_se_cruzam(esfera.vertices, esfera.faces)) == 0
+
+
+def test_autointersecao_entre_corpos_detectada():
+    caixas, _ = corpus.autointersecao()
+    assert len(pares_que_se_cruzam(caixas.vertices, caixas.faces)) > 0
+
+
+def test_mesh_cleanup_remove_detritos():
+    mesh, esperado = corpus.com_detritos()
+    limpa, info = operacoes.mesh_cleanup(mesh, min_faces=50)
+    assert info['componentes_removidas'] == esperado['detritos']
+    assert len(limpa.faces) == esperado['faces_esfera']
+
+
+def test_mesh_cleanup_sem_sobreviventes_falha():
+    mesh, _ = corpus.com_detritos()
+    with pytest.raises(ValueError):
+        operacoes.mesh_cleanup(mesh, min_faces=10 ** 6)
+
+
+def test_subdivisao_quadruplica_faces():
+    mesh = corpus.esfera(2)
+    sub, _ = operacoes.subdivisao(mesh, iteracoes=2)
+    assert len(sub.faces) == 16 * len(mesh.faces)
+    assert AnaliseIncremental(sub).watertight
+
+
+def test_solidificar_fecha_placa():
+    placa, esperado = corpus.placa_aberta()
+    casca, info = operacoes.solidificar(placa, espessura=0.5)
+    assert info['arestas_borda'] == esperado['arestas_borda']
+    assert casca.is_watertight
+    assert casca.volume == pytest.approx(10 * 10 * 0.5, rel=1e-6)
+
+
+def test_solidificar_espessura_invalida():
+    with pytest.raises(ValueError):
+        operacoes.solidificar(corpus.placa_aberta()[0], espessura=0)
+
+
+def test_remesh_voxel_preserva_forma():
+    mesh = corpus.esfera(4)
+    h = 0.5
+    remesh, _ = operacoes.remesh_voxel(mesh, tamanho_voxel=h)
+    assert AnaliseIncremental(remesh).watertight
+    assert mapa_desvio(mesh, remesh)['hausdorff'] < h
+
+
+def test_remesh_voxel_fecha_entrada_aberta():
+    # Esfera sem a calota: o sinal longe da superfície é decidido na união dos blocos, sem emendas abertas
+    mesh = corpus.esfera(4)
+    aberta = trimesh.Trimesh(mesh.vertices, mesh.faces[mesh.triangles_center[:, 2] < 5], process=False)
+    remesh, _ = operacoes.remesh_voxel(aberta, tamanho_voxel=0.5)
+    assert AnaliseIncremental(remesh).watertight
+
+
+def test_remesh_voxel_grande_demais():
+    with pytest.raises(ValueError):
+        operacoes.remesh_voxel(corpus.esfera(2), tamanho_voxel=1000)
+
+
+def test_estatisticas():
+    furada, _ = corpus.com_buracos(3)
+    mesh, info = operacoes.estatisticas(furada)
+    assert mesh is furada
+    assert info['faces'] == len(furada.faces)
+    assert not info['watertight'] and info['arestas_abertas'] > 0
+    assert 'volume' not in info
+    assert 'volume' in operacoes.estatisticas(corpus.esfera(2))[1]
+
+
+def test_simplificar():
+    pytest.importorskip('pymeshlab')
+    mesh = corpus.esfera(4)
+    simples, _ = operacoes.simplificar(mesh, fator=0.25)
+    assert len(simples.faces) <= 0.26 * len(mesh.faces)
+    assert mapa_desvio(mesh, simples)['hausdorff'] < 0.5
+
+
+def test_particionar_e_costurar():
+    import trimesh
+    from decimacao_paralela import costurar, particionar
+    esfera = corpus.esfera(5)
+    clusters = particionar(esfera.vertices, esfera.faces, 4)
+    assert sum(len(locais) for _, locais, _ in clusters) == len(esfera.faces)
+    assert max(len(l) for _, l, _ in clusters) - min(len(l) for _, l, _ in clusters) <= 1
+    # Sem decimar, costurar pelos vértices travados devolve a mesma superfície fechada
+    pedacos = [(esfera.vertices[ids], locais, np.where(travados, ids, -1)) for ids, locais, travados in clusters]
+    vertices, faces, costura = costurar(pedacos)
+    costurada = trimesh.Trimesh(vertices, faces, process=False)
+    analise = AnaliseIncremental(costurada)
+    assert analise.watertight and analise.n_duplicados == 0
+    assert len(vertices) == len(esfera.vertices) and 0 < costura.sum() < len(vertices) / 5
+    assert np.isclose(costurada.volume, esfera.volume)
+
+
+def test_simplificar_particionado():
+    pytest.importorskip('pymeshlab')
+    mesh = corpus.esfera(7)
+    simples, info = operacoes.simplificar(mesh, fator=0.25, particionado=True, workers=2)
+    assert info['clusters'] >= 2
+    assert len(simples.faces) <= 0.26 * len(mesh.faces)
+    assert AnaliseIncremental(simples).watertight
+    assert mapa_desvio(mesh, simples)['hausdorff'] < 0.5
+
+
+def test_remesh_surface():
+    pytest.importorskip('pymeshlab')
+    remesh, _ = operacoes.remesh_surface(corpus.esfera(3), comprimento=1.0)
+    assert AnaliseIncremental(remesh).watertight
+
+
+def test_campo_distancia_esfera():
+    campo = CampoDistancia(corpus.esfera(4), tamanho_voxel=0.4)
+    rng = np.random.default_rng(0)
+    direcoes = rng.normal(size=(5000, 3))
+    direcoes /= np.linalg.norm(direcoes, axis=1)[:, None]
+    # Dentro da faixa (interpolado) e bem longe dela (consulta exata)
+    for raios in (rng.uniform(9.5, 10.5, 5000), rng.uniform(15, 20, 5000)):
+        pontos = direcoes * raios[:, None]
+        distancias, gradientes = campo.consultar(pontos)
+        assert np.abs(distancias - (raios - 10)).max() < 0.1
+        assert np.abs(np.einsum('ij,ij->i', gradientes, direcoes) - 1).max() < 0.1
+    assert campo.dentro([[0, 0, 0], [9.5, 0, 0]]).all()
+    assert not campo.dentro([[10.5, 0, 0]]).any()
+
+
+def test_reordenar_localidade():
+    import trimesh
+    from localidade import reordenar_poligonos
+    from poligonos import MalhaPoligonal
+    esfera = corpus.esfera(4)
+    rng = np.random.default_rng(0)
+    # Ordem de scanner: vértices e faces em ordem arbitrária
+    mapa = rng.permutation(len(esfera.vertices))
+    faces = np.argsort(mapa)[esfera.faces[rng.permutation(len(esfera.faces))]]
+    embaralhada = trimesh.Trimesh(esfera.vertices[mapa], faces, process=False)
+    embaralhada.visual.vertex_colors = rng.integers(0, 255, (len(mapa), 4)).astype(np.uint8)
+    cores = embaralhada.visual.vertex_colors.copy()
+    reordenada, info = operacoes.reordenar_localidade(embaralhada)
+    ordem_v, ordem_f = info['ordem_vertices'], info['ordem_faces']
+    assert np.allclose(reordenada.vertices[reordenada.faces], embaralhada.vertices[embaralhada.faces][ordem_f])
+    assert (reordenada.visual.vertex_colors == cores[ordem_v]).all()
+    assert reordenada.is_winding_consistent and AnaliseIncremental(reordenada).watertight
+    # Localidade: vértices de uma mesma face ficam perto no array
+    salto = lambda m: np.abs(np.diff(np.sort(m.faces, axis=1), axis=1)).mean()
+    assert salto(reordenada) < salto(embaralhada) / 10
+    poligonos = MalhaPoligonal.de_faces(embaralhada.vertices, embaralhada.faces)
+    novos = reordenar_poligonos(poligonos, ordem_v, reordenada.vertices)
+    assert np.allclose(novos.vertices[novos.indices], poligonos.vertices[poligonos.indices])
+
+
+def test_quadrangular_grade_triangulada():
+    from poligonos import quadrangular
+    # Grade 4 x 5 de quadrados unitários, cada um cortado por uma diagonal (alternada), mais um triângulo solto na borda
+    nx, ny = 4, 5
+    x, y = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1), indexing='ij')
+    vertices = np.column_stack([x.ravel(), y.ravel(), np.zeros(x.size)]).astype(float)
+    indice = lambda i, j: i * (ny + 1) + j
+    celulas, triangulos = [], []
+    for i in range(nx):
+        for j in range(ny):
+            a, b, c, d = indice(i, j), indice(i + 1, j), indice(i + 1, j + 1), indice(i, j + 1)
+            celulas.append(sorted((a, b, c, d)))
+            triangulos += [[a, b, c], [a, c, d]] if (i + j) % 2 else [[a, b, d], [b, c, d]]
+    vertices = np.vstack([vertices, [[nx + 1.0, 0.0, 0.0]]])
+    triangulos.append([indice(nx, 0), len(vertices) - 1, indice(nx, 1)])
+    poligonos = quadrangular(vertices, np.array(triangulos))
+    assert poligonos.contagem_por_tamanho() == {3: 1, 4: nx * ny}
+    # Cada quad junta os dois triângulos de uma célula: nenhum par atravessa a grade
+    _, quads = poligonos.faces_de_tamanho(4)
+    assert sorted(sorted(q) for q in quads.tolist()) == sorted(celulas)
+    # A triangulação de volta cobre a mesma área com a mesma orientação (normais +z)
+    tris = vertices[poligonos.triangular()]
+    normais = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    assert (normais[:, 2] > 0).all() and np.isclose(normais[:, 2].sum() / 2, nx * ny + 0.5)
+
+
+def test_modo_compacto():
+    from compacto import bytes_arrays, compactar, memoria_malha
+    from proximidade import IndiceProximidade
+    esfera = corpus.esfera(4)
+    vertices, faces = compactar(esfera.vertices, esfera.faces)
+    assert vertices.dtype == np.float32 and faces.dtype == np.int32
+    with pytest.raises(ValueError):
+        compactar(vertices, np.array([[0, 1, 2 ** 31]]))
+    # Mesmas respostas (a menos do arredondamento das posições) com metade dos bytes de geometria
+    pontos = np.random.default_rng(0).normal(size=(2000, 3)) * 10
+    normal = IndiceProximidade(esfera.vertices, esfera.faces)
+    compacto = IndiceProximidade(esfera.vertices, esfera.faces, compacto=True)
+    assert np.allclose(normal.consultar(pontos)[1], compacto.consultar(pontos)[1], atol=1e-5)
+    assert compacto.vertices.nbytes + compacto.faces.nbytes == (normal.vertices.nbytes + normal.faces.nbytes) // 2
+    campo = CampoDistancia(esfera, tamanho_voxel=0.4, compacto=True)
+    assert campo.valores.dtype == np.float32
+    assert bytes_arrays(campo) < bytes_arrays(CampoDistancia(esfera, tamanho_voxel=0.4))
+    assert memoria_malha(esfera)['geometria'] == esfera.vertices.nbytes + esfera.faces.nbytes
+
+
+@pytest.mark.parametrize('metodo', ['taubin', 'hc', 'laplaciano'])
+def test_suavizar_reduz_ruido(metodo):
+    esfera = corpus.esfera(4)
+    ruidosa = esfera.copy()
+    ruidosa.vertices = ruidosa.vertices + np.random.default_rng(0).normal(0, 0.05, ruidosa.vertices.shape)
+    suavizada, _ = operacoes.suavizar(ruidosa, metodo=metodo)
+    raio = lambda m: np.linalg.norm(m.vertices, axis=1)
+    assert raio(suavizada).std() < raio(ruidosa).std() / 2
+    assert np.array_equal(suavizada.faces, ruidosa.faces)
+    # Taubin e HC não encolhem a malha; o Laplaciano simples encolhe
+    perda = 1 - suavizada.volume / esfera.volume
+    assert (perda > 0.02) if metodo == 'laplaciano' else (abs(perda) < 0.01)
+
+
+def test_suavizar_borda_e_feicoes():
+    import trimesh
+    from buracos import arestas_de_borda
+    placa = corpus.placa_aberta(20)[0]
+    placa.vertices[:, 2] += np.random.default_rng(0).normal(0, 0.05, len(placa.vertices))
+    suavizada, info = operacoes.suavizar(placa, pesos='cotangente')
+    borda = np.unique(arestas_de_borda(placa.faces))
+    assert info['vertices_fixos'] == len(borda)
+    assert np.array_equal(suavizada.vertices[borda], placa.vertices[borda])
+    assert suavizada.vertices[:, 2].std() < placa.vertices[:, 2].std()
+    # Arestas vivas do cubo: as faces planas e os cantos não se mexem
+    cubo = trimesh.creation.box().subdivide().subdivide()
+    preservado, info = operacoes.suavizar(cubo, iteracoes=50, angulo_feicao=30)
+    assert info['vertices_fixos'] == 8 and info['arestas_feicao'] == 48
+    assert np.allclose(preservado.vertices, cubo.vertices)
+    assert not np.allclose(operacoes.suavizar(cubo, iteracoes=50)[0].vertices, cubo.vertices)
+
+
+def test_executar_operacao_desconhecida():
+    with pytest.raises(ValueError):
+        operacoes.executar('nao_existe', corpus.esfera(1))
@@ -0,0 +1,155 @@
+"""Modo vigia: espera o upload terminar, repara no pool e grava saída + relatório ao lado."""
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import trimesh
+
+import corpus
+import pasta_vigiada
+from pasta_vigiada import (
+    VigiaPasta, assinatura, caminho_relatorio, eh_entrada, gravar_relatorio, ja_processado, pico_estimado
+)
+
+
+# No topo do módulo: o processo do pool precisa importá-la
+def reparar_ou_morrer(caminho, max_arestas, cache, compressao):
+    # Como um reparo que estoura a memória: o processo some sem responder e leva o pool junto
+    if 'pesada' in caminho:
+        os.kill(os.getpid(), signal.SIGKILL)
+    time.sleep(1.0)
+    return {'saida': caminho}
+
+
+def test_eh_entrada():
+    assert eh_entrada('peca.stl') and eh_entrada('Peca.OBJ') and eh_entrada('peca.md3d')
+    for nome in ('peca_reparado.stl', 'peca.stl.md3d', 'peca.stl.part', 'peca.stl.parcial', '.peca.stl',
+                 'peca.stl.relatorio.json', 'notas.txt'):
+        assert not eh_entrada(nome), nome
+
+
+def test_so_despacha_arquivo_estavel(tmp_path):
+    caminho = str(tmp_path / 'peca.stl')
+    vigia = VigiaPasta(str(tmp_path), estabilidade=1.0)
+    with open(caminho, 'wb') as f:
+        f.write(b'metade')
+    assert vigia.varrer(agora=0.0) == []
+    # Ainda crescendo: o relógio da estabilidade recomeça
+    with open(caminho, 'ab') as f:
+        f.write(b' e o resto')
+    assert vigia.varrer(agora=0.8) == []
+    assert vigia.varrer(agora=1.5) == []
+    assert vigia.varrer(agora=1.9) == [caminho]
+    assert list(vigia.fila) == [caminho] and vigia.varrer(agora=5.0) == []
+
+
+def test_vigiar_repara_e_grava_relatorios(tmp_path):
+    for i in range(3):
+        corpus.com_buracos(2, semente=i)[0].export(str(tmp_path / f'furada{i}.stl'))
+    (tmp_path / 'corrompida.stl').write_bytes(b'isto nao e uma malha' * 10)
+    vigia = VigiaPasta(str(tmp_path), workers=2, intervalo=0.1, estabilidade=0.3)
+    parar = threading.Event()
+    thread = threading.Thread(target=vigia.executar, args=(parar,))
+    thread.start()
+    try:
+        limite = time.monotonic() + 60
+        while vigia.processados < 4 and time.monotonic() < limite:
+            time.sleep(0.1)
+    finally:
+        parar.set()
+        thread.join()
+    for i in range(3):
+        relatorio = json.load(open(caminho_relatorio(str(tmp_path / f'furada{i}.stl')), encoding='utf-8'))
+        assert relatorio['estado'] == 'ok' and not relatorio['watertight_antes'] and relatorio['watertight']
+        assert trimesh.load(relatorio['saida']).is_watertight
+    relatorio = json.load(open(caminho_relatorio(str(tmp_path / 'corrompida.stl')), encoding='utf-8'))
+    assert relatorio['estado'] == 'erro' and 'Nenhuma face' in relatorio['erro']
+    # Com os relatórios gravados, um novo vigia não tem nada a fazer; a saída não vira entrada
+    assert list(VigiaPasta(str(tmp_path)).listar()) == []
+    assert not any(n.endswith('_reparado.stl.relatorio.json') for n in os.listdir(tmp_path))
+
+
+def test_ja_processado_compara_tamanho_e_mtime_da_entrada(tmp_path):
+    caminho = str(tmp_path / 'peca.stl')
+    (tmp_path / 'peca.stl').write_bytes(b'versao 1')
+    tamanho, mtime_ns = assinatura(caminho)
+    gravar_relatorio(caminho, {'estado': 'ok', 'tamanho_entrada': tamanho, 'mtime_ns_entrada': mtime_ns})
+    assert ja_processado(caminho)
+    # Substituída por uma cópia que preserva o mtime antigo (cp -p): mais velha que o relatório, mas outra
+    (tmp_path / 'peca.stl').write_bytes(b'versao 2 maior')
+    os.utime(caminho, ns=(mtime_ns - 10 ** 9, mtime_ns - 10 ** 9))
+    assert os.path.getmtime(caminho_relatorio(caminho)) > os.path.getmtime(caminho)
+    assert not ja_processado(caminho)
+    # Relatório antigo, sem a assinatura da entrada
+    gravar_relatorio(caminho, {'estado': 'ok'})
+    assert not ja_processado(caminho)
+
+
+def test_reparo_travado_expira_e_o_worker_morre(tmp_path):
+    caminho = str(tmp_path / 'travada.stl')
+    (tmp_path / 'travada.stl').write_bytes(b'x')
+    vigia = VigiaPasta(str(tmp_path), workers=1, tempo_limite=5)
+    executor = ProcessPoolExecutor(max_workers=1)
+    futuro = executor.submit(time.sleep, 60)
+    while not futuro.running():
+        time.sleep(0.05)
+    vigia.em_andamento[futuro] = (caminho, time.time(), assinatura(caminho))
+    assert not vigia.expirar()
+    assert vigia.expirar(agora=time.time() + 6)
+    relatorio = json.load(open(caminho_relatorio(caminho), encoding='utf-8'))
+    assert relatorio['estado'] == 'erro' and 'Tempo limite' in relatorio['erro']
+    assert ja_processado(caminho) and vigia.processados == 1
+    processos = list(executor._processes.values())
+    novo = vigia._recriar_pool(executor)
+    for processo in processos:
+        processo.join(10)
+        assert not processo.is_alive()
+    assert novo.submit(abs, -1).result(timeout=30) == 1
+    novo.shutdown()
+
+
+def test_arquivos_levados_pelo_pool_quebrado_repetem_sozinhos(tmp_path, monkeypatch):
+    monkeypatch.setattr(pasta_vigiada, '_reparar', reparar_ou_morrer)
+    for nome in ('inocente1.stl', 'pesada.stl', 'inocente2.stl'):
+        (tmp_path / nome).write_bytes(b'x' * 100)
+    vigia = VigiaPasta(str(tmp_path), workers=3, intervalo=0.1, estabilidade=0.2)
+    parar = threading.Event()
+    thread = threading.Thread(target=vigia.executar, args=(parar,))
+    thread.start()
+    try:
+        limite = time.monotonic() + 60
+        while vigia.processados < 3 and time.monotonic() < limite:
+            time.sleep(0.1)
+    finally:
+        parar.set()
+        thread.join()
+    estados = {nome: json.load(open(caminho_relatorio(str(tmp_path / nome)), encoding='utf-8'))['estado']
+               for nome in ('inocente1.stl', 'pesada.stl', 'inocente2.stl')}
+    # Só a culpada, que morreu também rodando sozinha, fica com o erro
+    assert estados == {'inocente1.stl': 'ok', 'pesada.stl': 'erro', 'inocente2.stl': 'ok'}
+    assert not vigia.sozinhos and not vigia.proprios
+
+
+class _ExecutorParado:
+    """Aceita submissões sem rodar nada: os reparos ficam em andamento sem alocar memória"""
+
+    def submit(self, *args):
+        return Future()
+
+
+def test_despachar_desconta_o_pico_dos_que_ja_estao_em_andamento(tmp_path, monkeypatch):
+    caminhos = []
+    for i in range(3):
+        caminho = str(tmp_path / f'peca{i}.stl')
+        (tmp_path / f'peca{i}.stl').write_bytes(b'x' * 5000)
+        caminhos.append(caminho)
+    pico = pico_estimado(5000)
+    # A memória livre não cai enquanto os submetidos não alocam: sem descontar, os três entrariam juntos
+    monkeypatch.setattr(pasta_vigiada, 'memoria_disponivel', lambda: int(2.5 * pico))
+    vigia = VigiaPasta(str(tmp_path), limite_fila=3)
+    vigia.fila.extend(caminhos)
+    assert vigia.despachar(_ExecutorParado()) == 2
+    assert list(vigia.fila) == caminhos[2:]
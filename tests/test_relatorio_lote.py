@@ -0,0 +1,87 @@
+"""Renderizador por software e relatório em lote (pool de processos + HTML)."""
+import multiprocessing
+import os
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+import corpus
+import relatorio_lote
+from relatorio_lote import gerar_relatorio, ler_operacao
+from render_cpu import FUNDO, _rasterizar, miniaturas, png_bytes
+
+
+def test_zbuffer_fica_com_o_mais_perto():
+    tela = np.array([[0, 0], [10, 0], [0, 10], [0, 0], [10, 0], [0, 10]], dtype=float)
+    profundidade = np.array([0, 0, 0, 1, 1, 1], dtype=float)
+    fbuf = _rasterizar(tela, profundidade, np.array([[0, 1, 2], [3, 4, 5]]), 10, 10)
+    assert fbuf[2 * 10 + 2] == 1
+    assert fbuf[9 * 10 + 9] == -1
+
+
+def test_miniaturas_marcam_bordas_abertas():
+    vermelho = lambda imagem: ((imagem[..., 0] > 200) & (imagem[..., 1] < 80)).sum()
+    fechada = miniaturas(corpus.esfera(3), tamanho=96)
+    furada = miniaturas(corpus.com_buracos(4)[0], tamanho=96)
+    assert len(fechada) == 3 and fechada[0].shape == (96, 96, 3)
+    assert sum(vermelho(i) for i in fechada) == 0
+    assert sum(vermelho(i) for i in furada) > 0
+    # Centro ocupado pela malha, canto com o fundo
+    assert (fechada[0][48, 48] != np.uint8(FUNDO[0] * 255)).any()
+    assert (fechada[0][0, 0] == np.uint8(FUNDO[0] * 255)).all()
+
+
+def test_png_bytes():
+    imagem = np.random.default_rng(0).integers(0, 255, (7, 5, 3)).astype(np.uint8)
+    dados = png_bytes(imagem)
+    assert dados[:8] == b'\x89PNG\r\n\x1a\n'
+    largura, altura = struct.unpack('>II', dados[16:24])
+    assert (largura, altura) == (5, 7)
+    tamanho_idat = struct.unpack('>I', dados[33:37])[0]
+    cru = np.frombuffer(zlib.decompress(dados[41:41 + tamanho_idat]), dtype=np.uint8).reshape(7, 16)
+    assert (cru[:, 0] == 0).all() and np.array_equal(cru[:, 1:].reshape(7, 5, 3), imagem)
+
+
+def test_ler_operacao():
+    assert ler_operacao('reparar') == {'nome': 'reparar'}
+    assert ler_operacao('simplificar:fator=0.5') == {'nome': 'simplificar', 'fator': 0.5}
+
+
+def test_relatorio_lote(tmp_path):
+    furada = str(tmp_path / 'furada.stl')
+    corpus.com_buracos(3)[0].export(furada)
+    ausente = str(tmp_path / 'nao_existe.stl')
+    caminho_html, resultados = gerar_relatorio([furada, ausente], str(tmp_path / 'rel'), workers=2, tamanho=64)
+    assert resultados[0]['erro'] is None
+    assert not resultados[0]['antes']['watertight'] and resultados[0]['depois']['watertight']
+    assert resultados[1]['erro'] is not None
+    pagina = open(caminho_html, encoding='utf-8').read()
+    for arquivo in resultados[0]['imagens_antes'] + resultados[0]['imagens_depois']:
+        assert f'imagens/{arquivo}' in pagina
+        assert os.path.exists(tmp_path / 'rel' / 'imagens' / arquivo)
+    assert 'nao_existe.stl' in pagina
+
+
+processar_peca = relatorio_lote.processar_peca
+
+
+def peca_que_derruba(indice, caminho, *args):
+    # Simula um worker morto pelo sistema (ex.: OOM killer) no meio do lote
+    if caminho.endswith('derruba.stl'):
+        os._exit(1)
+    return processar_peca(indice, caminho, *args)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='o worker precisa herdar o monkeypatch')
+def test_relatorio_lote_sobrevive_a_worker_morto(tmp_path, monkeypatch):
+    caminhos = []
+    for nome in ('a.stl', 'derruba.stl', 'b.stl', 'c.stl'):
+        caminhos.append(str(tmp_path / nome))
+        corpus.com_buracos(2)[0].export(caminhos[-1])
+    monkeypatch.setattr(relatorio_lote, 'processar_peca', peca_que_derruba)
+    _, resultados = gerar_relatorio(caminhos, str(tmp_path / 'rel'), workers=2, tamanho=32)
+    # Só a peça culpada fica com o erro; as que o pool quebrado levou junto foram refeitas
+    assert [r['erro'] is None for r in resultados] == [True, False, True, True]
+    assert 'morreu' in resultados[1]['erro'] and resultados[3]['depois']['watertight']
@@ -0,0 +1,114 @@
+"""CLI reparar_malha e formato nativo: ida e volta pelo disco."""
+import os
+
+import numpy as np
+import trimesh
+
+import corpus
+import formato_nativo
+from formato_nativo import (
+    cache_valido, caminho_cache, carregar_nativo, malha_de_secoes, salvar_cache, salvar_nativo, secoes_da_malha
+)
+from reparar_malha import reparar_malha
+from servico import ler_entrada
+
+
+def test_cli_repara_e_grava_cache(tmp_path):
+    entrada = str(tmp_path / 'furada.stl')
+    corpus.com_buracos(5)[0].export(entrada)
+    reparar_malha(entrada)
+    saida = str(tmp_path / 'furada_reparado.stl')
+    assert trimesh.load(saida).is_watertight
+    assert cache_valido(saida)
+
+
+def test_cli_le_o_cache_ao_lado_da_entrada(tmp_path):
+    entrada = str(tmp_path / 'peca.stl')
+    corpus.com_buracos(2)[0].export(entrada)
+    # Cache com outra geometria (fechada): se o CLI o usa, não há o que reparar
+    esfera = corpus.esfera(2)
+    salvar_cache(entrada, esfera)
+    resumo = reparar_malha(entrada, cache=False)
+    assert resumo['faces_antes'] == len(esfera.faces) and resumo['watertight_antes']
+
+
+def test_cli_sem_cache(tmp_path):
+    entrada = str(tmp_path / 'furada.stl')
+    saida = str(tmp_path / 'ok.stl')
+    corpus.com_buracos(2)[0].export(entrada)
+    reparar_malha(entrada, saida, cache=False)
+    assert os.path.exists(saida)
+    assert not os.path.exists(caminho_cache(saida))
+
+
+def test_cli_entrada_e_saida_nativas(tmp_path):
+    entrada = str(tmp_path / 'furada.md3d')
+    saida = str(tmp_path / 'ok.md3d')
+    salvar_nativo(entrada, secoes_da_malha(corpus.com_buracos(3)[0]))
+    reparar_malha(entrada, saida)
+    mesh, _ = malha_de_secoes(carregar_nativo(saida))
+    assert mesh.is_watertight
+
+
+def test_formato_nativo_ida_e_volta(tmp_path):
+    mesh = corpus.esfera(3)
+    caminho = str(tmp_path / 'esfera.md3d')
+    salvar_nativo(caminho, secoes_da_malha(mesh))
+    lida, _ = malha_de_secoes(carregar_nativo(caminho))
+    assert np.array_equal(lida.vertices, mesh.vertices)
+    assert np.array_equal(lida.faces, mesh.faces)
+    # A topologia restaurada vem com as entradas que o trimesh calcula junto
+    assert np.array_equal(lida.face_adjacency_edges, mesh.face_adjacency_edges)
+    assert np.array_equal(lida.edges_unique_inverse, mesh.edges_unique_inverse)
+    assert [sorted(v) for v in lida.vertex_neighbors] == [sorted(v) for v in mesh.vertex_neighbors]
+    assert len(lida.facets) == len(mesh.facets) and lida.is_convex
+
+
+def test_ler_entrada_ignora_cache_transladado(tmp_path, monkeypatch):
+    entrada = str(tmp_path / 'esfera.stl')
+    mesh = corpus.esfera(2)
+    mesh.apply_translation([50, 0, 0])
+    mesh.export(entrada)
+    centralizada = mesh.copy()
+    centralizada.apply_translation(-centralizada.bounding_box.centroid)
+    # Cache da versão 1 (a GUI gravava a malha já centralizada): o arquivo é lido de novo
+    monkeypatch.setattr(formato_nativo, 'VERSAO', 1)
+    salvar_nativo(caminho_cache(entrada), secoes_da_malha(centralizada))
+    monkeypatch.undo()
+    assert not cache_valido(entrada)
+    assert np.allclose(ler_entrada(entrada).bounds, mesh.bounds)
+    # Cache atual: a geometria do arquivo, lida sem parse
+    salvar_cache(entrada, mesh)
+    assert cache_valido(entrada)
+    assert np.allclose(ler_entrada(entrada).bounds, mesh.bounds)
+
+
+def test_cache_invalido_quando_a_origem_e_trocada_com_mtime_antigo(tmp_path):
+    entrada = str(tmp_path / 'peca.stl')
+    corpus.esfera(2).export(entrada)
+    salvar_cache(entrada, corpus.esfera(2))
+    assert cache_valido(entrada)
+    # Como um cp -p / rsync -a de um arquivo mais velho que o cache: outra malha, mtime no passado
+    outra = corpus.esfera(3)
+    outra.export(entrada)
+    estado = os.stat(caminho_cache(entrada))
+    os.utime(entrada, ns=(estado.st_atime_ns, estado.st_mtime_ns - 10 ** 9))
+    assert not cache_valido(entrada)
+    assert len(ler_entrada(entrada).faces) == len(outra.faces)
+
+
+def test_poligonos_so_ficam_com_os_mesmos_vertices(tmp_path):
+    from carregamento import ler_malha, processar_malha
+
+    # Dois quads lado a lado; na segunda versão a aresta comum vem com vértices repetidos
+    limpo = 'v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nv 2 0 0\nv 2 1 0\nf 1 2 3 4\nf 2 5 6 3\n'
+    repetido = limpo.replace('f 2 5 6 3', 'v 1 0 0\nv 1 1 0\nf 7 5 6 8')
+    for texto, mantidos in ((limpo, True), (repetido, False)):
+        caminho = str(tmp_path / 'quads.obj')
+        open(caminho, 'w').write(texto)
+        mesh, poligonos = ler_malha(caminho)
+        poligonos, aviso = processar_malha(mesh, poligonos)
+        assert aviso == '' and (poligonos is not None) == mantidos
+        if mantidos:
+            assert np.array_equal(poligonos.vertices, mesh.vertices)
+            assert set(poligonos.contagem_por_tamanho()) == {4}
@@ -0,0 +1,108 @@
+"""Serviço de reparo: jobs via HTTP num servidor em processo, fila limitada e cache das entradas."""
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+import trimesh
+
+import corpus
+from formato_nativo import caminho_cache
+from servico import CacheMalhas, ESTADOS_FINAIS, ServicoReparo, criar_servidor
+
+
+@pytest.fixture
+def servidor():
+    """Servidor numa porta livre de localhost, atendido numa thread; devolve a URL base"""
+    def abrir(servico):
+        servidor = criar_servidor(servico, porta=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        abertos.append(servidor)
+        return f'http://127.0.0.1:{servidor.server_address[1]}'
+
+    abertos = []
+    yield abrir
+    for servidor in abertos:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _pedir(url, corpo=None):
+    dados = None if corpo is None else json.dumps(corpo).encode('utf-8')
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=dados), timeout=10) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_job_via_http_ate_concluir(tmp_path, servidor):
+    entrada = str(tmp_path / 'peca.stl')
+    corpus.esfera(2).export(entrada)
+    base = servidor(ServicoReparo(workers=1))
+    codigo, resposta = _pedir(f'{base}/jobs', {
+        'entrada': entrada, 'saida': str(tmp_path / 'peca_ok.ply'),
+        'operacoes': [{'nome': 'subdivisao'}, {'nome': 'estatisticas'}],
+    })
+    assert codigo == 202
+    # Acompanha o job até um estado final, com o progresso só subindo
+    progressos = []
+    limite = time.monotonic() + 30
+    while True:
+        codigo, job = _pedir(f"{base}/jobs/{resposta['id']}")
+        assert codigo == 200
+        progressos.append(job['progresso'])
+        if job['estado'] in ESTADOS_FINAIS or time.monotonic() > limite:
+            break
+        time.sleep(0.05)
+    assert job['estado'] == 'concluido', job['erro']
+    assert progressos == sorted(progressos) and progressos[-1] == 1.0
+    assert [passo['nome'] for passo in job['resultado']['operacoes']] == ['subdivisao', 'estatisticas']
+    saida = trimesh.load(job['resultado']['saida'], force='mesh')
+    assert len(saida.faces) == job['resultado']['faces'] == 4 * len(corpus.esfera(2).faces)
+    assert os.path.exists(caminho_cache(job['resultado']['saida']))
+    assert [j['id'] for j in _pedir(f'{base}/jobs')[1]] == [resposta['id']]
+    # Pedido inválido e job desconhecido
+    assert _pedir(f'{base}/jobs', {'entrada': entrada, 'operacoes': [{'nome': 'nada'}]})[0] == 400
+    assert _pedir(f'{base}/jobs/inexistente')[0] == 404
+
+
+def test_fila_cheia_responde_503(tmp_path, servidor):
+    entrada = str(tmp_path / 'peca.stl')
+    corpus.esfera(1).export(entrada)
+    # Sem workers nada sai da fila: o segundo pedido não cabe
+    base = servidor(ServicoReparo(workers=0, fila_max=1))
+    assert _pedir(f'{base}/jobs', {'entrada': entrada})[0] == 202
+    codigo, resposta = _pedir(f'{base}/jobs', {'entrada': entrada})
+    assert codigo == 503
+    # O pedido recusado não fica na lista de jobs
+    jobs = _pedir(f'{base}/jobs')[1]
+    assert len(jobs) == 1 and jobs[0]['estado'] == 'na_fila'
+
+
+def test_cache_malhas_devolve_copias_e_relê_arquivo_trocado(tmp_path, monkeypatch):
+    import servico
+
+    entrada = str(tmp_path / 'peca.stl')
+    corpus.esfera(1).export(entrada)
+    lidos = []
+    ler = servico.ler_entrada
+    monkeypatch.setattr(servico, 'ler_entrada', lambda caminho: lidos.append(caminho) or ler(caminho))
+    cache = CacheMalhas(tamanho=1)
+    primeira = cache.obter(entrada)
+    primeira.vertices[:] = 0
+    segunda = cache.obter(entrada)
+    # Lido uma vez só; a cópia alterada não contamina o cache
+    assert len(lidos) == 1 and segunda.vertices.any()
+    # Arquivo trocado (outro tamanho) é relido
+    corpus.esfera(2).export(entrada)
+    assert len(cache.obter(entrada).faces) == len(corpus.esfera(2).faces) and len(lidos) == 2
+    # LRU de uma entrada: outro arquivo expulsa o primeiro
+    outra = str(tmp_path / 'outra.stl')
+    corpus.esfera(1).export(outra)
+    cache.obter(outra)
+    cache.obter(entrada)
+    assert len(lidos) == 4
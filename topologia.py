@@ -0,0 +1,47 @@
+"""Consultas topológicas vetorizadas: componentes conexas e compactação de vértices."""
+import numpy as np
+
+from analise_incremental import chaves_arestas
+
+
+def rotular_componentes(faces):
+    """Rótulo de componente conexa de cada face (faces ligadas por arestas compartilhadas)"""
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    faces = np.asarray(faces, dtype=np.int64)
+    n_faces = len(faces)
+    if n_faces == 0:
+        return 0, np.zeros(0, dtype=np.int64)
+    chaves = chaves_arestas(faces)
+    ordem = np.argsort(chaves, kind='stable')
+    # Ocorrências consecutivas da mesma aresta ligam as faces correspondentes
+    iguais = chaves[ordem[1:]] == chaves[ordem[:-1]]
+    origem = ordem[:-1][iguais] // 3
+    destino = ordem[1:][iguais] // 3
+    grafo = coo_matrix((np.ones(len(origem), dtype=np.int8), (origem, destino)), shape=(n_faces, n_faces))
+    n_componentes, rotulos = connected_components(grafo, directed=False)
+    return n_componentes, rotulos
+
+
+def compactar_vertices(vertices, faces):
+    """Remove vértices não referenciados, remapeando os índices das faces sem laço Python"""
+    faces = np.asarray(faces, dtype=np.int64)
+    usados = np.zeros(len(vertices), dtype=bool)
+    usados[faces.ravel()] = True
+    remapeamento = np.cumsum(usados) - 1
+    return np.asarray(vertices)[usados], remapeamento[faces]
+
+
+def remover_componentes_pequenos(vertices, faces, min_faces):
+    """Mantém só as componentes com pelo menos min_faces faces.
+
+    Retorna (vertices, faces, n_componentes, n_removidas); faces vazio indica que
+    nenhuma componente atende ao critério.
+    """
+    n_componentes, rotulos = rotular_componentes(faces)
+    faces_por_componente = np.bincount(rotulos, minlength=n_componentes)
+    manter = faces_por_componente[rotulos] >= min_faces
+    n_removidas = int(np.count_nonzero(faces_por_componente < min_faces))
+    novos_vertices, novas_faces = compactar_vertices(vertices, np.asarray(faces)[manter])
+    return novos_vertices, novas_faces, n_componentes, n_removidas
@@ -0,0 +1,194 @@
+"""Remesh por voxels esparsos: só blocos na faixa estreita da superfície, com marching cubes por bloco."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+NOS_POR_LOTE = 1 << 16
+
+
+def amostrar_superficie(vertices, faces, espacamento):
+    """Pontos da superfície com espaçamento máximo dado e a normal da face de origem de cada um"""
+    import trimesh
+
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    sub_vertices, sub_faces, origem = trimesh.remesh.subdivide_to_size(
+        vertices, faces, max_edge=espacamento, return_index=True)
+    tris = vertices[faces]
+    normais = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    normais /= np.maximum(np.linalg.norm(normais, axis=1), 1e-300)[:, None]
+    pontos = sub_vertices[sub_faces].mean(axis=1)
+    return pontos, normais[origem]
+
+
+def linhas_unicas(inteiros):
+    """Equivalente a np.unique(axis=0, return_index, return_inverse) para linhas (n, 3) de inteiros, via lexsort"""
+    ordem = np.lexsort(inteiros.T[::-1])
+    ordenadas = inteiros[ordem]
+    novo = np.r_[True, (ordenadas[1:] != ordenadas[:-1]).any(axis=1)]
+    grupo = np.cumsum(novo) - 1
+    inverso = np.empty(len(inteiros), dtype=np.int64)
+    inverso[ordem] = grupo
+    return ordem[novo], inverso
+
+
+def blocos_ativos(pontos, origem, tamanho_voxel, bloco):
+    """Blocos que contêm células da superfície ou vizinhas delas (faixa estreita)"""
+    celulas = np.floor((pontos - origem) / tamanho_voxel).astype(np.int64)
+    celulas = celulas[linhas_unicas(celulas)[0]]
+    deslocamentos = np.stack(np.meshgrid(*[np.arange(-1, 2)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    # Dilata em uma célula: só importa para células na borda do bloco
+    borda = celulas[((celulas % bloco == 0) | (celulas % bloco == bloco - 1)).any(axis=1)]
+    vizinhos = (borda[:, None, :] + deslocamentos[None]).reshape(-1, 3) // bloco
+    blocos = np.vstack([celulas // bloco, vizinhos])
+    return blocos[linhas_unicas(blocos)[0]]
+
+
+class _CampoImplicito:
+    """Distância assinada aproximada: média ponderada das distâncias aos planos das k amostras mais próximas"""
+
+    def __init__(self, pontos, normais, k=4):
+        from scipy.spatial import cKDTree
+
+        self.pontos = pontos
+        self.normais = normais
+        self.k = min(k, len(pontos))
+        self.arvore = cKDTree(pontos)
+
+    def avaliar(self, consultas, banda):
+        """Distância assinada até a banda; NaN para consultas sem amostras a menos de banda"""
+        distancias, vizinhos = self.arvore.query(consultas, k=self.k, distance_upper_bound=banda)
+        if self.k == 1:
+            distancias, vizinhos = distancias[:, None], vizinhos[:, None]
+        encontrados = np.isfinite(distancias)
+        vizinhos = np.where(encontrados, vizinhos, 0)
+        planos = np.einsum('ijk,ijk->ij', consultas[:, None, :] - self.pontos[vizinhos], self.normais[vizinhos])
+        pesos = np.where(encontrados, 1.0 / np.maximum(distancias, 1e-12), 0.0)
+        soma = pesos.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (planos * pesos).sum(axis=1) / soma
+
+
+def nos_dos_blocos(blocos, bloco):
+    """Nós (inteiros) da união dos blocos, sem repetição, e o índice de cada nó de cada bloco nessa lista"""
+    eixo = np.arange(bloco + 1, dtype=np.int32)
+    grade = np.stack(np.meshgrid(eixo, eixo, eixo, indexing='ij'), axis=-1).reshape(-1, 3)
+    todos = (blocos.astype(np.int32)[:, None, :] * bloco + grade[None]).reshape(-1, 3)
+    unicos, inverso = linhas_unicas(todos)
+    return todos[unicos], inverso.astype(np.int32).reshape(len(blocos), bloco + 1, bloco + 1, bloco + 1)
+
+
+def fronteira_da_uniao(blocos, indices):
+    """Nós em que alguma das 8 células que os tocam pertence a um bloco inativo (inclui arestas côncavas)"""
+    ativos = set(map(tuple, blocos.tolist()))
+    fronteira = np.zeros(indices.max() + 1, dtype=bool)
+    fatias = {-1: 0, 0: slice(None), 1: -1}
+    for b, indice_bloco in enumerate(blocos.tolist()):
+        for d in np.ndindex(3, 3, 3):
+            d = tuple(x - 1 for x in d)
+            if any(d) and tuple(np.add(indice_bloco, d)) not in ativos:
+                fronteira[indices[b][tuple(fatias[x] for x in d)]] = True
+    return fronteira
+
+
+def propagar_sinal(valores, indices, fronteira, banda):
+    """Sinal único para as regiões longe da superfície, decidido na união de todos os blocos.
+
+    Nós sem valor (NaN) e nós na fronteira da união formam regiões conexas
+    rotuladas de uma vez só; cada região recebe o sinal da maioria dos nós
+    próximos que a tocam. Assim um nó compartilhado nunca tem sinais
+    diferentes em blocos vizinhos e, como a fronteira inteira de uma região
+    tem o mesmo sinal, a superfície não sai pela borda do domínio (entradas
+    abertas também resultam em malha fechada).
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    longe = np.isnan(valores) | fronteira
+    if not longe.any():
+        return valores
+    n = len(valores)
+    # Toda aresta da união está dentro da grade de algum bloco: os pares vêm das grades
+    ligadas, toques = [], []
+    for eixo in range(1, 4):
+        i = np.delete(indices, -1, axis=eixo).ravel()
+        j = np.delete(indices, 0, axis=eixo).ravel()
+        ambos = longe[i] & longe[j]
+        ligadas.append((i[ambos], j[ambos]))
+        # Pares (nó longe, nó próximo) nos dois sentidos
+        so_i, so_j = longe[i] & ~longe[j], longe[j] & ~longe[i]
+        toques += [(i[so_i], j[so_i]), (j[so_j], i[so_j])]
+        del i, j, ambos, so_i, so_j
+    i, j = (np.concatenate(c) for c in zip(*ligadas))
+    del ligadas
+    grafo = coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(n, n))
+    del i, j
+    _, rotulos = connected_components(grafo, directed=False)
+    del grafo
+    # Votos: nós próximos vizinhos da região e os próprios nós da fronteira que têm valor
+    i, j = (np.concatenate(c) for c in zip(*toques))
+    votos = np.bincount(rotulos[i], weights=np.sign(valores[j]), minlength=n)
+    com_valor = fronteira & np.isfinite(valores)
+    votos += np.bincount(rotulos[com_valor], weights=np.sign(valores[com_valor]), minlength=n)
+    sinal = np.where(votos >= 0, 1.0, -1.0)[rotulos[longe]]
+    magnitude = np.where(np.isnan(valores[longe]), banda, np.maximum(np.abs(valores[longe]), 1e-6 * banda))
+    valores[longe] = sinal * magnitude
+    return valores
+
+
+def _malhar_bloco(valores, indice_bloco, origem, tamanho_voxel, bloco):
+    from skimage.measure import marching_cubes
+
+    if valores.min() >= 0 or valores.max() <= 0:
+        return None
+    inicio = origem + indice_bloco * bloco * tamanho_voxel
+    verts, faces, _, _ = marching_cubes(valores, level=0.0, spacing=(tamanho_voxel,) * 3)
+    return verts + inicio, faces
+
+
+def remesh_voxel_esparso(vertices, faces, tamanho_voxel, bloco=16, workers=None):
+    """Remesh suave e fechado a partir de um campo de distância amostrado só perto da superfície.
+
+    A memória é proporcional aos blocos ativos ((bloco+1)^3 nós cada) e não ao
+    volume da caixa envolvente. O campo é avaliado uma vez por nó da união dos
+    blocos, então os blocos vizinhos veem os mesmos valores na fronteira e são
+    costurados soldando os vértices coincidentes.
+    """
+    try:
+        import skimage.measure  # noqa: F401
+    except ImportError as e:
+        raise ImportError('O remesh por voxels requer o scikit-image (pip install scikit-image).') from e
+
+    vertices = np.asarray(vertices, dtype=np.float64)
+    pontos, normais = amostrar_superficie(vertices, faces, tamanho_voxel)
+    origem = vertices.min(axis=0) - 2 * tamanho_voxel
+    ativos = blocos_ativos(pontos, origem, tamanho_voxel, bloco)
+    nos, indices = nos_dos_blocos(ativos, bloco)
+    banda = 3 * tamanho_voxel
+    campo = _CampoImplicito(pontos, normais)
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Em lotes de nós: as consultas k-NN têm temporários de k x 3 por nó
+        lotes = range(0, len(nos), NOS_POR_LOTE)
+        valores = np.concatenate(list(executor.map(
+            lambda i: campo.avaliar(origem + nos[i:i + NOS_POR_LOTE] * tamanho_voxel, banda), lotes)))
+        del nos
+        valores = propagar_sinal(valores, indices, fronteira_da_uniao(ativos, indices), banda)
+        partes = list(executor.map(lambda i: _malhar_bloco(valores[indices[i]], ativos[i], origem, tamanho_voxel, bloco),
+                                   range(len(ativos))))
+    partes = [p for p in partes if p is not None]
+    if not partes:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+
+    offsets = np.cumsum([0] + [len(v) for v, _ in partes[:-1]])
+    todos_vertices = np.vstack([v for v, _ in partes])
+    todas_faces = np.vstack([f + o for (_, f), o in zip(partes, offsets)])
+    # Costura: vértices na fronteira entre blocos coincidem (mesmos nós e valores)
+    chaves = np.round((todos_vertices - origem) / (tamanho_voxel * 1e-4)).astype(np.int64)
+    unicos, inverso = linhas_unicas(chaves)
+    novas_faces = inverso[todas_faces]
+    validas = (novas_faces[:, 0] != novas_faces[:, 1]) & (novas_faces[:, 1] != novas_faces[:, 2]) & \
+        (novas_faces[:, 2] != novas_faces[:, 0])
+    return todos_vertices[unicos], novas_faces[validas]